@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+
+import coverage
+
+from main import _import_module, _make_executor, _make_tracer, _read_input_dir
+from util.corpus_minimization import minimize_corpus
+from util.util import log
+
+
+def cmin_main(args):
+    """
+    Minimize the inputs of `args.input_dir` to a subset covering the same edges, and write it to `args.output_dir`.
+    """
+    if os.path.exists(args.output_dir):
+        raise ValueError(f"{args.output_dir} already exists, not overwriting")
+    if args.executor is None:
+        args.executor = "FORKSERVER" if args.workers == 1 else "INPROCESS"
+    inputs = _read_input_dir(args.input_dir)
+    module_under_test, test_file_name = _import_module(args)
+    tracer = _make_tracer(args, coverage.Coverage(branch=True, data_file=None), test_file_name)
+    executor = _make_executor(args, module_under_test, tracer)
+    log(f"Minimizing {len(inputs)} inputs...")
+    kept_inputs, stats = minimize_corpus(inputs, executor)
+    executor.close()
+
+    os.mkdir(args.output_dir)
+    for i, input_data in enumerate(kept_inputs):
+        with open(os.path.join(args.output_dir, f"input_{i}"), "wb") as input_file:
+            input_file.write(input_data)
+    with open(os.path.join(args.output_dir, "cmin_stats.json"), "w") as stats_file:
+        stats_file.write(json.dumps(stats))
+    log(f"Kept {stats['kept_inputs']} of {stats['inputs']} inputs ({stats['failing_inputs']} failing) "
+        f"in {args.output_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Minimize a directory of inputs of the `test_one_input` function in a given module to a subset "
+                    "covering the same edges, and write it to a new directory.",
+    )
+    parser.add_argument(
+        "module_to_fuzz",
+        type=str,
+        help="the module to run the inputs on. Must contain function named `test_one_input`",
+    )
+    parser.add_argument("--input_dir", type=str, required=True, help="directory containing the inputs to minimize")
+    parser.add_argument("--output_dir", type=str, required=True, help="directory to write the minimized inputs to")
+    parser.add_argument(
+        "--tracer",
+        type=str,
+        choices=["COVERAGE", "SETTRACE", "INSTRUMENT"],
+        help="How to record the edges covered by each execution (see main.py)",
+        default="SETTRACE",
+    )
+    parser.add_argument(
+        "--instrument_package",
+        type=str,
+        nargs="*",
+        help="with --tracer INSTRUMENT, also instrument the modules of these packages",
+        default=[],
+    )
+    parser.add_argument(
+        "--executor",
+        type=str,
+        choices=["INPROCESS", "FORKSERVER"],
+        help="Where to run inputs with a single worker: in this process, or in forked children (the default, so that "
+             "inputs making the module exit do not stop the minimization)",
+        default=None,
+    )
+    parser.add_argument(
+        "--fork_batch_size",
+        type=int,
+        help="with --executor FORKSERVER, the number of inputs run in each forked child",
+        default=64,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes running the inputs in parallel",
+        default=os.cpu_count() or 1,
+    )
+    parser.add_argument(
+        "--edge_ids",
+        type=str,
+        help="edge_ids.json file saved by a previous run, to reuse its edge IDs",
+    )
+    cmin_main(parser.parse_args())
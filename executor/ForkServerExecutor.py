@@ -0,0 +1,81 @@
+import os
+import pickle
+import sys
+from typing import List, Tuple
+
+from models.EdgeRegistry import RemoteEdges
+from models.Executor import Executor
+from models.Tracer import Tracer
+from util.coverage_bitmap import to_bitmap
+
+
+class ForkServerExecutor(Executor):
+    """
+    Runs inputs in forked children of the fuzzer's process, which already imported the module under test.
+
+    Every batch of `batch_size` inputs runs in a fresh child, so changes the module under test makes to its
+    global state do not leak into later executions, and inputs that make it exit (eg. through `sys.exit`)
+    or crash the interpreter do not stop the fuzzer. The child reports the result of each input over a pipe.
+    """
+
+    def __init__(self, module_under_test, tracer: Tracer, batch_size: int = 1):
+        if not hasattr(os, "fork"):
+            raise ValueError("The fork server executor requires os.fork, which is not available on this platform")
+        super().__init__(module_under_test, tracer)
+        # Number of inputs executed by each child
+        self.batch_size = batch_size
+
+    def run(self, input_data: bytes) -> Tuple[bool, int, float]:
+        return self._run_in_child([input_data])[0]
+
+    def run_batch(self, inputs: List[bytes]) -> List[Tuple[bool, int, float]]:
+        results = []
+        for i in range(0, len(inputs), self.batch_size):
+            results.extend(self._run_in_child(inputs[i:i + self.batch_size]))
+        return results
+
+    def _child(self, inputs: List[bytes], write_fd: int):
+        self.tracer.after_fork()
+        with os.fdopen(write_fd, "wb") as pipe:
+            reported_edges = len(self.edge_registry)
+            for input_data in inputs:
+                has_error, edge_ids, exec_time = self.trace_input(input_data, catch_exit=True)
+                # send the edges registered by this execution along with its result
+                new_edges = self.edge_registry.edges[reported_edges:]
+                reported_edges = len(self.edge_registry)
+                pickle.dump((has_error, list(edge_ids), exec_time, new_edges), pipe)
+                pipe.flush()
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+    def _run_in_child(self, inputs: List[bytes]) -> List[Tuple[bool, int, float]]:
+        remote_edges = RemoteEdges(self.edge_registry, len(self.edge_registry))
+        # do not let the child inherit (and print again) our buffered output
+        sys.stdout.flush()
+        sys.stderr.flush()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            exit_code = 0
+            try:
+                self._child(inputs, write_fd)
+            except BaseException:
+                exit_code = 1
+            os._exit(exit_code)
+
+        os.close(write_fd)
+        results = []
+        with os.fdopen(read_fd, "rb") as pipe:
+            while len(results) < len(inputs):
+                try:
+                    has_error, edge_ids, exec_time, new_edges = pickle.load(pipe)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                remote_edges.add(new_edges)
+                results.append((has_error, to_bitmap(remote_edges.translate(edge_ids)), exec_time))
+        os.waitpid(pid, 0)
+        # the child died before reporting the remaining inputs (eg. the interpreter crashed)
+        for _ in range(len(results), len(inputs)):
+            results.append((True, 0, 0.0))
+        return results
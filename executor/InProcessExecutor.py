@@ -0,0 +1,14 @@
+from typing import Tuple
+
+from models.Executor import Executor
+from util.coverage_bitmap import to_bitmap
+
+
+class InProcessExecutor(Executor):
+    """
+    Runs inputs in the fuzzer's own process.
+    """
+
+    def run(self, input_data: bytes) -> Tuple[bool, int, float]:
+        has_error, edge_ids, exec_time = self.trace_input(input_data)
+        return has_error, to_bitmap(edge_ids), exec_time
@@ -0,0 +1,106 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+from typing import List, Tuple
+
+from models.EdgeRegistry import RemoteEdges
+from models.Executor import Executor
+from models.Tracer import Tracer
+from util.coverage_bitmap import to_bitmap
+
+
+class PoolExecutor(Executor):
+    """
+    Runs batches of inputs on a pool of `num_workers` worker processes, forked from the fuzzer's process
+    after it imported the module under test.
+
+    A batch is split into contiguous chunks, one per worker, and the results are returned in the order of
+    the inputs, so the fuzzer processes them deterministically. Single inputs (`run`, or a batch of one) are
+    executed by the first worker too, so that the module under test never runs (and never exits) in the
+    fuzzer's process.
+    """
+
+    def __init__(self, module_under_test, tracer: Tracer, num_workers: int):
+        if not hasattr(os, "fork"):
+            raise ValueError("The pool executor requires os.fork, which is not available on this platform")
+        super().__init__(module_under_test, tracer)
+        self.context = multiprocessing.get_context("fork")
+        # Number of worker processes
+        self.num_workers = num_workers
+        # Process, connection and edge ID mapping of each worker
+        self.workers: List[Tuple[multiprocessing.Process, multiprocessing.connection.Connection, RemoteEdges]] = [
+            self._start_worker() for _ in range(num_workers)
+        ]
+
+    def run(self, input_data: bytes) -> Tuple[bool, int, float]:
+        return self.run_batch([input_data])[0]
+
+    def run_batch(self, inputs: List[bytes]) -> List[Tuple[bool, int, float]]:
+        if len(inputs) == 0:
+            return []
+        chunk_size = -(-len(inputs) // self.num_workers)
+        chunks = [inputs[i:i + chunk_size] for i in range(0, len(inputs), chunk_size)]
+        for i, chunk in enumerate(chunks):
+            process, connection, _ = self.workers[i]
+            try:
+                connection.send(chunk)
+            except OSError as e:
+                process.join()
+                raise RuntimeError(f"Worker {i} of the executor pool exited (exit code {process.exitcode})") from e
+        results = []
+        for i, chunk in enumerate(chunks):
+            results.extend(self._receive(i, chunk))
+        return results
+
+    def close(self):
+        for process, connection, _ in self.workers:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            process.join()
+        self.workers = []
+
+    def _start_worker(self):
+        # do not let the worker inherit (and print again) our buffered output
+        sys.stdout.flush()
+        sys.stderr.flush()
+        connection, worker_connection = self.context.Pipe()
+        remote_edges = RemoteEdges(self.edge_registry, len(self.edge_registry))
+        process = self.context.Process(target=self._worker, args=(worker_connection,), daemon=True)
+        process.start()
+        worker_connection.close()
+        return process, connection, remote_edges
+
+    def _worker(self, connection):
+        self.tracer.after_fork()
+        reported_edges = len(self.edge_registry)
+        while True:
+            inputs = connection.recv()
+            if inputs is None:
+                break
+            results = []
+            for input_data in inputs:
+                has_error, edge_ids, exec_time = self.trace_input(input_data, catch_exit=True)
+                results.append((has_error, list(edge_ids), exec_time))
+            # send the edges registered by this chunk along with its results
+            new_edges = self.edge_registry.edges[reported_edges:]
+            reported_edges = len(self.edge_registry)
+            connection.send((results, new_edges))
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    def _receive(self, worker_index: int, chunk: List[bytes]) -> List[Tuple[bool, int, float]]:
+        process, connection, remote_edges = self.workers[worker_index]
+        try:
+            results, new_edges = connection.recv()
+        except (EOFError, OSError):
+            # the worker died (eg. the interpreter crashed): replace it and count the whole chunk as errors
+            process.join()
+            connection.close()
+            self.workers[worker_index] = self._start_worker()
+            return [(True, 0, 0.0) for _ in chunk]
+        remote_edges.add(new_edges)
+        return [(has_error, to_bitmap(remote_edges.translate(edge_ids)), exec_time)
+                for has_error, edge_ids, exec_time in results]
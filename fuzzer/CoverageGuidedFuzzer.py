@@ -3,8 +3,9 @@ import random
 import time
 from typing import Set
 
-from models.SavedInput import SavedInput
-from models.Fuzzer import Fuzzer
+from models.Executor import Executor
+from models.Fuzzer import Fuzzer, CHECKPOINT_INTERVAL, DEDUP_MEMORY, DEDUP_FALSE_POSITIVE_RATE
+from models.Tracer import Tracer
 
 
 class CoverageGuidedFuzzer(Fuzzer):
@@ -19,46 +20,26 @@ class CoverageGuidedFuzzer(Fuzzer):
             cov: coverage.Coverage,
             output_dir: str,
             initial_inputs: Set[bytes] = None,
+            tracer: Tracer = None,
+            executor: Executor = None,
+            power_schedule: str = "DEFAULT",
+            dedup_memory: int = DEDUP_MEMORY,
+            dedup_false_positive_rate: float = DEDUP_FALSE_POSITIVE_RATE,
+            trim: bool = True,
+            checkpoint_interval: float = CHECKPOINT_INTERVAL,
     ):
-        super().__init__(module_under_test, test_file_name, cov, output_dir)
+        super().__init__(module_under_test, test_file_name, cov, output_dir, tracer, executor, power_schedule,
+                         dedup_memory, dedup_false_positive_rate, trim, checkpoint_interval)
         # Start with an input of 20 null bytes if no initial inputs are provided.
         if initial_inputs is None:
             initial_inputs = {b"\x00" * 20}
         # Set up the initital inputs to populate `self.saved_inputs`
-        for input_data in initial_inputs:
-            has_error, input_cov, exec_time = self.exec_with_coverage(input_data)
+        seeds = self.triage_seeds(initial_inputs)
+        start_time = time.time()
+        for input_data, has_error, input_cov, exec_time in seeds:
             self.save_if_has_new_coverage(input_data, has_error, input_cov, exec_time)
-
-    def fuzz_prob(self, saved_input: SavedInput) -> float:
-        """
-        Return the probability with which we should select `saved_input` for mutation.
-        """
-        minimum_mutated_times = min([i.times_mutated for i in self.saved_inputs])
-        return 1 / (1 + (saved_input.times_mutated - minimum_mutated_times))
-
-    def num_mutants(self, saved_input: SavedInput) -> int:
-        """
-        Return the number of mutated inputs we should produce from `saved_input`.
-        """
-        base_children = 10
-        # Boost for not mutated recently
-        base_children += base_children * (max(4 - saved_input.times_mutated, 0))
-        # Boost for smaller than average
-        smaller_boost = (
-            2
-            if len(saved_input.data)
-               < sum([len(i.data) for i in self.saved_inputs]) / len(self.saved_inputs)
-            else 1
-        )
-        # Boost for faster-running than average
-        faster_boost = (
-            4
-            if saved_input.runtime
-               < sum([i.runtime for i in self.saved_inputs]) / len(self.saved_inputs)
-            else 1
-        )
-        base_children = base_children * smaller_boost * faster_boost
-        return base_children
+        self.startup_times["filtering"] = time.time() - start_time
+        self.log_startup_times()
 
     def mutate_input(self, input_data: bytes) -> bytes:
         """
@@ -98,21 +79,22 @@ class CoverageGuidedFuzzer(Fuzzer):
         """
         start_time = time.time()
         while time.time() - start_time < search_time:
+            self.scheduler.update()
             num_saved_inputs = len(self.saved_inputs)
             for i in range(0, num_saved_inputs):
                 saved_input = self.saved_inputs[i]
-                # random.random() returns a float in [0,1). There is a higher
-                # chance of fuzzing `saved_input` if `fuzz_prob(saved_input)`
-                # is near 1.
-                if random.random() < self.fuzz_prob(saved_input):
-                    num_mutants = self.num_mutants(saved_input)
-                    for _ in range(0, num_mutants):
-                        mutated_input = self.mutate_input(saved_input.data)
-                        has_error, input_cov, exec_time = self.exec_with_coverage(
-                            mutated_input
-                        )
+                if self.scheduler.should_fuzz(saved_input):
+                    num_mutants = self.scheduler.num_mutants(saved_input)
+                    mutated_inputs = [self.mutate_input(saved_input.data) for _ in range(0, num_mutants)]
+                    # skip the mutants that were already executed
+                    mutated_inputs = [m for m in mutated_inputs if not self.is_duplicate(m)]
+                    # execute the mutants as one batch, which an executor pool runs in parallel
+                    results = self.executor.run_batch(mutated_inputs)
+                    for mutated_input, (has_error, input_cov, exec_time) in zip(mutated_inputs, results):
+                        self.scheduler.record(input_cov, saved_input)
                         self.save_if_has_new_coverage(
                             mutated_input, has_error, input_cov, exec_time
                         )
-                    saved_input.times_mutated += 1
+                    self.scheduler.mark_mutated(saved_input)
+                self.maybe_save_checkpoint()
         self.save_data()
@@ -12,24 +12,39 @@ Authors: Caroline Lemieux + <YOURNAME> for CPSC 539L
 Took caroline 28 minutes to complete the programming assignment part of it.
 """
 
+import collections
 import logging
 import os
 import random
 import time
 import json
-from typing import Tuple, Set, Union, List, Dict
+from typing import Tuple, Set, Union, List, Dict, Callable
 
 import coverage
 
 from models.Blank import Blank
-from models.Fuzzer import Fuzzer
+from models.BlankedInput import BlankedInput
+from models.Executor import Executor
+from models.Fuzzer import Fuzzer, CHECKPOINT_INTERVAL, DEDUP_MEMORY, DEDUP_FALSE_POSITIVE_RATE
 from models.GeneralizedInput import GeneralizedInput
 from models.SavedInput import SavedInput
+from models.SplittingRule import SplittingRule, default_splitting_rules
+from models.Tracer import Tracer
+from util.coverage_bitmap import count_covered, has_new_bits
 from util.dictionary_builder import build_dictionary
-from util.grimoire_util import random_generalized
-from util.splitting_rules import increment_by_offset, find_gaps, find_next_char, find_closures, find_gaps_in_closures
+from util.dictionary_matcher import DictionaryMatcher, non_overlapping_ranges
+from util.generalization_queue import GeneralizationQueue
+from util.grimoire_util import random_generalized, replace_random_gaps
+from util.splitting_rules import find_gaps_ddmin
 from util.util import log, str_to_bytes, replace_all_instances, replace_random_instance, find_random_substring
 
+# Maximum number of candidates whose new edges are remembered during one generalization
+GENERALIZATION_MEMO_SIZE = 4096
+# Maximum number of inputs queued per generalization worker, so that the workers' pipes do not fill up
+GENERALIZATIONS_PER_WORKER = 2
+# Number of mutants queued per worker of a parallel executor before they are executed as one batch
+MUTANT_BATCH_PER_WORKER = 4
+
 
 class GrimoireFuzzer(Fuzzer):
     def __init__(
@@ -39,9 +54,19 @@ class GrimoireFuzzer(Fuzzer):
             cov: coverage.Coverage,
             output_dir: str,
             initial_inputs: Set[bytes] = None,
-            cumulative: bool = True
+            cumulative: bool = True,
+            tracer: Tracer = None,
+            executor: Executor = None,
+            generalization: str = "SPLITTING_RULES",
+            generalization_workers: int = 0,
+            power_schedule: str = "DEFAULT",
+            dedup_memory: int = DEDUP_MEMORY,
+            dedup_false_positive_rate: float = DEDUP_FALSE_POSITIVE_RATE,
+            trim: bool = True,
+            checkpoint_interval: float = CHECKPOINT_INTERVAL,
     ):
-        super().__init__(module_under_test, test_file_name, cov, output_dir)
+        super().__init__(module_under_test, test_file_name, cov, output_dir, tracer, executor, power_schedule,
+                         dedup_memory, dedup_false_positive_rate, trim, checkpoint_interval)
         # Start with an input of 20 null bytes if no initial inputs are provided.
         if initial_inputs is None:
             initial_inputs = {b"\x00" * 20}
@@ -53,49 +78,81 @@ class GrimoireFuzzer(Fuzzer):
         self.generalized_map: Dict[bytes, GeneralizedInput] = {}
         # provided dictionary obtained from the binary
         self.strings: List[bytes] = [str_to_bytes(s) for s in build_dictionary(test_file_name)]
+        # matcher finding all the occurrences of the dictionary's strings in one pass, and the occurrences
+        # found in each saved input, shared by the string replacements of the input
+        self.string_matcher = DictionaryMatcher(self.strings)
+        self.string_occurrences: Dict[bytes, Dict[bytes, List[int]]] = {}
 
         # cumulative flag for input generalization
         self.cumulative = cumulative
 
-        # Set up the initial inputs to populate `self.saved_inputs`
-        for input_data in initial_inputs:
-            has_error, input_cov, exec_time = self.exec_with_coverage(input_data)
-            logging.warning("fuzzing seed")
-            self.generalize_and_save_if_has_new_coverage(input_data, has_error, input_cov, exec_time)
-
-    def is_generalized(self, input_bytes: bytes):
-        return input_bytes in self.generalized_map
+        # input generalization strategy: "SPLITTING_RULES" or "DDMIN"
+        self.generalization = generalization
+        # splitting rules of the "SPLITTING_RULES" strategy, with their statistics over the campaign
+        self.splitting_rules: List[SplittingRule] = default_splitting_rules()
+        # number of executions spent generalizing inputs
+        self.generalization_executions = 0
+
+        # mutated inputs waiting to be executed as one batch, and the saved input they are mutated from
+        self.mutant_batch: List[bytes] = []
+        self.parent_input: Union[SavedInput, None] = None
+
+        # if set, inputs are generalized in the background, and saved inputs wait in
+        # `pending_generalizations` until their generalization is collected, with the coverage snapshot
+        # (new edges and virgin map) they are generalized against
+        self.generalization_queue: Union[GeneralizationQueue, None] = None
+        if generalization_workers > 0:
+            self.generalization_queue = GeneralizationQueue(self, generalization_workers)
+        self.pending_generalizations: Dict[bytes, Tuple[SavedInput, int, int]] = {}
+
+        # Set up the initial inputs to populate `self.saved_inputs`: keep the ones with new coverage, with the
+        # edges they cover first and the coverage before them, and then generalize these
+        seeds = self.triage_seeds(initial_inputs)
+        start_time = time.time()
+        new_seeds: List[Tuple[SavedInput, int, int]] = []
+        for input_data, has_error, input_cov, exec_time in seeds:
+            new_edges, virgin_bits = input_cov & self.virgin_bits, self.virgin_bits
+            saved_input = self.save_if_has_new_coverage(input_data, has_error, input_cov, exec_time)
+            if saved_input is not None:
+                new_seeds.append((saved_input, new_edges, virgin_bits))
+        self.startup_times["filtering"] = time.time() - start_time
+        start_time = time.time()
+        self.generalize_seeds(new_seeds)
+        self.startup_times["generalization"] = time.time() - start_time
+        self.log_startup_times()
 
-    def fuzz_prob(self, saved_input: SavedInput) -> float:
+    def generalize_seeds(self, new_seeds: List[Tuple[SavedInput, int, int]]):
         """
-        Return the probability with which we should select `saved_input` for mutation.
+        Generalize the saved seeds, each against the coverage before it was saved. With generalization workers,
+        the seeds are generalized in parallel, and fuzzing starts once they are all generalized.
         """
-        minimum_mutated_times = min([i.times_mutated for i in self.saved_inputs])
-        return 1 / (1 + (saved_input.times_mutated - minimum_mutated_times))
-
-    def num_mutants(self, saved_input: SavedInput) -> int:
+        if self.generalization_queue is None:
+            for saved_input, new_edges, virgin_bits in new_seeds:
+                generalized_input = self.generalize(saved_input.data, new_edges, virgin_bits=virgin_bits)
+                self.update_splitting_rules()
+                self.add_generalized(saved_input, generalized_input)
+            return
+        for saved_input, new_edges, virgin_bits in new_seeds:
+            self.submit_generalization(saved_input, new_edges, virgin_bits)
+        while len(self.pending_generalizations) != 0:
+            self.generalization_queue.wait()
+            self.collect_generalizations()
+
+    def submit_generalization(self, saved_input: SavedInput, new_edges: int, virgin_bits: int):
         """
-        Return the number of mutated inputs we should produce from `saved_input`.
+        Queue `saved_input` for generalization in the background, against the coverage snapshot `new_edges` and
+        `virgin_bits`. At most GENERALIZATIONS_PER_WORKER inputs per worker are queued at a time, so that the
+        workers' pipes do not fill up: when the queue is full, wait for (and collect) a finished generalization.
         """
-        base_children = 10
-        # Boost for not mutated recently
-        base_children += base_children * (max(4 - saved_input.times_mutated, 0))
-        # Boost for smaller than average
-        smaller_boost = (
-            2
-            if len(saved_input.data)
-               < sum([len(i.data) for i in self.saved_inputs]) / len(self.saved_inputs)
-            else 1
-        )
-        # Boost for faster-running than average
-        faster_boost = (
-            4
-            if saved_input.runtime
-               < sum([i.runtime for i in self.saved_inputs]) / len(self.saved_inputs)
-            else 1
-        )
-        base_children = base_children * smaller_boost * faster_boost
-        return base_children
+        max_queued = GENERALIZATIONS_PER_WORKER * len(self.generalization_queue.workers)
+        while len(self.generalization_queue) >= max_queued:
+            self.generalization_queue.wait()
+            self.collect_generalizations()
+        self.generalization_queue.submit(saved_input.data, new_edges, virgin_bits)
+        self.pending_generalizations[saved_input.data] = (saved_input, new_edges, virgin_bits)
+
+    def is_generalized(self, input_bytes: bytes):
+        return input_bytes in self.generalized_map
 
     def mutate_input(self, input_bytes: bytes) -> bytes:
         """
@@ -105,7 +162,10 @@ class GrimoireFuzzer(Fuzzer):
         """
 
         def havoc_amount() -> int:  # note: removed input_bytes parameter
-            return 1 << random.randint(1, 7)
+            amount = 1 << random.randint(1, 7)
+            if self.parent_input is None:
+                return amount
+            return self.scheduler.scale(amount, self.parent_input)
 
         # perhaps some constants here are related https://github.com/RUB-SysSec/redqueen/search?l=Python&q=havoc
         # n ← havoc_amount(input.performance())
@@ -118,20 +178,38 @@ class GrimoireFuzzer(Fuzzer):
                 self.input_extension(generalized_input)
                 self.recursive_replacement(generalized_input)
             self.string_replacement(input_bytes, self.strings)
+        self.execute_mutant_batch()
 
     def send_to_fuzzer(self, input_bytes: bytes):
         """
         implies that the fuzzer executes the target application with the mutated input.
         It expects concrete inputs. Thus, mutations working
         on generalized inputs first replace all remaining [] by an empty string
+
+        If the executor runs inputs in parallel, the input is queued and executed with the next
+        `MUTANT_BATCH_PER_WORKER` mutants per worker by `execute_mutant_batch`; otherwise it is executed
+        right away. An input that was already executed is skipped.
         """
         # logging.debug(f"!!! SENDING TO FUZZER: {input_bytes}")
-        has_error, input_cov, exec_time = self.exec_with_coverage(
-            input_bytes
-        )
-        self.generalize_and_save_if_has_new_coverage(
-            input_bytes, has_error, input_cov, exec_time
-        )
+        if self.is_duplicate(input_bytes):
+            return
+        self.mutant_batch.append(input_bytes)
+        num_workers = self.executor.num_workers
+        if num_workers == 1 or len(self.mutant_batch) >= num_workers * MUTANT_BATCH_PER_WORKER:
+            self.execute_mutant_batch()
+
+    def execute_mutant_batch(self):
+        """
+        Execute the queued mutants, and save (and generalize) the coverage-increasing ones in the order
+        they were queued.
+        """
+        batch = self.mutant_batch
+        self.mutant_batch = []
+        for input_bytes, (has_error, input_cov, exec_time) in zip(batch, self.executor.run_batch(batch)):
+            self.scheduler.record(input_cov, self.parent_input)
+            self.generalize_and_save_if_has_new_coverage(
+                input_bytes, has_error, input_cov, exec_time
+            )
 
     def input_extension(self, generalized_input: GeneralizedInput):
         """
@@ -149,34 +227,15 @@ class GrimoireFuzzer(Fuzzer):
         self.send_to_fuzzer(rand + input_bytes)
 
     def recursive_replacement(self, generalized_input: GeneralizedInput):
-        def pad_with_gaps(generalized_input: GeneralizedInput) -> GeneralizedInput:
-            # adding gaps to the beginning and the end of inputs
-            return GeneralizedInput([Blank.get_blank()] + generalized_input.input + [Blank.get_blank()])
-
         def random_power_of_two() -> int:
             # arbitrarily chosen
             return pow(2, random.randint(1, 10))
 
-        def replace_random_gaps(generalized_input: GeneralizedInput,
-                                rand: Union[GeneralizedInput, bytes]) -> GeneralizedInput:
-            blank_pos = [i for i in range(len(generalized_input.input)) if
-                         isinstance(generalized_input.input[i], Blank)]
-            if len(blank_pos) == 0:
-                return GeneralizedInput(generalized_input.input[:])
-            chosen = random.choice(blank_pos)
-            rand_list = []
-            if isinstance(rand, GeneralizedInput):
-                rand_list = rand.input
-            else:
-                rand_list.append(rand)
-            return GeneralizedInput(generalized_input.input[:chosen] + rand_list + generalized_input.input[chosen + 1:])
-
-        generalized_input = pad_with_gaps(generalized_input)
-        for i in range(0, random_power_of_two()):
-            rand = random_generalized(self.generalized, self.strings)
-            generalized_input = replace_random_gaps(generalized_input, rand)
+        # adding gaps to the beginning and the end of inputs, and replacing random gaps
+        data = replace_random_gaps(generalized_input, random_power_of_two(),
+                                   lambda: random_generalized(self.generalized, self.strings))
         # logging.debug("recursive replacement")
-        self.send_to_fuzzer(generalized_input.get_bytes())
+        self.send_to_fuzzer(data)
 
     def string_replacement(self, input_bytes: bytes, strings: List[bytes]):
         """
@@ -193,15 +252,23 @@ class GrimoireFuzzer(Fuzzer):
                 return None
             return random.choice(strings)
 
+        occurrences = None
+        if strings is self.strings:
+            occurrences = self.string_occurrences.get(input_bytes)
+            if occurrences is None:
+                occurrences = self.string_matcher.find_all(input_bytes)
+                self.string_occurrences[input_bytes] = occurrences
+
         # note that currently find_random_substring finds all among overlapping substrings,
         # but replace_all_instances will replace non-overlapping instances
-        sub = find_random_substring(input_bytes, strings)
+        sub = find_random_substring(input_bytes, strings, occurrences)
         if sub:
             rand = random_string(strings)
-            data = replace_random_instance(input_bytes, sub, rand)
+            match_ranges = non_overlapping_ranges(occurrences[sub], len(sub)) if occurrences is not None else None
+            data = replace_random_instance(input_bytes, sub, rand, match_ranges)
             # logging.debug("string replacement 1")
             self.send_to_fuzzer(data)
-            data = replace_all_instances(input_bytes, sub, rand)
+            data = replace_all_instances(input_bytes, sub, rand, match_ranges)
             # logging.debug("string replacement 2")
             self.send_to_fuzzer(data)
 
@@ -212,85 +279,115 @@ class GrimoireFuzzer(Fuzzer):
         """
         start_time = time.time()
         while time.time() - start_time < search_time:
+            self.scheduler.update()
             num_saved_inputs = len(self.saved_inputs)
             for i in range(0, num_saved_inputs):
                 saved_input = self.saved_inputs[i]
-                # random.random() returns a float in [0,1). There is a higher
-                # chance of fuzzing `saved_input` if `fuzz_prob(saved_input)`
-                # is near 1.
-                if random.random() < self.fuzz_prob(saved_input):
+                if self.scheduler.should_fuzz(saved_input):
+                    self.parent_input = saved_input
                     self.mutate_input(
                         saved_input.data)  # performs different mutations one at a time and sends each to fuzzer
-
-                    saved_input.times_mutated += 1
+                    self.parent_input = None
+
+                    self.scheduler.mark_mutated(saved_input)
+                self.collect_generalizations()
+                self.maybe_save_checkpoint()
+        self.collect_generalizations()
+        if self.generalization_queue is not None:
+            self.generalization_queue.close()
         self.save_data()
 
-    def generalize(self, input_data: bytes, new_edges: Set[Tuple[str, int, int]], splitting_rule=None):
-
-        def get_new_bytes(candidate):  # change to edges for the coverage library
-            _, edges, _ = self.exec_with_coverage(candidate)
-            return edges.difference(self.edges_covered)
-
-        def candidate_check(candidate: bytes):
-            # logging.debug(f"checking candidate for blank: {candidate}")
-            original_edges = new_edges
-            candidate_edges = get_new_bytes(candidate)
-            # logging.warning(f"CANDIDATE BYTES {sorted(candidate_edges)}")
-            # logging.warning(f"ORIGINAL BYTES {sorted(original_edges)}")
-            # logging.warning(f"ORIGINAL-CANDIDATE {original_edges.difference(candidate_edges)}")
-            # logging.warning(f"CANDIDATE-ORIGINAL {candidate_edges.difference(original_edges)}")
-            return get_new_bytes(candidate) == new_edges
-
-        generalized_input = GeneralizedInput([input_data]).to_exploded_input()
-
-        # Delete-blank Generalization
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, increment_by_offset, 256, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, increment_by_offset, 128, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, increment_by_offset, 64, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, increment_by_offset, 32, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, increment_by_offset, 1, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, find_next_char, '.', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, find_next_char, ';', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, find_next_char, ',', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, find_next_char, '\n', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, find_next_char, '\r', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, find_next_char, '#', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.DELETE, candidate_check, find_next_char, ' ', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.DELETE, candidate_check, find_closures, '(', ')', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.DELETE, candidate_check, find_closures, '[', ']', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.DELETE, candidate_check, find_closures, '{', '}', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.DELETE, candidate_check, find_closures, '<', '>', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.DELETE, candidate_check, find_closures, '\'', '\'', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.DELETE, candidate_check, find_closures, '"', '"', self.cumulative)
-        # logging.debug(f"Input with delete blanks: {''.join([s if isinstance(s, str) else s.pretty_print() for s in generalized_input])}")
-
-        # Replace-blank Generalization
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, increment_by_offset, 256, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, increment_by_offset, 128, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, increment_by_offset, 64, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, increment_by_offset, 32, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, increment_by_offset, 1, self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, find_next_char, '.', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, find_next_char, ';', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, find_next_char, ',', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, find_next_char, '\n', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, find_next_char, '\r', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, find_next_char, '#', self.cumulative)
-        generalized_input = find_gaps(generalized_input, Blank.REPLACE, candidate_check, find_next_char, ' ', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.REPLACE, candidate_check, find_closures, '(', ')', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.REPLACE, candidate_check, find_closures, '[', ']', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.REPLACE, candidate_check, find_closures, '{', '}', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.REPLACE, candidate_check, find_closures, '<', '>', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.REPLACE, candidate_check, find_closures, '\'', '\'', self.cumulative)
-        generalized_input = find_gaps_in_closures(generalized_input, Blank.REPLACE, candidate_check, find_closures, '"', '"', self.cumulative)
-
-        return GeneralizedInput(generalized_input, is_exploded_data=True)
+    def generalize(self, input_data: bytes, new_edges: int, splitting_rule=None, virgin_bits: int = None):
+        # the candidates must cover `new_edges` among the edges not covered by `virgin_bits`, the current
+        # coverage by default
+        if virgin_bits is None:
+            virgin_bits = self.virgin_bits
+
+        # The splitting rules generate many identical candidates, so remember the new edges of each candidate
+        # for the duration of this generalization (the covered edges do not change until it is done).
+        memo: collections.OrderedDict[bytes, int] = collections.OrderedDict()
+        num_candidates = 0
+        num_executions = 0
+
+        def candidates_check(candidates: List[bytes]) -> List[bool]:
+            nonlocal num_candidates, num_executions
+            # new edges of each distinct candidate, None until executed
+            candidate_edges: Dict[bytes, Union[int, None]] = {}
+            missing = []
+            for candidate in candidates:
+                if candidate in candidate_edges:
+                    continue
+                if candidate in memo:
+                    memo.move_to_end(candidate)
+                    candidate_edges[candidate] = memo[candidate]
+                else:
+                    candidate_edges[candidate] = None
+                    missing.append(candidate)
+            # execute the candidates that are not in the memo as one batch
+            for candidate, (_, edges, _) in zip(missing, self.executor.run_batch(missing)):
+                candidate_edges[candidate] = memo[candidate] = edges & virgin_bits
+                if len(memo) > GENERALIZATION_MEMO_SIZE:
+                    memo.popitem(last=False)
+            num_candidates += len(candidates)
+            num_executions += len(missing)
+            self.generalization_executions += len(missing)
+            return [candidate_edges[candidate] == new_edges for candidate in candidates]
+
+        generalized_input = BlankedInput(input_data)
+
+        if self.generalization == "DDMIN":
+            generalized_input = self.generalize_ddmin(generalized_input, candidates_check)
+        else:
+            generalized_input = self.generalize_splitting_rules(generalized_input, candidates_check)
+
+        logging.info(f"Generalization: {num_candidates} candidate checks, {num_executions} executions "
+                     f"(memo hit rate {1 - num_executions / max(num_candidates, 1):.1%})")
+        return generalized_input.to_generalized_input()
+
+    def generalize_splitting_rules(self, generalized_input: BlankedInput,
+                                   candidates_check: Callable[[List[bytes]], List[bool]]) -> BlankedInput:
+        """
+        Generalize an input with the splitting rules of Grimoire (see `default_splitting_rules`), skipping
+        the rules that cannot match the input and the rules dropped for their poor yield.
+        """
+        for rule in self.splitting_rules:
+            if rule.dropped:
+                continue
+            if not rule.matches(generalized_input):
+                rule.skipped += 1
+                continue
+            executions = self.generalization_executions
+            kept_bytes = generalized_input.kept_offset(len(generalized_input))
+            generalized_input = rule.apply(generalized_input, candidates_check, self.cumulative)
+            rule.applied += 1
+            rule.executions += self.generalization_executions - executions
+            rule.blanked_bytes += kept_bytes - generalized_input.kept_offset(len(generalized_input))
+        return generalized_input
+
+    def update_splitting_rules(self):
+        """
+        Drop the splitting rules whose yield is too low, once they spent their trial executions.
+        """
+        for rule in self.splitting_rules:
+            if rule.update():
+                log(f"Dropping splitting rule {rule.name}: {rule.blanked_bytes} bytes blanked "
+                    f"in {rule.executions} executions")
+
+    def generalize_ddmin(self, generalized_input: BlankedInput,
+                         candidates_check: Callable[[List[bytes]], List[bool]]) -> BlankedInput:
+        """
+        Generalize an input by hierarchical delta debugging, first with delete blanks and then with
+        replace blanks.
+        """
+        generalized_input = find_gaps_ddmin(generalized_input, Blank.DELETE, candidates_check, self.cumulative)
+        generalized_input = find_gaps_ddmin(generalized_input, Blank.REPLACE, candidates_check, self.cumulative)
+        return generalized_input
 
     def generalize_and_save_if_has_new_coverage(
             self,
             input_data: bytes,
             has_error: bool,
-            input_coverage: Set[Tuple[str, int, int]],
+            input_coverage: int,
             exec_time: float,
     ):
         """
@@ -301,49 +398,104 @@ class GrimoireFuzzer(Fuzzer):
         def splitting_rule():
             return NotImplemented
 
-        for edge in input_coverage:
-            if edge not in self.edges_covered and not has_error:
-                # logging.warning(f"NEW EDGES COVERED: {sorted(input_coverage.difference(self.edges_covered))}")
-                generalized_input: GeneralizedInput = self.generalize(input_data,
-                                                                      input_coverage.difference(self.edges_covered),
-                                                                      splitting_rule)
-                self.edges_covered = self.edges_covered.union(input_coverage)
-                self.saved_inputs.append(
-                    SavedInput(input_data, input_coverage, exec_time, generalized_input)
-                )
-                # this is the only new part here
-                # logging.debug(f"{input_data} ---generalized to---> {generalized_input.input} = {generalized_input}")
-                logging.debug(f"{input_data} ---generalized to---> {generalized_input.pretty_print()}")
-                self.generalized.append(generalized_input)
-                self.generalized_map[input_data] = generalized_input
-
-                self.coverage_through_time.append(
-                    (
-                        time.time(),
-                        len(self.edges_covered),
-                        len(self.edges_covered_failing),
-                    )
-                )
-                logging.info(f"Found new coverage. Total coverage: {len(self.edges_covered)}")
-                log(f"Found new coverage. Total coverage: {len(self.edges_covered)}")
-                break
-            if edge not in self.edges_covered_failing and has_error:
-                self.edges_covered_failing = self.edges_covered_failing.union(
-                    input_coverage
-                )
-                self.failing_inputs.append(
-                    SavedInput(input_data, input_coverage, exec_time)
+        if not has_error and has_new_bits(input_coverage, self.virgin_bits):
+            # logging.warning(f"NEW EDGES COVERED: {input_coverage & self.virgin_bits}")
+            input_data, exec_time = self.trim_input(input_data, input_coverage, exec_time)
+            new_edges, virgin_bits = input_coverage & self.virgin_bits, self.virgin_bits
+            if self.generalization_queue is not None:
+                generalized_input = None
+            else:
+                generalized_input = self.generalize(input_data, new_edges, splitting_rule)
+                self.update_splitting_rules()
+            self.virgin_bits &= ~input_coverage
+            saved_input = SavedInput(input_data, input_coverage, exec_time)
+            self.saved_inputs.append(saved_input)
+            self.scheduler.add(saved_input)
+            if generalized_input is None:
+                self.submit_generalization(saved_input, new_edges, virgin_bits)
+            else:
+                self.add_generalized(saved_input, generalized_input)
+
+            self.coverage_through_time.append(
+                (
+                    time.time(),
+                    count_covered(self.virgin_bits),
+                    count_covered(self.virgin_bits_failing),
                 )
-                self.coverage_through_time.append(
-                    (
-                        time.time(),
-                        len(self.edges_covered),
-                        len(self.edges_covered_failing),
-                    )
+            )
+            logging.info(f"Found new coverage. Total coverage: {count_covered(self.virgin_bits)}")
+            log(f"Found new coverage. Total coverage: {count_covered(self.virgin_bits)}")
+        elif has_error and has_new_bits(input_coverage, self.virgin_bits_failing):
+            self.virgin_bits_failing &= ~input_coverage
+            self.failing_inputs.append(
+                SavedInput(input_data, input_coverage, exec_time)
+            )
+            self.coverage_through_time.append(
+                (
+                    time.time(),
+                    count_covered(self.virgin_bits),
+                    count_covered(self.virgin_bits_failing),
                 )
-                logging.info(f"Found new crash. Total coverage: {len(self.edges_covered)}")
-                log(f"Found new crash. Total coverage: {len(self.edges_covered)}")
-                break
+            )
+            logging.info(f"Found new crash. Total coverage: {count_covered(self.virgin_bits)}")
+            log(f"Found new crash. Total coverage: {count_covered(self.virgin_bits)}")
+
+    def add_generalized(self, saved_input: SavedInput, generalized_input: GeneralizedInput):
+        """
+        Record the generalization of a saved input, making it available to the generalized mutations.
+        """
+        saved_input.generalized = generalized_input
+        # logging.debug(f"{input_data} ---generalized to---> {generalized_input.input} = {generalized_input}")
+        logging.debug(f"{saved_input.data} ---generalized to---> {generalized_input.pretty_print()}")
+        self.generalized.append(generalized_input)
+        self.generalized_map[saved_input.data] = generalized_input
+
+    def collect_generalizations(self):
+        """
+        Record the generalizations finished by the generalization queue, if any.
+        """
+        if self.generalization_queue is None or len(self.pending_generalizations) == 0:
+            return
+        for input_data, generalized_input, rule_counters, executions in self.generalization_queue.poll():
+            saved_input, _, _ = self.pending_generalizations.pop(input_data)
+            if generalized_input is not None:
+                # the executions and the statistics of the splitting rules were counted by the worker's copy
+                # of the fuzzer
+                self.generalization_executions += executions
+                for rule, counters in zip(self.splitting_rules, rule_counters):
+                    rule.add_counters(counters)
+                self.update_splitting_rules()
+                self.add_generalized(saved_input, generalized_input)
+
+    def checkpoint_state(self):
+        state = super().checkpoint_state()
+        state.update({
+            "generalized": self.generalized,
+            "generalized_map": self.generalized_map,
+            "splitting_rules": self.splitting_rules,
+            "generalization_executions": self.generalization_executions,
+            "pending_generalizations": list(self.pending_generalizations.values()),
+        })
+        return state
+
+    def restore_state(self, state):
+        """
+        Restore the state returned by `checkpoint_state`. The saved inputs that were still being generalized in the
+        background when the checkpoint was saved are generalized again, against the coverage they were submitted
+        with, which executes them.
+        """
+        super().restore_state(state)
+        self.generalized = state["generalized"]
+        self.generalized_map = state["generalized_map"]
+        self.splitting_rules = state["splitting_rules"]
+        self.generalization_executions = state["generalization_executions"]
+        self.pending_generalizations = {}
+        self.generalize_seeds(state["pending_generalizations"])
+
+    def run_stats(self):
+        stats = super().run_stats()
+        stats["generalization_executions"] = self.generalization_executions
+        return stats
 
     def save_data(self):
         super().save_data()
@@ -355,3 +507,7 @@ class GrimoireFuzzer(Fuzzer):
             input_file.write(json.dumps(
                 [g.to_map() for g in self.saved_inputs]
             ))
+        if self.generalization == "SPLITTING_RULES":
+            log("Saving splitting rule statistics...")
+            with open(os.path.join(self.output_dir, "splitting_rules.json"), "w") as rules_file:
+                rules_file.write(json.dumps([rule.to_map() for rule in self.splitting_rules]))
@@ -9,6 +9,9 @@ class RandomFuzzer(Fuzzer):
     A random fuzzer.
     """
 
+    # Number of inputs generated and executed at a time
+    batch_size = 16
+
     def generate_input(self) -> bytes:
         """
         Produce a new byte-level input.
@@ -25,7 +28,10 @@ class RandomFuzzer(Fuzzer):
         """
         start_time = time.time()
         while time.time() - start_time < search_time:
-            new_input = self.generate_input()
-            has_error, input_cov, exec_time = self.exec_with_coverage(new_input)
-            self.save_if_has_new_coverage(new_input, has_error, input_cov, exec_time)
+            # execute the inputs in batches, which an executor pool runs in parallel
+            new_inputs = [self.generate_input() for _ in range(self.batch_size)]
+            new_inputs = [new_input for new_input in new_inputs if not self.is_duplicate(new_input)]
+            for new_input, (has_error, input_cov, exec_time) in zip(new_inputs, self.executor.run_batch(new_inputs)):
+                self.save_if_has_new_coverage(new_input, has_error, input_cov, exec_time)
+            self.maybe_save_checkpoint()
         self.save_data()
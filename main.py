@@ -9,6 +9,17 @@ import logging
 from fuzzer.CoverageGuidedFuzzer import CoverageGuidedFuzzer
 from fuzzer.RandomFuzzer import RandomFuzzer
 from fuzzer.GrimoireFuzzer import GrimoireFuzzer
+from executor.ForkServerExecutor import ForkServerExecutor
+from executor.InProcessExecutor import InProcessExecutor
+from executor.PoolExecutor import PoolExecutor
+from models.EdgeRegistry import EdgeRegistry
+from models.Fuzzer import CHECKPOINT_FILE, CHECKPOINT_INTERVAL, DEDUP_MEMORY, DEDUP_FALSE_POSITIVE_RATE
+from models.Scheduler import POWER_SCHEDULES
+from tracer.CoverageTracer import CoverageTracer
+from tracer.InstrumentationTracer import InstrumentationTracer
+from tracer.SettraceTracer import SettraceTracer
+from util.corpus_minimization import minimize_corpus
+from util.instrumentation import install_import_hook
 from util.util import log
 
 
@@ -29,6 +40,55 @@ def _read_input_dir(input_dir):
     return inputs
 
 
+def _read_seeds(args, executor):
+    """
+    Read the seed inputs from `args.input_dir`, if any, and minimize them with `executor` if `args.cmin` is set.
+    """
+    if args.input_dir is None:
+        return None
+    inputs = _read_input_dir(args.input_dir)
+    if args.cmin:
+        kept_inputs, stats = minimize_corpus(inputs, executor)
+        log(f"Minimized the seeds: kept {stats['kept_inputs']} of {stats['inputs']} inputs")
+        inputs = set(kept_inputs)
+    return inputs
+
+
+def _import_module(args):
+    """
+    Import the module to fuzz, and return it along with the file in which it is defined.
+    """
+    if args.tracer == "INSTRUMENT":
+        install_import_hook([args.module_to_fuzz], args.instrument_package)
+    module_under_test = importlib.import_module(args.module_to_fuzz)
+    if not hasattr(module_under_test, "test_one_input") or not callable(
+            module_under_test.test_one_input
+    ):
+        raise ValueError(
+            f"No function named test_one_input in module {module_under_test}"
+        )
+    return module_under_test, inspect.getfile(module_under_test)
+
+
+def _make_tracer(args, cov, test_file_name):
+    edge_registry = EdgeRegistry.load(args.edge_ids) if args.edge_ids is not None else EdgeRegistry()
+    if args.tracer == "SETTRACE":
+        return SettraceTracer(os.path.dirname(test_file_name), edge_registry)
+    elif args.tracer == "INSTRUMENT":
+        return InstrumentationTracer(edge_registry=edge_registry)
+    return CoverageTracer(cov, edge_registry)
+
+
+def _make_executor(args, module_under_test, tracer):
+    if args.workers > 1:
+        if args.executor == "FORKSERVER":
+            raise ValueError("--workers cannot be combined with --executor FORKSERVER")
+        return PoolExecutor(module_under_test, tracer, args.workers)
+    elif args.executor == "FORKSERVER":
+        return ForkServerExecutor(module_under_test, tracer, args.fork_batch_size)
+    return InProcessExecutor(module_under_test, tracer)
+
+
 def fuzz_main(args):
     """
     Sets up output/input directories, and delegates the fuzzing to a Fuzzer object.
@@ -43,51 +103,55 @@ def fuzz_main(args):
     curr_timestamp = datetime.datetime.now().strftime("%m-%d_%H:%M:%S")
     # output_dir_name = f"{output_parent_dir}/{curr_timestamp}_{args.module_to_fuzz}"
     output_dir_name = f"{output_parent_dir}/{args.module_to_fuzz}"
-    if os.path.isdir(output_dir_name):
+    checkpoint_file_name = os.path.join(output_dir_name, CHECKPOINT_FILE)
+    if args.resume:
+        if not os.path.isfile(checkpoint_file_name):
+            raise ValueError(f"{output_dir_name} does not contain a checkpoint to resume from")
+    elif os.path.isdir(output_dir_name):
         raise ValueError(f"{output_dir_name} already exists, not overwriting")
-    os.mkdir(output_dir_name)
+    else:
+        os.mkdir(output_dir_name)
 
     # Get the module under test
-    module_under_test = importlib.import_module(args.module_to_fuzz)
-    if not hasattr(module_under_test, "test_one_input") or not callable(
-            module_under_test.test_one_input
-    ):
-        raise ValueError(
-            f"No function named test_one_input in module {module_under_test}"
-        )
-    test_file_name = inspect.getfile(module_under_test)
+    module_under_test, test_file_name = _import_module(args)
     cov = coverage.Coverage(
         branch=True, data_file=os.path.join(output_dir_name, ".coverage")
     )
+    tracer = _make_tracer(args, cov, test_file_name)
+    executor = _make_executor(args, module_under_test, tracer)
 
     # configure logging file
-    logging.basicConfig(filename=os.path.join(output_dir_name, f'{args.fuzzer}.log'), filemode='w',
+    logging.basicConfig(filename=os.path.join(output_dir_name, f'{args.fuzzer}.log'),
+                        filemode='a' if args.resume else 'w',
                         format='%(name)s - %(levelname)s - %(message)s',
                         level=logging.DEBUG)
 
+    dedup_memory = int(args.dedup_memory * (1 << 20))
     if args.fuzzer == "RANDOM":
-        fuzzer = RandomFuzzer(module_under_test, test_file_name, cov, output_dir_name)
+        fuzzer = RandomFuzzer(module_under_test, test_file_name, cov, output_dir_name, tracer, executor,
+                              dedup_memory=dedup_memory, dedup_false_positive_rate=args.dedup_fp_rate,
+                              trim=args.trim, checkpoint_interval=args.checkpoint_interval)
     elif args.fuzzer == "COVERAGE":
-        if args.input_dir is not None:
-            inputs = _read_input_dir(args.input_dir)
-        else:
-            inputs = None
+        # the saved inputs of a resumed campaign are restored from its checkpoint instead
+        inputs = set() if args.resume else _read_seeds(args, executor)
         fuzzer = CoverageGuidedFuzzer(
-            module_under_test, test_file_name, cov, output_dir_name, inputs
+            module_under_test, test_file_name, cov, output_dir_name, inputs, tracer, executor, args.power_schedule,
+            dedup_memory, args.dedup_fp_rate, args.trim, args.checkpoint_interval
         )
     elif args.fuzzer == "GRIMOIRE":
-
-        if args.input_dir is not None:
-            inputs = _read_input_dir(args.input_dir)
-        else:
-            inputs = None
+        inputs = set() if args.resume else _read_seeds(args, executor)
         fuzzer = GrimoireFuzzer(
-            module_under_test, test_file_name, cov, output_dir_name, inputs, args.cumulative
+            module_under_test, test_file_name, cov, output_dir_name, inputs, args.cumulative, tracer, executor,
+            args.generalization, args.generalization_workers, args.power_schedule, dedup_memory, args.dedup_fp_rate,
+            args.trim, args.checkpoint_interval
         )
+    if args.resume:
+        fuzzer.load_checkpoint(checkpoint_file_name)
 
     # Run all the fuzzing
     log("Starting fuzzing session.")
     fuzzer.fuzz(args.time)
+    executor.close()
     log("Ending fuzzing session.")
     return output_dir_name
 
@@ -109,6 +173,45 @@ if __name__ == "__main__":
         help="Which type of fuzzer to run",
         default="RANDOM",
     )
+    parser.add_argument(
+        "--tracer",
+        type=str,
+        choices=["COVERAGE", "SETTRACE", "INSTRUMENT"],
+        help="How to record the edges covered by each execution: with coverage.py, with a lightweight sys.settrace tracer, "
+             "or with branch counters inserted into the module under test when it is imported",
+        default="COVERAGE",
+    )
+    parser.add_argument(
+        "--instrument_package",
+        type=str,
+        nargs="*",
+        help="with --tracer INSTRUMENT, also instrument the modules of these packages (eg. new_benchmarks.apimd)",
+        default=[],
+    )
+    parser.add_argument(
+        "--executor",
+        type=str,
+        choices=["INPROCESS", "FORKSERVER"],
+        help="Where to run inputs: in the fuzzer's process, or in children forked from it after importing the module",
+        default="INPROCESS",
+    )
+    parser.add_argument(
+        "--fork_batch_size",
+        type=int,
+        help="with --executor FORKSERVER, the number of inputs run in each forked child",
+        default=1,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes executing batches of mutated inputs in parallel",
+        default=1,
+    )
+    parser.add_argument(
+        "--edge_ids",
+        type=str,
+        help="edge_ids.json file saved by a previous run, to reuse its edge IDs in this run's coverage bitmaps",
+    )
     parser.add_argument(
         "--output_dir",
         type=str,
@@ -120,6 +223,12 @@ if __name__ == "__main__":
         type=str,
         help="directory containing inputs to start coverage-guided fuzzing",
     )
+    parser.add_argument(
+        "--cmin",
+        action=argparse.BooleanOptionalAction,
+        help="if set, the seeds of --input_dir are first minimized to a subset covering the same edges (see cmin.py)",
+        default=False,
+    )
     parser.add_argument(
         "--time", type=int, default=60, help="Search time for which to run fuzzing"
     )
@@ -129,5 +238,63 @@ if __name__ == "__main__":
         help="if set, blanks will be cumulatively applied during input generalization",
         default=True,
     )
+    parser.add_argument(
+        "--generalization",
+        type=str,
+        choices=["SPLITTING_RULES", "DDMIN"],
+        help="How the Grimoire fuzzer generalizes inputs: with its splitting rules (fixed offsets, split characters and "
+             "closures), or by hierarchical delta debugging, which bisects only the chunks that cannot be blanks",
+        default="SPLITTING_RULES",
+    )
+    parser.add_argument(
+        "--generalization_workers",
+        type=int,
+        help="number of worker processes generalizing new inputs in the background while the Grimoire fuzzer keeps "
+             "mutating; 0 generalizes each new input before fuzzing continues",
+        default=0,
+    )
+    parser.add_argument(
+        "--power_schedule",
+        type=str,
+        choices=POWER_SCHEDULES,
+        help="How the coverage-guided and Grimoire fuzzers assign energy (how often a saved input is mutated, and "
+             "how many mutants it gets): the default boosts, or the energy of the input's path frequency (FAST, "
+             "EXPLORE), of the rare edges it covers (RARE_EDGE), or of the entropy of its mutants' edges (ENTROPIC)",
+        default="DEFAULT",
+    )
+    parser.add_argument(
+        "--dedup_memory",
+        type=float,
+        help="memory budget in MiB of the Bloom filter remembering the executed inputs, so that generated inputs "
+             "that were already executed are skipped; 0 executes every generated input",
+        default=DEDUP_MEMORY / (1 << 20),
+    )
+    parser.add_argument(
+        "--dedup_fp_rate",
+        type=float,
+        help="false positive rate of the Bloom filter of executed inputs, ie. the probability that a new input is "
+             "skipped; the filter is cleared whenever it holds as many inputs as it can at this rate",
+        default=DEDUP_FALSE_POSITIVE_RATE,
+    )
+    parser.add_argument(
+        "--trim",
+        action=argparse.BooleanOptionalAction,
+        help="if set, coverage-increasing inputs are trimmed before they are saved (and generalized): chunks are "
+             "removed as long as the input covers the same edges",
+        default=True,
+    )
+    parser.add_argument(
+        "--checkpoint_interval",
+        type=float,
+        help="number of seconds between two checkpoints of the fuzzer's state in the output directory; 0 only saves "
+             "one at the end of the run",
+        default=CHECKPOINT_INTERVAL,
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="resume the campaign checkpointed in the output directory of the module, without executing its saved "
+             "inputs again, instead of starting a new one",
+    )
     args = parser.parse_args()
     fuzz_main(args)
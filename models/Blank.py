@@ -80,10 +80,10 @@ class ReplaceBlank(Blank):
         super().__init__(removed=removed, blank_type=Blank.REPLACE)
         self.replacements = set()
 
+        # direct subclasses of each replace class that has some, smallest classes first
         self.optimization_table: Dict[ReplaceClass, List[ReplaceClass]] = {
-            ReplaceClass.HEXDIGIT: [ReplaceClass.DIGIT],
-            ReplaceClass.ALPHANUMERIC: [ReplaceClass.DIGIT, ReplaceClass.HEXDIGIT, ReplaceClass.LETTER],
-            ReplaceClass.PRINTABLE: [ReplaceClass.ALPHANUMERIC, ReplaceClass.DIGIT, ReplaceClass.HEXDIGIT, ReplaceClass.PUNCTUATION, ReplaceClass.WHITESPACE]
+            replace_class: ReplaceClass.subclasses(replace_class)
+            for replace_class in ReplaceClass if len(ReplaceClass.subclasses(replace_class)) != 0
         }
 
     def to_map(self):
@@ -111,7 +111,7 @@ class ReplaceBlank(Blank):
             return
         for child_replace_class in self.optimization_table[replace_class]:
             self.recurse_optimize(child_replace_class)
-            self.replacements.remove(child_replace_class)
+            self.replacements.discard(child_replace_class)
 
     def optimize_replacement(self):
         for replace_class in reversed(self.optimization_table):
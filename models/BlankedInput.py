@@ -0,0 +1,212 @@
+import bisect
+import re
+from copy import copy
+from typing import Dict, List, Tuple, Union
+
+from models.Blank import Blank
+from models.GeneralizedInput import GeneralizedInput
+from util.util import str_to_bytes
+
+
+class BlankedInput:
+    """
+    An input being generalized: its original bytes, and the sorted, non-overlapping ranges of these bytes
+    that were turned into blanks.
+
+    Positions are byte offsets in the original bytes, which never change while blanks are added. The bytes
+    outside of the blanks are joined once per change of the blanks, and a candidate is built by joining
+    memoryview slices of them, instead of rebuilding a list of characters and blanks.
+    """
+
+    def __init__(self, data: bytes, blanks: List[Tuple[int, int, Blank]] = None):
+        self.data = data
+        # (start, end, blank) of each blank, sorted by start, with blank.removed == data[start:end]
+        self.blanks: List[Tuple[int, int, Blank]] = blanks if blanks is not None else []
+        # Start of each blank, to bisect the blanks by position
+        self._blank_starts: List[int] = [start for start, _, _ in self.blanks]
+        # Bytes outside of the blanks, the (start, end) ranges they come from, and the offset of each range
+        # in these bytes; computed when first needed after a change of the blanks
+        self._kept: Union[memoryview, None] = None
+        self._kept_ranges: List[Tuple[int, int]] = []
+        self._kept_starts: List[int] = []
+        self._kept_offsets: List[int] = []
+        # Sorted positions of each character searched for in the original bytes, blanks included; computed in
+        # one pass when a character is first searched for, and shared with the copies of this input
+        self._char_positions: Dict[bytes, List[int]] = {}
+
+    def __len__(self):
+        return len(self.data)
+
+    def copy(self) -> 'BlankedInput':
+        blanked_input = BlankedInput(self.data, self.blanks.copy())
+        blanked_input._char_positions = self._char_positions
+        return blanked_input
+
+    @staticmethod
+    def from_exploded_input(exploded_input: List[Union[str, Blank]]) -> 'BlankedInput':
+        data = b""
+        blanks = []
+        for token in exploded_input:
+            if isinstance(token, Blank):
+                blanks.append((len(data), len(data) + len(token.removed), copy(token)))
+                data += token.removed
+            else:
+                data += str_to_bytes(token)
+        blanked_input = BlankedInput(data)
+        for start, end, blank in blanks:
+            blanked_input.add_blank(start, end, blank)
+        return blanked_input
+
+    def to_generalized_input(self) -> GeneralizedInput:
+        tokens = []
+        for start, end, blank in self._ranges():
+            if blank is None:
+                tokens.append(self.data[start:end])
+            else:
+                tokens.append(copy(blank))
+        return GeneralizedInput(tokens)
+
+    def to_exploded_input(self) -> List[Union[str, Blank]]:
+        return self.to_generalized_input().to_exploded_input()
+
+    def _ranges(self) -> List[Tuple[int, int, Union[Blank, None]]]:
+        """
+        Return the ranges of the input, in order: (start, end, blank) for a blank,
+        and (start, end, None) for the non-empty ranges between blanks.
+        """
+        ranges = []
+        index = 0
+        for start, end, blank in self.blanks:
+            if start > index:
+                ranges.append((index, start, None))
+            ranges.append((start, end, blank))
+            index = end
+        if index < len(self.data):
+            ranges.append((index, len(self.data), None))
+        return ranges
+
+    def _update_kept(self):
+        data = memoryview(self.data)
+        self._kept_ranges = [(start, end) for start, end, blank in self._ranges() if blank is None]
+        self._kept_starts = [start for start, _ in self._kept_ranges]
+        self._kept_offsets = []
+        offset = 0
+        for start, end in self._kept_ranges:
+            self._kept_offsets.append(offset)
+            offset += end - start
+        self._kept = memoryview(b"".join([data[start:end] for start, end in self._kept_ranges]))
+
+    def kept_ranges(self) -> List[Tuple[int, int]]:
+        """
+        Return the (start, end) ranges of the bytes that are not in a blank.
+        """
+        if self._kept is None:
+            self._update_kept()
+        return self._kept_ranges
+
+    def kept_offset(self, index: int) -> int:
+        """
+        Return the number of bytes before `index` that are not in a blank.
+        """
+        if self._kept is None:
+            self._update_kept()
+        i = bisect.bisect_right(self._kept_starts, index) - 1
+        if i < 0:
+            return 0
+        start, end = self._kept_ranges[i]
+        return self._kept_offsets[i] + min(index, end) - start
+
+    def get_bytes(self) -> bytes:
+        """
+        Return the input with all blanks replaced by an empty string.
+        """
+        if self._kept is None:
+            self._update_kept()
+        return bytes(self._kept)
+
+    def candidate(self, start: int, end: int, replacement: bytes = b"") -> bytes:
+        """
+        Return the input with the range [start, end) replaced by `replacement`, and all blanks replaced by
+        an empty string.
+        """
+        if self._kept is None:
+            self._update_kept()
+        return b"".join([self._kept[:self.kept_offset(start)], replacement, self._kept[self.kept_offset(end):]])
+
+    def blank_at(self, index: int) -> Union[Tuple[int, int, Blank], None]:
+        """
+        Return the blank that contains the position `index` (and does not start there), if any.
+        """
+        i = bisect.bisect_left(self._blank_starts, index) - 1
+        if i >= 0 and self.blanks[i][0] < index < self.blanks[i][1]:
+            return self.blanks[i]
+        return None
+
+    def boundary(self, index: int) -> int:
+        """
+        Return the first position at or after `index` that is neither inside a blank nor inside
+        a multi-byte UTF-8 character.
+        """
+        blank = self.blank_at(index)
+        if blank is not None:
+            index = blank[1]
+        while index < len(self.data) and self.data[index] & 0xC0 == 0x80:
+            index += 1
+        return min(index, len(self.data))
+
+    def _all_positions(self, char: bytes) -> List[int]:
+        positions = self._char_positions.get(char)
+        if positions is None:
+            # the lookahead also finds overlapping occurrences, as bytes.find does
+            positions = [match.start() for match in re.finditer(b"(?=" + re.escape(char) + b")", self.data)]
+            self._char_positions[char] = positions
+        return positions
+
+    def positions(self, char: bytes, index: int = 0, end: int = None, first_only: bool = False) -> List[int]:
+        """
+        Return the positions at or after `index` (and before `end`) of `char` outside of the blanks, in order
+        (only the first one if `first_only`).
+        """
+        end = len(self.data) if end is None else end
+        all_positions = self._all_positions(char)
+        kept_ranges = self.kept_ranges()
+        positions = []
+        i = max(bisect.bisect_right(self._kept_starts, index) - 1, 0)
+        for start, range_end in kept_ranges[i:]:
+            if start >= end:
+                break
+            low = bisect.bisect_left(all_positions, max(start, index))
+            high = bisect.bisect_left(all_positions, min(range_end, end), low)
+            positions.extend(all_positions[low:high])
+            if first_only and len(positions) != 0:
+                return positions[:1]
+        return positions
+
+    def find(self, char: bytes, index: int, end: int = None) -> int:
+        """
+        Return the first position at or after `index` (and before `end`) of `char` outside of the blanks, or -1.
+        """
+        positions = self.positions(char, index, end, first_only=True)
+        return positions[0] if len(positions) != 0 else -1
+
+    def add_blank(self, start: int, end: int, blank: Blank):
+        """
+        Turn the range [start, end) into `blank`, replacing the blanks it contains, and merge adjacent blanks
+        of the same type (keeping the first one).
+        """
+        blank.removed = self.data[start:end]
+        blanks = [b for b in self.blanks if b[1] <= start or b[0] >= end] + [(start, end, blank)]
+        blanks.sort(key=lambda b: (b[0], b[1]))
+        merged = []
+        for b in blanks:
+            if len(merged) != 0 and merged[-1][1] == b[0] and merged[-1][2].blank_type == b[2].blank_type:
+                previous_start, _, previous_blank = merged[-1]
+                # the blank may be shared with a copy of this input
+                previous_blank = copy(previous_blank)
+                previous_blank.removed = self.data[previous_start:b[1]]
+                merged[-1] = (previous_start, b[1], previous_blank)
+            else:
+                merged.append(b)
+        self.blanks = merged
+        self._blank_starts = [start for start, _, _ in merged]
+        self._kept = None
@@ -0,0 +1,65 @@
+import json
+from typing import Dict, List, Tuple
+
+
+class EdgeRegistry:
+    """
+    Interns edges, ie. (file name, from line, to line) tuples, into dense integer IDs.
+
+    An edge keeps its ID for the whole campaign, regardless of which files ran for a given input.
+    The registry can be saved to the output directory and loaded by a later run, so that edge IDs
+    (and hence coverage bitmaps) can be compared across runs.
+    """
+
+    def __init__(self, edges: List[Tuple[str, int, int]] = None):
+        # edges[i] is the edge with ID i
+        self.edges: List[Tuple[str, int, int]] = []
+        # ID of each edge
+        self.edge_ids: Dict[Tuple[str, int, int], int] = {}
+        if edges is not None:
+            for edge in edges:
+                self.intern(edge)
+
+    def __len__(self):
+        return len(self.edges)
+
+    def intern(self, edge: Tuple[str, int, int]) -> int:
+        """
+        Return the ID of `edge`, assigning it the next free ID if it has not been seen before.
+        """
+        edge_id = self.edge_ids.get(edge)
+        if edge_id is None:
+            edge_id = self.edge_ids[edge] = len(self.edges)
+            self.edges.append(edge)
+        return edge_id
+
+    def save(self, file_name: str):
+        with open(file_name, "w") as registry_file:
+            registry_file.write(json.dumps(self.edges))
+
+    @staticmethod
+    def load(file_name: str) -> 'EdgeRegistry':
+        with open(file_name, "r") as registry_file:
+            return EdgeRegistry([tuple(edge) for edge in json.loads(registry_file.read())])
+
+
+class RemoteEdges:
+    """
+    Maps the edge IDs assigned by a copy of a registry in another process (eg. a forked child) to IDs of `registry`.
+
+    The copy agrees with `registry` on the IDs below `base`, ie. the edges known when the copy was made. Edges the
+    copy registers afterwards are reported with `add`, in the order the copy assigned their IDs.
+    """
+
+    def __init__(self, registry: EdgeRegistry, base: int):
+        self.registry = registry
+        self.base = base
+        # local_ids[i] is our ID for the edge the copy registered with ID base + i
+        self.local_ids: List[int] = []
+
+    def add(self, new_edges: List[Tuple[str, int, int]]):
+        self.local_ids.extend([self.registry.intern(tuple(edge)) for edge in new_edges])
+
+    def translate(self, edge_ids: List[int]) -> List[int]:
+        base = self.base
+        return [edge_id if edge_id < base else self.local_ids[edge_id - base] for edge_id in edge_ids]
@@ -0,0 +1,69 @@
+import time
+from abc import ABC, abstractmethod
+from typing import List, Set, Tuple
+
+from models.Tracer import Tracer
+
+
+class Executor(ABC):
+    """
+    Abstract base class for an executor, which runs the `test_one_input` function of the module under test
+    on inputs and traces their coverage.
+    """
+    # Number of inputs the executor runs in parallel in `run_batch`
+    num_workers = 1
+
+    def __init__(self, module_under_test, tracer: Tracer):
+        # Module object
+        self.module_under_test = module_under_test
+        # Tracer used to record the edges covered by each execution
+        self.tracer = tracer
+        # Registry assigning stable IDs to the edges, ie. bit positions in coverage bitmaps
+        self.edge_registry = tracer.edge_registry
+
+    @abstractmethod
+    def run(self, input_data: bytes) -> Tuple[bool, int, float]:
+        """
+        Runs `test_one_input` on `input_data`.
+
+        Returns whether or not the input failed with an error, the bitmap of the edges covered by the input,
+        and the execution time.
+        """
+        return NotImplemented
+
+    def trace_input(self, input_data: bytes, catch_exit: bool = False) -> Tuple[bool, Set[int], float]:
+        """
+        Runs `test_one_input` on `input_data` in this process.
+
+        Returns whether or not the input failed with an error, the IDs of the edges covered by the input,
+        and the execution time. If `catch_exit` is set, a `sys.exit` in the module under test is caught
+        instead of stopping this process, and is an error if its exit code is non-zero.
+        """
+        self.tracer.reset()
+        has_error = False
+        start_time = time.time()
+        self.tracer.start()
+        try:
+            self.module_under_test.test_one_input(input_data)
+        except Exception:  # now excepting any error that causes the program to crash
+            has_error = True
+        except SystemExit as e:
+            if not catch_exit:
+                raise
+            has_error = e.code not in (None, 0)
+        finally:
+            self.tracer.stop()
+        exec_time = time.time() - start_time
+        return has_error, self.tracer.get_edges(), exec_time
+
+    def run_batch(self, inputs: List[bytes]) -> List[Tuple[bool, int, float]]:
+        """
+        Runs `test_one_input` on each of `inputs`, and returns the results of `run` in the same order.
+        """
+        return [self.run(input_data) for input_data in inputs]
+
+    def close(self):
+        """
+        Release the resources (eg. processes) held by the executor.
+        """
+        pass
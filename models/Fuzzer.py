@@ -1,13 +1,36 @@
+import json
 import os
+import pickle
+import random
 import time
 from abc import ABC, abstractmethod
-from typing import Tuple, List, Set
+from typing import Any, Dict, Iterable, Tuple, List, Union
 
 import coverage
 
+from executor.InProcessExecutor import InProcessExecutor
+from models.Executor import Executor
 from models.SavedInput import SavedInput
+from models.Scheduler import Scheduler
+from models.Tracer import Tracer
+from tracer.CoverageTracer import CoverageTracer
+from util.bloom_filter import BloomFilter
+from util.coverage_bitmap import VIRGIN_MAP, count_covered, has_new_bits
 from util.util import log
 
+# Default memory budget (in bytes) and false positive rate of the filter of executed inputs
+DEDUP_MEMORY = 8 << 20
+DEDUP_FALSE_POSITIVE_RATE = 0.001
+# Trimming steps, as in AFL: chunks of 1/16th of the input's size (rounded up to a power of two), halved down to
+# 1/1024th of it, and of at least 4 bytes
+TRIM_START_STEPS = 16
+TRIM_END_STEPS = 1024
+TRIM_MIN_BYTES = 4
+# File of the output directory holding the last checkpoint of the fuzzer's state, and default number of seconds
+# between two checkpoints
+CHECKPOINT_FILE = "checkpoint.pkl"
+CHECKPOINT_INTERVAL = 600
+
 
 class Fuzzer(ABC):
     """
@@ -20,15 +43,24 @@ class Fuzzer(ABC):
             test_file_name: str,
             cov: coverage.Coverage,
             output_dir: str,
+            tracer: Tracer = None,
+            executor: Executor = None,
+            power_schedule: str = "DEFAULT",
+            dedup_memory: int = DEDUP_MEMORY,
+            dedup_false_positive_rate: float = DEDUP_FALSE_POSITIVE_RATE,
+            trim: bool = True,
+            checkpoint_interval: float = CHECKPOINT_INTERVAL,
     ):
-        # Keep track of coverage from non-error inputs
-        self.edges_covered: Set[Tuple[str, int, int]] = set()
-        # Keep track of coverage from error inputs
-        self.edges_covered_failing: Set[Tuple[str, int, int]] = set()
+        # Bitmap of the edges not yet covered by non-error inputs
+        self.virgin_bits: int = VIRGIN_MAP
+        # Bitmap of the edges not yet covered by error inputs
+        self.virgin_bits_failing: int = VIRGIN_MAP
         # Keep track of coverage achieved through time
         self.coverage_through_time: List[Tuple[float, int, int]] = []
         # Coverage-increasing non-error inputs
         self.saved_inputs: List[SavedInput] = []
+        # Selects the saved inputs to mutate, and the number of mutants to produce from them
+        self.scheduler = Scheduler(power_schedule)
         # Coverage-increasing error inputs
         self.failing_inputs: List[SavedInput] = []
         # Module object
@@ -39,77 +71,239 @@ class Fuzzer(ABC):
         self.cov = cov
         # fuzzing output directory.
         self.output_dir = output_dir
+        # Tracer used to record the edges covered by each execution. Defaults to coverage.py.
+        self.tracer = tracer if tracer is not None else CoverageTracer(cov)
+        # Registry assigning stable IDs to the edges, ie. bit positions in coverage bitmaps
+        self.edge_registry = self.tracer.edge_registry
+        # Executor running the inputs. Defaults to running them in this process.
+        self.executor = executor if executor is not None else InProcessExecutor(module_under_test, self.tracer)
+        # Inputs already executed by the fuzzing loop, so that generated duplicates are not executed again;
+        # None if `dedup_memory` is 0
+        self.executed_inputs = BloomFilter(dedup_memory, dedup_false_positive_rate) if dedup_memory > 0 else None
+        # Number of inputs generated by the fuzzing loop, and number of them skipped as duplicates
+        self.num_generated = 0
+        self.num_skipped_duplicates = 0
+        # Whether coverage-increasing inputs are trimmed before they are saved, the number of executions spent
+        # trimming them, and the number of bytes trimmed
+        self.trim = trim
+        self.trim_executions = 0
+        self.trimmed_bytes = 0
+        # Time spent in each phase of the startup (execution, ordering, filtering and generalization of the seeds)
+        self.startup_times: Dict[str, float] = {}
+        # Number of seconds between two checkpoints of the fuzzer's state (0 to only save one at the end of the run),
+        # and time of the last checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.last_checkpoint_time = time.time()
 
     def save_if_has_new_coverage(
             self,
             input_data: bytes,
             has_error: bool,
-            input_coverage: Set[Tuple[str, int, int]],
+            input_coverage: int,
             exec_time: float,
-    ):
+    ) -> Union[SavedInput, None]:
         """
         Save an input to `self.saved_inputs` if it has new coverage and does not throw an AssertionError,
         or to `self.failing_inputs` if it does throw an AssertionError.
+
+        Returns the input saved to `self.saved_inputs`, if any.
         """
-        for edge in input_coverage:
-            if edge not in self.edges_covered and not has_error:
-                self.edges_covered = self.edges_covered.union(input_coverage)
-                self.saved_inputs.append(
-                    SavedInput(input_data, input_coverage, exec_time)
-                )
-                self.coverage_through_time.append(
-                    (
-                        time.time(),
-                        len(self.edges_covered),
-                        len(self.edges_covered_failing),
-                    )
-                )
-                log(f"Found new coverage. Total coverage: {len(self.edges_covered)}")
-                break
-            if edge not in self.edges_covered_failing and has_error:
-                self.edges_covered_failing = self.edges_covered_failing.union(
-                    input_coverage
-                )
-                self.failing_inputs.append(
-                    SavedInput(input_data, input_coverage, exec_time)
+        if not has_error and has_new_bits(input_coverage, self.virgin_bits):
+            input_data, exec_time = self.trim_input(input_data, input_coverage, exec_time)
+            self.virgin_bits &= ~input_coverage
+            saved_input = SavedInput(input_data, input_coverage, exec_time)
+            self.saved_inputs.append(saved_input)
+            self.scheduler.add(saved_input)
+            self.coverage_through_time.append(
+                (
+                    time.time(),
+                    count_covered(self.virgin_bits),
+                    count_covered(self.virgin_bits_failing),
                 )
-                self.coverage_through_time.append(
-                    (
-                        time.time(),
-                        len(self.edges_covered),
-                        len(self.edges_covered_failing),
-                    )
+            )
+            log(f"Found new coverage. Total coverage: {count_covered(self.virgin_bits)}")
+            return saved_input
+        elif has_error and has_new_bits(input_coverage, self.virgin_bits_failing):
+            self.virgin_bits_failing &= ~input_coverage
+            self.failing_inputs.append(
+                SavedInput(input_data, input_coverage, exec_time)
+            )
+            self.coverage_through_time.append(
+                (
+                    time.time(),
+                    count_covered(self.virgin_bits),
+                    count_covered(self.virgin_bits_failing),
                 )
-                log(f"Found new crash. Total coverage: {len(self.edges_covered)}")
-                break
+            )
+            log(f"Found new crash. Total coverage: {count_covered(self.virgin_bits)}")
+        return None
+
+    def trim_input(self, input_data: bytes, input_coverage: int, exec_time: float) -> Tuple[bytes, float]:
+        """
+        Remove chunks of `input_data` as long as it covers exactly the edges of `input_coverage` without failing, as
+        AFL's trimming stage: chunks of decreasing powers of two (see TRIM_START_STEPS) are removed in turn from the
+        start to the end of the input. Returns the trimmed input and its execution time, or the input unchanged if
+        `self.trim` is not set.
+        """
+        if not self.trim:
+            return input_data, exec_time
+        len_p2 = 1 << max(len(input_data) - 1, 0).bit_length()
+        remove_len = max(len_p2 // TRIM_START_STEPS, TRIM_MIN_BYTES)
+        while remove_len >= max(len_p2 // TRIM_END_STEPS, TRIM_MIN_BYTES):
+            remove_pos = 0
+            while remove_pos < len(input_data):
+                candidate = input_data[:remove_pos] + input_data[remove_pos + remove_len:]
+                has_error, candidate_coverage, candidate_time = self.exec_with_coverage(candidate)
+                self.trim_executions += 1
+                if not has_error and candidate_coverage == input_coverage:
+                    self.trimmed_bytes += len(input_data) - len(candidate)
+                    input_data, exec_time = candidate, candidate_time
+                else:
+                    remove_pos += remove_len
+            remove_len //= 2
+        return input_data, exec_time
+
+    def triage_seeds(self, initial_inputs: Iterable[bytes]) -> List[Tuple[bytes, bool, int, float]]:
+        """
+        Execute the initial inputs as one batch, in parallel if the executor has workers, and return them with
+        their results (see `exec_with_coverage`), shortest and fastest first, so that the seeds kept by the novelty
+        filtering are the cheapest to mutate.
+        """
+        start_time = time.time()
+        inputs = list(initial_inputs)
+        results = self.executor.run_batch(inputs)
+        self.startup_times["execution"] = time.time() - start_time
+        start_time = time.time()
+        seeds = sorted([(input_data,) + result for input_data, result in zip(inputs, results)],
+                       key=lambda seed: (len(seed[0]), seed[3]))
+        self.startup_times["ordering"] = time.time() - start_time
+        return seeds
+
+    def log_startup_times(self):
+        log("Startup: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_times.items()))
 
     def exec_with_coverage(
             self, input_data: bytes
-    ) -> Tuple[bool, Set[Tuple[str, int, int]], float]:
+    ) -> Tuple[bool, int, float]:
         """
         Runs the test_one_input function from `self.module_under_test` defined in `self.test_file_name` on the input `input_data`.
 
-        Returns whether or not the input failed with an assertion error, the edges in `self.test_file_name` covered by the input,
+        Returns whether or not the input failed with an assertion error, the bitmap of the edges covered by the input,
         and the execution time.
         """
-        self.cov.erase()
-        has_error = False
-        start_time = time.time()
-        self.cov.start()
-        try:
-            self.module_under_test.test_one_input(input_data)
-        except Exception:  # now excepting any error that causes the program to crash
-            has_error = True
-        self.cov.stop()
-        exec_time = time.time() - start_time
-        coverage_data = self.cov.get_data()
-        edges_covered = set()
-        for i, file in enumerate(coverage_data.measured_files()):
-            edges_covered_in_file = coverage_data.arcs(file)
-            edges_covered.update([(i,) + t for t in edges_covered_in_file])
-        # edges_covered = self.cov.get_data().arcs(self.test_file_name)
+        return self.executor.run(input_data)
 
-        return has_error, edges_covered, exec_time
+    def is_duplicate(self, input_data: bytes) -> bool:
+        """
+        Return whether `input_data`, generated by the fuzzing loop, was already executed and can be skipped,
+        and record it as executed otherwise. A new input is reported as a duplicate with the false positive
+        rate of `self.executed_inputs`.
+        """
+        self.num_generated += 1
+        if self.executed_inputs is not None and self.executed_inputs.check_and_add(input_data):
+            self.num_skipped_duplicates += 1
+            return True
+        return False
+
+    def run_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Return statistics of the fuzzing run, saved to run_stats.json.
+        """
+        return {
+            "generated_inputs": self.num_generated,
+            "executions": self.num_generated - self.num_skipped_duplicates,
+            "skipped_duplicates": self.num_skipped_duplicates,
+            "dedup_filter_clears": self.executed_inputs.num_clears if self.executed_inputs is not None else 0,
+            "saved_inputs": len(self.saved_inputs),
+            "favored_inputs": len(self.scheduler.favored),
+            "failing_inputs": len(self.failing_inputs),
+            "edges_covered": count_covered(self.virgin_bits),
+            "trim_executions": self.trim_executions,
+            "trimmed_bytes": self.trimmed_bytes,
+            **{f"startup_{phase}_time": seconds for phase, seconds in self.startup_times.items()},
+        }
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """
+        Return the state the campaign accumulated, saved by `save_checkpoint`. The configuration of the fuzzer
+        (module under test, tracer, executor and options) is not part of it, and is given again when resuming.
+        """
+        return {
+            "fuzzer": type(self).__name__,
+            "saved_inputs": self.saved_inputs,
+            "failing_inputs": self.failing_inputs,
+            "virgin_bits": self.virgin_bits,
+            "virgin_bits_failing": self.virgin_bits_failing,
+            "coverage_through_time": self.coverage_through_time,
+            "scheduler": self.scheduler,
+            "edges": list(self.edge_registry.edges),
+            "random_state": random.getstate(),
+            "executed_inputs": self.executed_inputs,
+            "num_generated": self.num_generated,
+            "num_skipped_duplicates": self.num_skipped_duplicates,
+            "trim_executions": self.trim_executions,
+            "trimmed_bytes": self.trimmed_bytes,
+            "startup_times": self.startup_times,
+        }
+
+    def restore_state(self, state: Dict[str, Any]):
+        """
+        Restore the state returned by `checkpoint_state`, without executing any input. The edges of the checkpoint
+        get the same IDs as when it was saved, so they must not have been given other IDs by this run.
+        """
+        if state["fuzzer"] != type(self).__name__:
+            raise ValueError(f"Cannot resume a {state['fuzzer']} campaign with a {type(self).__name__}")
+        for edge_id, edge in enumerate(state["edges"]):
+            if self.edge_registry.intern(edge) != edge_id:
+                raise ValueError("The edge IDs of the checkpoint do not match the edge IDs of this run")
+        self.saved_inputs = state["saved_inputs"]
+        self.failing_inputs = state["failing_inputs"]
+        self.virgin_bits = state["virgin_bits"]
+        self.virgin_bits_failing = state["virgin_bits_failing"]
+        self.coverage_through_time = state["coverage_through_time"]
+        # the saved statistics are kept, with the power schedule of this run
+        power_schedule = self.scheduler.power_schedule
+        self.scheduler = state["scheduler"]
+        self.scheduler.power_schedule = power_schedule
+        random.setstate(state["random_state"])
+        if self.executed_inputs is not None and state["executed_inputs"] is not None:
+            self.executed_inputs = state["executed_inputs"]
+        self.num_generated = state["num_generated"]
+        self.num_skipped_duplicates = state["num_skipped_duplicates"]
+        self.trim_executions = state["trim_executions"]
+        self.trimmed_bytes = state["trimmed_bytes"]
+        # report the startup of the campaign, rather than the one of this run, which has no seeds to process
+        self.startup_times = dict(state["startup_times"])
+
+    def save_checkpoint(self):
+        """
+        Save the state of the fuzzer to CHECKPOINT_FILE in `self.output_dir`.
+        """
+        file_name = os.path.join(self.output_dir, CHECKPOINT_FILE)
+        # write a temporary file first, so that a crash while writing keeps the previous checkpoint
+        with open(file_name + ".tmp", "wb") as checkpoint_file:
+            pickle.dump(self.checkpoint_state(), checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file_name + ".tmp", file_name)
+        self.last_checkpoint_time = time.time()
+
+    def maybe_save_checkpoint(self):
+        """
+        Save a checkpoint if `self.checkpoint_interval` seconds passed since the last one.
+        """
+        if self.checkpoint_interval > 0 and time.time() - self.last_checkpoint_time >= self.checkpoint_interval:
+            log("Saving a checkpoint...")
+            self.save_checkpoint()
+
+    def load_checkpoint(self, file_name: str):
+        """
+        Resume the campaign saved to the checkpoint `file_name`.
+        """
+        start_time = time.time()
+        with open(file_name, "rb") as checkpoint_file:
+            self.restore_state(pickle.load(checkpoint_file))
+        self.startup_times["resume"] = time.time() - start_time
+        log(f"Resumed from {file_name}: {len(self.saved_inputs)} saved inputs, "
+            f"total coverage: {count_covered(self.virgin_bits)}")
 
     def save_data(self):
         """
@@ -121,12 +315,14 @@ class Fuzzer(ABC):
         self.coverage_through_time.append(
             (
                 time.time(),
-                len(self.edges_covered),
-                len(self.edges_covered_failing),
+                count_covered(self.virgin_bits),
+                count_covered(self.virgin_bits_failing),
             )
         )
+        # Save a last checkpoint, from which the campaign can be resumed
+        self.save_checkpoint()
         # Save all the inputs
-        os.mkdir(os.path.join(self.output_dir, "saved_inputs"))
+        os.makedirs(os.path.join(self.output_dir, "saved_inputs"), exist_ok=True)
         for i, saved_input in enumerate(self.saved_inputs):
             input_file_name = os.path.join(
                 self.output_dir, "saved_inputs", f"input_{i}"
@@ -134,13 +330,23 @@ class Fuzzer(ABC):
             with open(input_file_name, "wb") as input_file:
                 input_file.write(saved_input.data)
         # Save the crashing inputs
-        os.mkdir(os.path.join(self.output_dir, "crashing_inputs"))
+        os.makedirs(os.path.join(self.output_dir, "crashing_inputs"), exist_ok=True)
         for i, saved_input in enumerate(self.failing_inputs):
             input_file_name = os.path.join(
                 self.output_dir, "crashing_inputs", f"crashing_input_{i}"
             )
             with open(input_file_name, "wb") as input_file:
                 input_file.write(saved_input.data)
+        # Save the indices of the favored inputs, ie. of a subset of the saved inputs covering the same edges
+        self.scheduler.update_favored()
+        with open(os.path.join(self.output_dir, "favored_inputs.json"), "w") as favored_file:
+            favored_file.write(json.dumps([i for i, saved_input in enumerate(self.saved_inputs)
+                                           if saved_input in self.scheduler.favored]))
+        # Save the statistics of the run
+        with open(os.path.join(self.output_dir, "run_stats.json"), "w") as stats_file:
+            stats_file.write(json.dumps(self.run_stats()))
+        # Save the edge IDs, so that coverage bitmaps can be compared with other runs
+        self.edge_registry.save(os.path.join(self.output_dir, "edge_ids.json"))
         # Write the coverage over time CSV
         with open(
                 os.path.join(self.output_dir, "coverage_through_time.csv"), "w"
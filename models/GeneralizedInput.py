@@ -1,13 +1,28 @@
+import collections
 from copy import copy
+from typing import List, Tuple
 
 from models.Blank import Blank
 from util.util import bytes_to_str, str_to_bytes
 
+# Maximum number of slices, over all the generalized inputs, kept for later calls of `GeneralizedInput.slice`
+MAX_CACHED_SLICES = 4096
+
+# Slices returned by `GeneralizedInput.slice`, least recently used first: (id of the input, start, end) -> (input,
+# slice). Keeping the input alive keeps its id from being reused while its slices are cached.
+_slice_cache: 'collections.OrderedDict[Tuple[int, int, int], Tuple[GeneralizedInput, GeneralizedInput]]' = \
+    collections.OrderedDict()
+
 
 class GeneralizedInput:
     def __init__(self, input_data=None, is_exploded_data=False):
         if input_data is None:
             input_data = []
+        # Computed when first needed: a generalized input is not changed once it is used by the mutations
+        self._blank_indices: List[int] = None
+        self._bytes: bytes = None
+        # whether slices of the input may be in the slice cache
+        self._sliced = False
         if is_exploded_data:
             self.input = [str_to_bytes(c) if isinstance(c, str) else copy(c) for c in input_data]
             self.merge_adjacent_gaps_and_bytes()
@@ -46,14 +61,44 @@ class GeneralizedInput:
 
     # replace all blanks with empty string and return the input as bytes
     def get_bytes(self) -> bytes:
-        res: bytes = b""
-        for token in self.input:
-            if isinstance(token, Blank):
-                continue
-            res += token
-        return res
+        if self._bytes is None:
+            self._bytes = b"".join([token for token in self.input if not isinstance(token, Blank)])
+        return self._bytes
+
+    def blank_indices(self) -> List[int]:
+        """
+        Return the indices of the blanks in the input, followed by -1 and the length of the input,
+        which stand for the beginning and the end of the input.
+        """
+        if self._blank_indices is None:
+            self._blank_indices = [i for i in range(len(self.input)) if isinstance(self.input[i], Blank)]
+            self._blank_indices.extend([-1, len(self.input)])
+        return self._blank_indices
+
+    def slice(self, start: int, end: int) -> 'GeneralizedInput':
+        """
+        Return the part of the input strictly between the indices `start` and `end`. The MAX_CACHED_SLICES most
+        recently used slices of all the inputs are shared between calls, so they must not be changed.
+        """
+        key = (id(self), start, end)
+        cached = _slice_cache.get(key)
+        if cached is not None:
+            _slice_cache.move_to_end(key)
+            return cached[1]
+        generalized_slice = GeneralizedInput(self.input[start + 1:end])
+        _slice_cache[key] = (self, generalized_slice)
+        self._sliced = True
+        while len(_slice_cache) > MAX_CACHED_SLICES:
+            _slice_cache.popitem(last=False)
+        return generalized_slice
 
     def merge_adjacent_gaps_and_bytes(self):
+        self._blank_indices = None
+        self._bytes = None
+        if self._sliced:
+            for key in [key for key in _slice_cache if key[0] == id(self)]:
+                del _slice_cache[key]
+            self._sliced = False
         i = len(self.input) - 1
         while i >= 1:
             elem = self.input[i]
@@ -1,6 +1,8 @@
 import string
 import random
 from enum import Enum
+from typing import List, Set
+
 from util.string_sampler import generate_real_number_str, generate
 
 
@@ -50,6 +52,28 @@ class ReplaceClass(Enum):
             ReplaceClass.PRINTABLE: [string.ascii_letters, string.digits, string.whitespace, string.punctuation]
         }[replace_class]
 
+    @staticmethod
+    def subclasses(replace_class: 'ReplaceClass') -> List['ReplaceClass']:
+        """
+        Return the direct subclasses of `replace_class`: every string of a subclass is also a string of the class.
+        ReplaceBlank.optimization_table is derived from them.
+        """
+        return {
+            ReplaceClass.PRINTABLE: [ReplaceClass.ALPHANUMERIC, ReplaceClass.PUNCTUATION, ReplaceClass.WHITESPACE],
+            ReplaceClass.ALPHANUMERIC: [ReplaceClass.HEXDIGIT, ReplaceClass.LETTER],
+            ReplaceClass.HEXDIGIT: [ReplaceClass.DIGIT],
+        }.get(replace_class, [])
+
+    @staticmethod
+    def descendants(replace_class: 'ReplaceClass') -> Set['ReplaceClass']:
+        """
+        Return `replace_class` and all its (direct or indirect) subclasses.
+        """
+        res = {replace_class}
+        for subclass in ReplaceClass.subclasses(replace_class):
+            res |= ReplaceClass.descendants(subclass)
+        return res
+
     @staticmethod
     def generate(replace_class: 'ReplaceClass'):
         result = ""
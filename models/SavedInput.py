@@ -1,5 +1,4 @@
 import time
-from typing import Tuple, Set
 
 from models.GeneralizedInput import GeneralizedInput
 from util.util import bytes_to_str
@@ -13,11 +12,11 @@ class SavedInput:
     """
 
     def __init__(
-        self, input_data: bytes, edge_coverage: Set[Tuple[str, int, int]], runtime: float, generalized: GeneralizedInput = None
+        self, input_data: bytes, edge_coverage: int, runtime: float, generalized: GeneralizedInput = None
     ):
         # The actual input
         self.data = input_data
-        # The observed edge coverage of the input
+        # Bitmap of the observed edge coverage of the input (see util.coverage_bitmap)
         self.coverage = edge_coverage
         # The observed runtime of the input
         self.runtime = runtime
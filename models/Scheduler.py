@@ -0,0 +1,262 @@
+import math
+import random
+from collections import Counter
+from typing import Dict, Set, Union
+
+from models.SavedInput import SavedInput
+from util.coverage_bitmap import to_edge_ids
+
+# Power schedules, ie. ways of assigning energy to the saved inputs (see `Scheduler.update`)
+POWER_SCHEDULES = ["DEFAULT", "FAST", "EXPLORE", "RARE_EDGE", "ENTROPIC"]
+# Bounds of the energy of a saved input, relative to the energy the default schedule gives it
+MIN_ENERGY = 0.125
+MAX_ENERGY = 8.0
+# Energy of the saved inputs that cover a rare edge, with the RARE_EDGE schedule
+RARE_EDGE_ENERGY = 4.0
+# Probability of skipping an input that is not favored: while some favored inputs were never mutated, otherwise
+# if the input was already mutated, and otherwise (as in AFL)
+SKIP_TO_PENDING_FAVORED = 0.99
+SKIP_MUTATED_NON_FAVORED = 0.95
+SKIP_NON_FAVORED = 0.75
+
+
+class Scheduler:
+    """
+    Selects the saved inputs to mutate, and the number of mutants to produce from them.
+
+    The statistics the selection depends on (lowest number of times an input was mutated, mean size and mean
+    runtime of the saved inputs) are kept up to date as inputs are added and mutated, so that each decision
+    takes constant time instead of a pass over the saved inputs.
+
+    As in AFL, the scheduler keeps the best input of each edge (`top_rated`: the smallest len * runtime among the
+    inputs covering it), updated on every new input. The favored inputs are a subset of these which covers every
+    edge covered so far; it is recomputed by `update_favored` when `top_rated` changed. Inputs that are not
+    favored are skipped most of the time, so that the fuzzing concentrates on a small corpus covering the same
+    edges as the whole one.
+
+    A power schedule other than DEFAULT scales the probability of picking a saved input and its number of mutants
+    by the input's energy, computed by `update` from the coverage of the executed mutants (see `record`):
+    - FAST (AFLFast): 2^(times mutated) / frequency of the input's path, relative to the mean path frequency, so
+      that inputs exercising rarely seen paths get more energy, and more so the more they were already mutated.
+    - EXPLORE (AFLFast): mean path frequency / frequency of the input's path.
+    - RARE_EDGE (FairFuzz): RARE_EDGE_ENERGY for the inputs covering an edge hit at most as often as the smallest
+      power of two at or above the hits of the rarest edge, and 1 for the others.
+    - ENTROPIC: entropy of the edges covered by the input's mutants, relative to the mean entropy, so that inputs
+      whose mutants keep discovering different behaviours get more energy. Inputs without mutants yet get
+      MAX_ENERGY.
+    Energies are bounded by MIN_ENERGY and MAX_ENERGY.
+    """
+
+    def __init__(self, power_schedule: str = "DEFAULT"):
+        if power_schedule not in POWER_SCHEDULES:
+            raise ValueError(f"Unknown power schedule {power_schedule}")
+        self.power_schedule = power_schedule
+        self.num_inputs = 0
+        self.total_size = 0
+        self.total_runtime = 0.0
+        # Number of saved inputs mutated a given number of times, and the lowest such number
+        self.times_mutated_counts: Counter = Counter()
+        self.min_times_mutated = 0
+        # Saved inputs, in the order they were added
+        self.saved_inputs = []
+        # Number of executions of each coverage bitmap, and of each coverage bitmap per parent input, recorded
+        # since the last update
+        self.pending_paths: Counter = Counter()
+        self.pending_parent_paths: Dict[SavedInput, Counter] = {}
+        # Number of executions with the same coverage as each saved input (its path frequency)
+        self.path_frequency: Dict[SavedInput, int] = {}
+        # Number of executions that covered each edge
+        self.edge_hits: Counter = Counter()
+        # Number of times each edge was covered by the mutants of each saved input
+        self.mutant_edge_hits: Dict[SavedInput, Counter] = {}
+        # Energy of each saved input, computed by the last update
+        self.energies: Dict[SavedInput, float] = {}
+        # Best input of each edge, favored inputs, and number of favored inputs never mutated
+        self.top_rated: Dict[int, SavedInput] = {}
+        self.favored: Set[SavedInput] = set()
+        self.pending_favored = 0
+        self.top_rated_changed = False
+
+    def add(self, saved_input: SavedInput):
+        """
+        Take a new saved input into account.
+        """
+        self.num_inputs += 1
+        self.total_size += len(saved_input.data)
+        self.total_runtime += saved_input.runtime
+        self.times_mutated_counts[saved_input.times_mutated] += 1
+        if self.num_inputs == 1 or saved_input.times_mutated < self.min_times_mutated:
+            self.min_times_mutated = saved_input.times_mutated
+        self.saved_inputs.append(saved_input)
+        factor = self.favor_factor(saved_input)
+        for edge_id in to_edge_ids(saved_input.coverage):
+            top_rated = self.top_rated.get(edge_id)
+            if top_rated is None or factor < self.favor_factor(top_rated):
+                self.top_rated[edge_id] = saved_input
+                self.top_rated_changed = True
+
+    @staticmethod
+    def favor_factor(saved_input: SavedInput) -> float:
+        return len(saved_input.data) * saved_input.runtime
+
+    def update_favored(self):
+        """
+        Recompute the favored inputs if `top_rated` changed: go through the edges, and favor the best input
+        of each edge that is not covered by the inputs favored so far.
+        """
+        if not self.top_rated_changed:
+            return
+        self.top_rated_changed = False
+        self.favored = set()
+        covered = 0
+        for edge_id, top_rated in self.top_rated.items():
+            if covered >> edge_id & 1 == 0:
+                self.favored.add(top_rated)
+                covered |= top_rated.coverage
+        self.pending_favored = len([saved_input for saved_input in self.favored if saved_input.times_mutated == 0])
+
+    def mark_mutated(self, saved_input: SavedInput):
+        """
+        Record that `saved_input` was chosen as a parent for mutation once more.
+        """
+        self.times_mutated_counts[saved_input.times_mutated] -= 1
+        if self.times_mutated_counts[saved_input.times_mutated] == 0:
+            del self.times_mutated_counts[saved_input.times_mutated]
+            # the input was the last one mutated this number of times, and is now mutated one more time
+            if saved_input.times_mutated == self.min_times_mutated:
+                self.min_times_mutated += 1
+        saved_input.times_mutated += 1
+        self.times_mutated_counts[saved_input.times_mutated] += 1
+        if saved_input.times_mutated == 1 and saved_input in self.favored:
+            self.pending_favored -= 1
+
+    def record(self, input_coverage: int, parent: Union[SavedInput, None]):
+        """
+        Record the coverage of an executed mutant of `parent`. Recorded coverage is only used by the
+        power schedules once `update` is called.
+        """
+        if self.power_schedule == "DEFAULT":
+            return
+        self.pending_paths[input_coverage] += 1
+        if parent is not None and self.power_schedule == "ENTROPIC":
+            self.pending_parent_paths.setdefault(parent, Counter())[input_coverage] += 1
+
+    def update(self):
+        """
+        Recompute the favored inputs, take the coverage recorded since the last update into account, and
+        recompute the energy of the saved inputs.
+        """
+        self.update_favored()
+        if self.power_schedule == "DEFAULT":
+            return
+        for saved_input in self.saved_inputs:
+            self.path_frequency[saved_input] = \
+                self.path_frequency.get(saved_input, 0) + self.pending_paths.get(saved_input.coverage, 0)
+        if self.power_schedule == "RARE_EDGE":
+            for path, count in self.pending_paths.items():
+                for edge_id in to_edge_ids(path):
+                    self.edge_hits[edge_id] += count
+        for parent, paths in self.pending_parent_paths.items():
+            edge_hits = self.mutant_edge_hits.setdefault(parent, Counter())
+            for path, count in paths.items():
+                for edge_id in to_edge_ids(path):
+                    edge_hits[edge_id] += count
+        self.pending_paths = Counter()
+        self.pending_parent_paths = {}
+
+        if self.power_schedule in ["FAST", "EXPLORE"]:
+            mean_frequency = sum(max(f, 1) for f in self.path_frequency.values()) / len(self.path_frequency)
+            for saved_input in self.saved_inputs:
+                energy = mean_frequency / max(self.path_frequency[saved_input], 1)
+                if self.power_schedule == "FAST":
+                    energy *= 2 ** min(saved_input.times_mutated, 16)
+                self.energies[saved_input] = energy
+        elif self.power_schedule == "RARE_EDGE":
+            rarest_hits = {saved_input: min(self.edge_hits.get(edge_id, 0) for edge_id in to_edge_ids(saved_input.coverage))
+                           for saved_input in self.saved_inputs if saved_input.coverage != 0}
+            if len(rarest_hits) != 0:
+                threshold = 1 << max(min(rarest_hits.values()) - 1, 0).bit_length()
+                for saved_input, hits in rarest_hits.items():
+                    self.energies[saved_input] = RARE_EDGE_ENERGY if hits <= threshold else 1.0
+        else:
+            entropies = {saved_input: self.entropy(edge_hits) for saved_input, edge_hits in self.mutant_edge_hits.items()}
+            mean_entropy = sum(entropies.values()) / len(entropies) if len(entropies) != 0 else 0
+            for saved_input in self.saved_inputs:
+                if saved_input not in entropies:
+                    self.energies[saved_input] = MAX_ENERGY
+                elif mean_entropy > 0:
+                    self.energies[saved_input] = entropies[saved_input] / mean_entropy
+        for saved_input, energy in self.energies.items():
+            self.energies[saved_input] = min(max(energy, MIN_ENERGY), MAX_ENERGY)
+
+    @staticmethod
+    def entropy(edge_hits: Counter) -> float:
+        """
+        Return the entropy of the distribution of the edges covered by the mutants of an input, with one more
+        observation of an edge they did not cover yet, so that rarely observed inputs keep some entropy.
+        """
+        counts = list(edge_hits.values()) + [1]
+        total = sum(counts)
+        return math.log(total) - sum(count * math.log(count) for count in counts) / total
+
+    def energy(self, saved_input: SavedInput) -> float:
+        """
+        Return the energy of `saved_input`, relative to the energy the default schedule gives it.
+        """
+        return self.energies.get(saved_input, 1.0)
+
+    def mean_size(self) -> float:
+        return self.total_size / self.num_inputs
+
+    def mean_runtime(self) -> float:
+        return self.total_runtime / self.num_inputs
+
+    def fuzz_prob(self, saved_input: SavedInput) -> float:
+        """
+        Return the probability with which we should select `saved_input` for mutation.
+        """
+        prob = 1 / (1 + (saved_input.times_mutated - self.min_times_mutated))
+        if self.power_schedule == "DEFAULT":
+            return prob
+        return min(prob * self.energy(saved_input), 1.0)
+
+    def should_fuzz(self, saved_input: SavedInput) -> bool:
+        """
+        Randomly decide whether to select `saved_input` for mutation, with probability `fuzz_prob(saved_input)`
+        if it is favored. An input that is not favored is skipped first with probability SKIP_TO_PENDING_FAVORED,
+        SKIP_MUTATED_NON_FAVORED or SKIP_NON_FAVORED.
+        """
+        if len(self.favored) != 0 and saved_input not in self.favored:
+            if self.pending_favored > 0:
+                skip_prob = SKIP_TO_PENDING_FAVORED
+            elif saved_input.times_mutated > 0:
+                skip_prob = SKIP_MUTATED_NON_FAVORED
+            else:
+                skip_prob = SKIP_NON_FAVORED
+            if random.random() < skip_prob:
+                return False
+        # random.random() returns a float in [0,1). There is a higher
+        # chance of fuzzing `saved_input` if `fuzz_prob(saved_input)`
+        # is near 1.
+        return random.random() < self.fuzz_prob(saved_input)
+
+    def num_mutants(self, saved_input: SavedInput) -> int:
+        """
+        Return the number of mutated inputs we should produce from `saved_input`.
+        """
+        base_children = 10
+        # Boost for not mutated recently
+        base_children += base_children * (max(4 - saved_input.times_mutated, 0))
+        # Boost for smaller than average
+        smaller_boost = 2 if len(saved_input.data) < self.mean_size() else 1
+        # Boost for faster-running than average
+        faster_boost = 4 if saved_input.runtime < self.mean_runtime() else 1
+        return self.scale(base_children * smaller_boost * faster_boost, saved_input)
+
+    def scale(self, amount: int, saved_input: SavedInput) -> int:
+        """
+        Scale a number of mutations of `saved_input` by its energy.
+        """
+        if self.power_schedule == "DEFAULT":
+            return amount
+        return max(round(amount * self.energy(saved_input)), 1)
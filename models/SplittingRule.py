@@ -0,0 +1,106 @@
+from typing import Callable, List, Tuple, Union
+
+from models.Blank import Blank
+from models.BlankedInput import BlankedInput
+from util.splitting_rules import find_gaps, find_gaps_in_closures, increment_by_offset, find_next_char, find_closures
+from util.util import str_to_bytes
+
+# Number of executions a rule may spend before it is judged on its yield
+RULE_TRIAL_EXECUTIONS = 500
+# Minimum number of bytes a rule must turn into blanks per execution to stay in the pipeline
+MIN_RULE_YIELD = 0.01
+
+
+class SplittingRule:
+    """
+    A pass of the generalization pipeline: `find_gaps` at a fixed offset (OFFSET) or up to a split character (CHAR),
+    or `find_gaps_in_closures` for a pair of closure characters (CLOSURE), with the given blank type.
+
+    A rule is skipped without any execution if its precondition does not hold on the input (eg. the split character
+    does not occur), and it keeps track of the executions it spent and of the bytes it turned into blanks over the
+    campaign, so that rules with a poor yield can be dropped.
+    """
+    OFFSET, CHAR, CLOSURE = range(3)
+
+    def __init__(self, blank_type, kind: int, *args: Union[int, str]):
+        self.blank_type = blank_type
+        self.kind = kind
+        # offset, split character, or opening and closing characters
+        self.args = args
+        # Number of generalizations in which the rule ran, or was skipped because its precondition did not hold
+        self.applied = 0
+        self.skipped = 0
+        # Number of executions spent by the rule, and number of bytes it turned into blanks
+        self.executions = 0
+        self.blanked_bytes = 0
+        # Set once the rule's yield is too low; a dropped rule is not applied for the rest of the campaign
+        self.dropped = False
+
+    @property
+    def name(self) -> str:
+        blank = "DELETE" if self.blank_type == Blank.DELETE else "REPLACE"
+        kind = ["OFFSET", "CHAR", "CLOSURE"][self.kind]
+        return f"{blank} {kind} {' '.join(repr(arg) for arg in self.args)}"
+
+    def matches(self, blanked_input: BlankedInput) -> bool:
+        """
+        Return whether the rule can produce a blank in `blanked_input`.
+        """
+        if self.kind == SplittingRule.OFFSET:
+            return len(blanked_input.kept_ranges()) != 0
+        if self.kind == SplittingRule.CHAR:
+            return blanked_input.find(str_to_bytes(self.args[0]), 0) != -1
+        return len(find_closures(blanked_input, 0, self.args[0], self.args[1])[1]) != 0
+
+    def apply(self, blanked_input: BlankedInput, batch_check: Callable[[List[bytes]], List[bool]],
+              cumulative: bool) -> BlankedInput:
+        if self.kind == SplittingRule.OFFSET:
+            return find_gaps(blanked_input, self.blank_type, batch_check, increment_by_offset, self.args[0], cumulative)
+        if self.kind == SplittingRule.CHAR:
+            return find_gaps(blanked_input, self.blank_type, batch_check, find_next_char, self.args[0], cumulative)
+        return find_gaps_in_closures(blanked_input, self.blank_type, batch_check, find_closures, self.args[0],
+                                     self.args[1], cumulative)
+
+    def counters(self) -> Tuple[int, int, int, int]:
+        return self.applied, self.skipped, self.executions, self.blanked_bytes
+
+    def add_counters(self, counters: Tuple[int, int, int, int]):
+        self.applied += counters[0]
+        self.skipped += counters[1]
+        self.executions += counters[2]
+        self.blanked_bytes += counters[3]
+
+    def update(self) -> bool:
+        """
+        Drop the rule if it spent its trial executions with a yield below MIN_RULE_YIELD.
+        Return whether the rule was dropped by this call.
+        """
+        if self.dropped or self.executions < RULE_TRIAL_EXECUTIONS:
+            return False
+        self.dropped = self.blanked_bytes / self.executions < MIN_RULE_YIELD
+        return self.dropped
+
+    def to_map(self):
+        return {
+            "rule": self.name,
+            "applied": self.applied,
+            "skipped": self.skipped,
+            "executions": self.executions,
+            "blanked_bytes": self.blanked_bytes,
+            "dropped": self.dropped,
+        }
+
+
+def default_splitting_rules() -> List[SplittingRule]:
+    """
+    Return the splitting rules of Grimoire, in order: fixed offsets, then split characters, then closures,
+    first with delete blanks and then with replace blanks.
+    """
+    rules = []
+    for blank_type in [Blank.DELETE, Blank.REPLACE]:
+        rules += [SplittingRule(blank_type, SplittingRule.OFFSET, offset) for offset in [256, 128, 64, 32, 1]]
+        rules += [SplittingRule(blank_type, SplittingRule.CHAR, char) for char in ['.', ';', ',', '\n', '\r', '#', ' ']]
+        rules += [SplittingRule(blank_type, SplittingRule.CLOSURE, opening_char, closing_char)
+                  for opening_char, closing_char in [('(', ')'), ('[', ']'), ('{', '}'), ('<', '>'), ('\'', '\''),
+                                                     ('"', '"')]]
+    return rules
@@ -0,0 +1,50 @@
+from abc import ABC, abstractmethod
+from typing import Set
+
+from models.EdgeRegistry import EdgeRegistry
+
+
+class Tracer(ABC):
+    """
+    Abstract base class for a coverage tracer. A tracer records the edges covered
+    while the module under test runs between `start` and `stop`.
+    """
+
+    def __init__(self, edge_registry: EdgeRegistry = None):
+        # Registry assigning stable IDs to the recorded edges
+        self.edge_registry = edge_registry if edge_registry is not None else EdgeRegistry()
+
+    @abstractmethod
+    def reset(self):
+        """
+        Forget the edges recorded by the previous execution.
+        """
+        return NotImplemented
+
+    @abstractmethod
+    def start(self):
+        """
+        Start recording edges.
+        """
+        return NotImplemented
+
+    @abstractmethod
+    def stop(self):
+        """
+        Stop recording edges.
+        """
+        return NotImplemented
+
+    @abstractmethod
+    def get_edges(self) -> Set[int]:
+        """
+        Return the IDs (from `self.edge_registry`) of the edges recorded since the last `reset`.
+        """
+        return NotImplemented
+
+    def after_fork(self):
+        """
+        Called in a process forked from the fuzzer before it traces inputs, to stop sharing state (eg. files)
+        with the fuzzer's process.
+        """
+        pass
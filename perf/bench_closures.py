@@ -0,0 +1,72 @@
+"""
+Measure the closure passes of the splitting rules (`()`, `[]`, `{}`, `<>` and quotes, with delete and replace
+blanks) on large, deeply nested inputs: time spent finding the closures, total time, and executions.
+
+The oracle accepts a candidate if it has as many opening as closing brackets of each kind and kept all the `'b'`
+strings, which is cheap compared to running a benchmark, so that the time of the passes themselves is measured.
+
+Run from the repository root with: `python3 -m perf.bench_closures --sizes 1000 4000`
+"""
+import argparse
+import time
+
+from models.BlankedInput import BlankedInput
+from models.SplittingRule import SplittingRule, default_splitting_rules
+from perf.perf_util import print_table
+from util import splitting_rules
+
+BRACKETS = [(b"(", b")"), (b"[", b"]"), (b"{", b"}"), (b"<", b">")]
+
+
+def nested_input(size: int, depth: int) -> bytes:
+    """
+    Return a JSON-like input of at least `size` bytes, made of values nested `depth` levels deep.
+    """
+    value = b"1"
+    for level in range(depth):
+        value = [b'{"a": %s}', b"[%s, 'b']", b"(%s)", b"<%s>"][level % 4] % value
+    values = [value] * max(-(-size // (len(value) + 2)), 1)
+    return b"[" + b", ".join(values) + b"]"
+
+
+def accepted(candidate: bytes, num_strings: int) -> bool:
+    return candidate.count(b"'b'") == num_strings and \
+        all(candidate.count(opening) == candidate.count(closing) for opening, closing in BRACKETS)
+
+
+def main(args):
+    rules = [rule for rule in default_splitting_rules() if rule.kind == SplittingRule.CLOSURE]
+    rows = []
+    for size in args.sizes:
+        data = nested_input(size, args.depth)
+        num_strings = data.count(b"'b'")
+        num_execs = 0
+        closure_time = 0
+
+        def candidates_check(candidates):
+            nonlocal num_execs
+            num_execs += len(candidates)
+            return [accepted(candidate, num_strings) for candidate in candidates]
+
+        def timed_find_closures(*find_args):
+            nonlocal closure_time
+            start_time = time.perf_counter()
+            result = splitting_rules.find_closures(*find_args)
+            closure_time += time.perf_counter() - start_time
+            return result
+
+        blanked_input = BlankedInput(data)
+        start_time = time.perf_counter()
+        for rule in rules:
+            blanked_input = splitting_rules.find_gaps_in_closures(blanked_input, rule.blank_type, candidates_check,
+                                                                  timed_find_closures, *rule.args, True)
+        elapsed = time.perf_counter() - start_time
+        rows.append((len(data), args.depth, 1000 * closure_time, 1000 * elapsed, num_execs, len(blanked_input.blanks)))
+    print_table(["input bytes", "depth", "find closures (ms)", "total (ms)", "execs", "blanks"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the closure passes of the splitting rules.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 4000], help="sizes of the inputs")
+    parser.add_argument("--depth", type=int, default=8, help="nesting depth of the values of the inputs")
+    main(parser.parse_args())
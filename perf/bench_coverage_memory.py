@@ -0,0 +1,54 @@
+"""
+Compare the memory used to store the coverage of saved inputs as edge sets and as coverage bitmaps,
+after a short coverage-guided fuzzing campaign on each of the new_benchmarks targets.
+
+Run from the repository root with: `python3 -m perf.bench_coverage_memory --time 30`
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import coverage
+
+from fuzzer.CoverageGuidedFuzzer import CoverageGuidedFuzzer
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.SettraceTracer import SettraceTracer
+
+
+def edge_set_size(edges) -> int:
+    """
+    Size in bytes of a set of edge tuples, including the tuples and their ints.
+    """
+    return sys.getsizeof(edges) + sum(sys.getsizeof(edge) + sum(sys.getsizeof(i) for i in edge) for edge in edges)
+
+
+def main(args):
+    rows = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for benchmark in args.benchmarks:
+            loaded = load_benchmark(benchmark)
+            if loaded is None:
+                continue
+            module_under_test, test_file_name, seeds = loaded
+            cov = coverage.Coverage(branch=True, data_file=os.path.join(output_dir, ".coverage"))
+            tracer = SettraceTracer(os.path.dirname(test_file_name))
+            fuzzer = CoverageGuidedFuzzer(module_under_test, test_file_name, cov, output_dir, set(seeds), tracer)
+            fuzzer.save_data = lambda: None
+            fuzzer.fuzz(args.time)
+            set_bytes = 0
+            bitmap_bytes = 0
+            for saved_input in fuzzer.saved_inputs:
+                fuzzer.exec_with_coverage(saved_input.data)
+                set_bytes += edge_set_size({tracer.edge_registry.edges[i] for i in tracer.get_edges()})
+                bitmap_bytes += sys.getsizeof(saved_input.coverage)
+            rows.append((benchmark, len(fuzzer.saved_inputs), set_bytes / 1024, bitmap_bytes / 1024,
+                         set_bytes / max(bitmap_bytes, 1)))
+    print_table(["benchmark", "saved inputs", "edge sets (KiB)", "bitmaps (KiB)", "ratio"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the memory used by edge sets and coverage bitmaps.")
+    parser.add_argument("--time", type=float, default=30, help="seconds to fuzz each benchmark for")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, help="benchmarks to run")
+    main(parser.parse_args())
@@ -0,0 +1,55 @@
+"""
+Compare the throughput (executions per second) of in-process execution and of the fork server executor
+on the new_benchmarks targets.
+
+Run from the repository root with: `python3 -m perf.bench_executor --time 5`
+"""
+import argparse
+import os
+import time
+
+from executor.ForkServerExecutor import ForkServerExecutor
+from executor.InProcessExecutor import InProcessExecutor
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.SettraceTracer import SettraceTracer
+
+
+def execs_per_sec(executor, seeds, search_time: float) -> float:
+    """
+    Execute `seeds` in batches through `executor` for `search_time` seconds, and return the number of
+    executions per second.
+    """
+    num_execs = 0
+    start_time = time.time()
+    while time.time() - start_time < search_time:
+        executor.run_batch(seeds)
+        num_execs += len(seeds)
+    return num_execs / (time.time() - start_time)
+
+
+def main(args):
+    rows = []
+    for benchmark in args.benchmarks:
+        loaded = load_benchmark(benchmark)
+        if loaded is None:
+            continue
+        module_under_test, test_file_name, seeds = loaded
+        seeds = seeds[:args.num_seeds]
+        executors = [InProcessExecutor(module_under_test, SettraceTracer(os.path.dirname(test_file_name)))] + [
+            ForkServerExecutor(module_under_test, SettraceTracer(os.path.dirname(test_file_name)), batch_size)
+            for batch_size in args.batch_sizes
+        ]
+        results = [execs_per_sec(executor, seeds, args.time) for executor in executors]
+        rows.append((benchmark,) + tuple(results))
+    print_table(["benchmark", "in-process execs/s"] + [f"fork server (batch {b}) execs/s" for b in args.batch_sizes],
+                rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the throughput of in-process and fork server execution.")
+    parser.add_argument("--time", type=float, default=5, help="seconds to spend on each benchmark and executor")
+    parser.add_argument("--num_seeds", type=int, default=64, help="number of seeds of each benchmark to execute")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 16, 64],
+                        help="number of inputs run by each forked child")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, help="benchmarks to run")
+    main(parser.parse_args())
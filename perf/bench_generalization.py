@@ -0,0 +1,88 @@
+"""
+Compare the input generalization strategies of the Grimoire fuzzer (splitting rules and hierarchical delta
+debugging) on the seeds of the new_benchmarks targets: executions per generalization, time and peak memory
+per generalization, and the structure of the generalized inputs.
+
+Run from the repository root with: `python3 -m perf.bench_generalization --num_seeds 20 --min_size 0`
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import coverage
+
+from fuzzer.GrimoireFuzzer import GrimoireFuzzer
+from models.Blank import Blank
+from models.GeneralizedInput import GeneralizedInput
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.SettraceTracer import SettraceTracer
+from util.coverage_bitmap import VIRGIN_MAP
+
+STRATEGIES = ["SPLITTING_RULES", "DDMIN"]
+
+
+def blank_structure(generalized_input: GeneralizedInput):
+    """
+    Return the number of delete blanks, the number of replace blanks, and the number of bytes of the original
+    input that were turned into blanks.
+    """
+    blanks = [token for token in generalized_input.input if isinstance(token, Blank)]
+    num_delete = len([blank for blank in blanks if blank.blank_type == Blank.DELETE])
+    return num_delete, len(blanks) - num_delete, sum(len(blank.removed) for blank in blanks)
+
+
+def main(args):
+    rows = []
+    tracemalloc.start()
+    for benchmark in args.benchmarks:
+        loaded = load_benchmark(benchmark)
+        if loaded is None:
+            continue
+        module_under_test, test_file_name, seeds = loaded
+        seeds = seeds[:args.num_seeds]
+        # repeat the seeds up to the minimum size, to measure the generalization of large inputs
+        seeds = [seed * max(-(-args.min_size // max(len(seed), 1)), 1) for seed in seeds]
+        for strategy in args.strategies:
+            tracer = SettraceTracer(os.path.dirname(test_file_name))
+            fuzzer = GrimoireFuzzer(module_under_test, test_file_name, coverage.Coverage(), tempfile.mkdtemp(),
+                                    set(), True, tracer, generalization=strategy)
+            # count the executions of the generalizations
+            run_batch = fuzzer.executor.run_batch
+            num_execs = 0
+
+            def counting_run_batch(inputs):
+                nonlocal num_execs
+                num_execs += len(inputs)
+                return run_batch(inputs)
+
+            fuzzer.executor.run_batch = counting_run_batch
+            num_delete = num_replace = num_blank_bytes = 0
+            tracemalloc.reset_peak()
+            start_time = time.time()
+            for seed in seeds:
+                # generalize every seed as if it were the first input, so that all of its edges are new
+                fuzzer.virgin_bits = VIRGIN_MAP
+                _, seed_coverage, _ = fuzzer.exec_with_coverage(seed)
+                delete, replace, blank_bytes = blank_structure(fuzzer.generalize(seed, seed_coverage & VIRGIN_MAP))
+                num_delete += delete
+                num_replace += replace
+                num_blank_bytes += blank_bytes
+            elapsed = time.time() - start_time
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            rows.append((benchmark, strategy, num_execs / len(seeds), 1000 * elapsed / len(seeds), peak_memory / 1024,
+                         num_delete / len(seeds), num_replace / len(seeds),
+                         100 * num_blank_bytes / max(sum(len(seed) for seed in seeds), 1)))
+    print_table(["benchmark", "strategy", "execs/input", "ms/input", "peak KiB", "delete blanks/input", "replace blanks/input",
+                 "% bytes in blanks"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the input generalization strategies.")
+    parser.add_argument("--num_seeds", type=int, default=20, help="number of seeds of each benchmark to generalize")
+    parser.add_argument("--min_size", type=int, default=0, help="repeat each seed until it is at least this long")
+    parser.add_argument("--strategies", nargs="+", default=STRATEGIES, help="generalization strategies to compare")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, help="benchmarks to run")
+    main(parser.parse_args())
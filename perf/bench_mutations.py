@@ -0,0 +1,68 @@
+"""
+Measure the throughput of the Grimoire mutations (input extension, recursive replacement and string replacement)
+on the generalized seeds of the new_benchmarks targets, without executing the mutants, and the throughput of the
+random picks of generalized inputs, slices and strings these mutations are built from.
+
+Run from the repository root with: `python3 -m perf.bench_mutations --time 5`
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import coverage
+
+from fuzzer.GrimoireFuzzer import GrimoireFuzzer
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.SettraceTracer import SettraceTracer
+from util.grimoire_util import random_generalized
+
+
+def main(args):
+    rows = []
+    for benchmark in args.benchmarks:
+        loaded = load_benchmark(benchmark)
+        if loaded is None:
+            continue
+        module_under_test, test_file_name, seeds = loaded
+        tracer = SettraceTracer(os.path.dirname(test_file_name))
+        fuzzer = GrimoireFuzzer(module_under_test, test_file_name, coverage.Coverage(), tempfile.mkdtemp(),
+                                set(seeds[:args.num_seeds]), True, tracer)
+        num_mutants = 0
+        mutant_bytes = 0
+
+        def count_mutant(input_bytes: bytes):
+            nonlocal num_mutants, mutant_bytes
+            num_mutants += 1
+            mutant_bytes += len(input_bytes)
+
+        fuzzer.send_to_fuzzer = count_mutant
+        generalized_inputs = [saved_input for saved_input in fuzzer.saved_inputs if saved_input.generalized is not None]
+        random.seed(0)
+        start_time = time.time()
+        while time.time() - start_time < args.time:
+            saved_input = random.choice(generalized_inputs)
+            fuzzer.input_extension(saved_input.generalized)
+            fuzzer.recursive_replacement(saved_input.generalized)
+            fuzzer.string_replacement(saved_input.data, fuzzer.strings)
+        elapsed = time.time() - start_time
+
+        num_picks = 0
+        start_time = time.time()
+        while time.time() - start_time < args.time:
+            for _ in range(1000):
+                random_generalized(fuzzer.generalized, fuzzer.strings)
+            num_picks += 1000
+        picks_elapsed = time.time() - start_time
+        rows.append((benchmark, len(fuzzer.generalized), num_mutants / elapsed, mutant_bytes / max(num_mutants, 1),
+                     num_picks / picks_elapsed))
+    print_table(["benchmark", "generalized inputs", "mutants/s", "bytes/mutant", "picks/s"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the throughput of the Grimoire mutations.")
+    parser.add_argument("--time", type=float, default=5, help="seconds to mutate the seeds of each benchmark for")
+    parser.add_argument("--num_seeds", type=int, default=20, help="number of seeds of each benchmark to generalize")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, help="benchmarks to run")
+    main(parser.parse_args())
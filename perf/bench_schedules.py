@@ -0,0 +1,83 @@
+"""
+Compare the power schedules of the coverage-guided and Grimoire fuzzers on the new_benchmarks targets: edges
+covered after a fixed fuzzing time, and executions during that time, averaged over several runs.
+
+Inputs run in a fork server, so that benchmarks calling `sys.exit` (eg. cgidecode) do not stop the measurement.
+
+Run from the repository root with: `python3 -m perf.bench_schedules --time 30 --runs 3`
+"""
+import argparse
+import os
+import random
+import tempfile
+
+import coverage
+
+from executor.ForkServerExecutor import ForkServerExecutor
+from fuzzer.CoverageGuidedFuzzer import CoverageGuidedFuzzer
+from fuzzer.GrimoireFuzzer import GrimoireFuzzer
+from models.Scheduler import POWER_SCHEDULES
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.SettraceTracer import SettraceTracer
+from util.coverage_bitmap import count_covered
+
+
+def run(fuzzer_name: str, module_under_test, test_file_name: str, seeds, power_schedule: str, search_time: float,
+        fork_batch_size: int):
+    """
+    Fuzz for `search_time` seconds, and return the number of edges covered and the number of executions.
+    """
+    tracer = SettraceTracer(os.path.dirname(test_file_name))
+    executor = ForkServerExecutor(module_under_test, tracer, fork_batch_size)
+    num_execs = 0
+    run_batch = executor.run_batch
+
+    def counting_run_batch(inputs):
+        nonlocal num_execs
+        num_execs += len(inputs)
+        return run_batch(inputs)
+
+    executor.run_batch = counting_run_batch
+    with tempfile.TemporaryDirectory() as output_dir:
+        if fuzzer_name == "GRIMOIRE":
+            fuzzer = GrimoireFuzzer(module_under_test, test_file_name, coverage.Coverage(), output_dir, set(seeds),
+                                    True, tracer, executor, power_schedule=power_schedule)
+        else:
+            fuzzer = CoverageGuidedFuzzer(module_under_test, test_file_name, coverage.Coverage(), output_dir,
+                                          set(seeds), tracer, executor, power_schedule)
+        fuzzer.save_data = lambda: None
+        fuzzer.fuzz(search_time)
+    executor.close()
+    return count_covered(fuzzer.virgin_bits), num_execs
+
+
+def main(args):
+    rows = []
+    for benchmark in args.benchmarks:
+        loaded = load_benchmark(benchmark)
+        if loaded is None:
+            continue
+        module_under_test, test_file_name, seeds = loaded
+        seeds = seeds[:args.num_seeds]
+        for power_schedule in args.power_schedules:
+            edges = execs = 0
+            for i in range(args.runs):
+                random.seed(i)
+                run_edges, run_execs = run(args.fuzzer, module_under_test, test_file_name, seeds, power_schedule,
+                                           args.time, args.fork_batch_size)
+                edges += run_edges
+                execs += run_execs
+            rows.append((benchmark, power_schedule, edges / args.runs, execs / args.runs))
+    print_table(["benchmark", "power schedule", "edges", "execs"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the power schedules of the fuzzers.")
+    parser.add_argument("--fuzzer", choices=["COVERAGE", "GRIMOIRE"], default="COVERAGE", help="fuzzer to run")
+    parser.add_argument("--time", type=float, default=30, help="seconds to fuzz each benchmark for, in each run")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs to average over")
+    parser.add_argument("--num_seeds", type=int, default=10, help="number of seeds of each benchmark to start from")
+    parser.add_argument("--fork_batch_size", type=int, default=16, help="number of inputs run by each forked child")
+    parser.add_argument("--power_schedules", nargs="+", default=POWER_SCHEDULES, help="power schedules to compare")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, help="benchmarks to run")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Compare the throughput (executions per second) of the tracer backends on the new_benchmarks targets.
+
+Run from the repository root with: `python3 -m perf.bench_tracer --time 5`
+"""
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+
+import coverage
+
+from fuzzer.RandomFuzzer import RandomFuzzer
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.CoverageTracer import CoverageTracer
+from tracer.InstrumentationTracer import InstrumentationTracer
+from tracer.SettraceTracer import SettraceTracer
+from util.coverage_bitmap import count_edges
+from util.instrumentation import InstrumentingLoader
+
+TRACERS = ["COVERAGE", "SETTRACE", "INSTRUMENT"]
+
+
+def execs_per_sec(fuzzer, seeds, search_time: float):
+    """
+    Execute `seeds` round-robin through `fuzzer` for `search_time` seconds, and return the
+    number of executions per second and the number of distinct edges seen.
+    """
+    num_execs = 0
+    edges = 0
+    start_time = time.time()
+    while time.time() - start_time < search_time:
+        for seed in seeds:
+            _, input_cov, _ = fuzzer.exec_with_coverage(seed)
+            edges |= input_cov
+            num_execs += 1
+    return num_execs / (time.time() - start_time), count_edges(edges)
+
+
+def import_instrumented(module_under_test):
+    """
+    Import a separate, instrumented copy of `module_under_test`, and return it with its tracer.
+    """
+    loader = InstrumentingLoader(module_under_test.__name__, module_under_test.__file__)
+    spec = importlib.util.spec_from_loader(module_under_test.__name__, loader)
+    instrumented_module = importlib.util.module_from_spec(spec)
+    loader.exec_module(instrumented_module)
+    return instrumented_module, InstrumentationTracer([loader.instrumented_module])
+
+
+def main(args):
+    rows = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for benchmark in args.benchmarks:
+            loaded = load_benchmark(benchmark)
+            if loaded is None:
+                continue
+            module_under_test, test_file_name, seeds = loaded
+            cov = coverage.Coverage(branch=True, data_file=os.path.join(output_dir, ".coverage"))
+            tracers = {
+                "COVERAGE": CoverageTracer(cov),
+                "SETTRACE": SettraceTracer(os.path.dirname(test_file_name)),
+            }
+            results = {}
+            for name, tracer in tracers.items():
+                fuzzer = RandomFuzzer(module_under_test, test_file_name, cov, output_dir, tracer)
+                results[name] = execs_per_sec(fuzzer, seeds, args.time)
+            instrumented_module, tracer = import_instrumented(module_under_test)
+            fuzzer = RandomFuzzer(instrumented_module, test_file_name, cov, output_dir, tracer)
+            results["INSTRUMENT"] = execs_per_sec(fuzzer, seeds, args.time)
+            rows.append((benchmark,) + tuple(results[name][0] for name in TRACERS)
+                        + tuple(results[name][0] / results["COVERAGE"][0] for name in TRACERS[1:])
+                        + tuple(results[name][1] for name in TRACERS))
+    header = ["benchmark"] + [f"{name.lower()} execs/s" for name in TRACERS] \
+             + [f"{name.lower()} speedup" for name in TRACERS[1:]] \
+             + [f"{name.lower()} edges" for name in TRACERS]
+    print_table(header, rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the throughput of the tracer backends.")
+    parser.add_argument("--time", type=float, default=5, help="seconds to spend on each benchmark and tracer")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, help="benchmarks to run")
+    main(parser.parse_args())
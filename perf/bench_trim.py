@@ -0,0 +1,89 @@
+"""
+Measure the impact of trimming coverage-increasing inputs on the Grimoire fuzzer, on the new_benchmarks targets:
+executions per second, time spent generalizing, size of the saved inputs, and executions spent trimming, with and
+without trimming, after a fixed fuzzing time.
+
+Inputs run in the fuzzer's process, so cgidecode (which calls `sys.exit`) is not run by default.
+
+Run from the repository root with: `python3 -m perf.bench_trim --time 30`
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import coverage
+
+from executor.InProcessExecutor import InProcessExecutor
+from fuzzer.GrimoireFuzzer import GrimoireFuzzer
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.SettraceTracer import SettraceTracer
+from util.coverage_bitmap import count_covered
+
+
+class TimedGrimoireFuzzer(GrimoireFuzzer):
+    """
+    Grimoire fuzzer recording the time spent generalizing inputs.
+    """
+    generalization_time = 0.0
+
+    def generalize(self, *args, **kwargs):
+        start_time = time.time()
+        generalized_input = super().generalize(*args, **kwargs)
+        self.generalization_time += time.time() - start_time
+        return generalized_input
+
+
+def run(module_under_test, test_file_name: str, seeds, trim: bool, search_time: float):
+    """
+    Fuzz for `search_time` seconds, and return the number of edges covered, the executions per second (including
+    the startup), the time spent generalizing, the mean size of the saved inputs, the executions spent trimming and
+    the number of bytes trimmed.
+    """
+    tracer = SettraceTracer(os.path.dirname(test_file_name))
+    executor = InProcessExecutor(module_under_test, tracer)
+    num_execs = 0
+    run_input = executor.run
+
+    def counting_run(input_data):
+        nonlocal num_execs
+        num_execs += 1
+        return run_input(input_data)
+
+    # the default run_batch calls run on each input
+    executor.run = counting_run
+    with tempfile.TemporaryDirectory() as output_dir:
+        start_time = time.time()
+        fuzzer = TimedGrimoireFuzzer(module_under_test, test_file_name, coverage.Coverage(), output_dir, set(seeds),
+                                     True, tracer, executor, trim=trim)
+        fuzzer.save_data = lambda: None
+        fuzzer.fuzz(search_time)
+        elapsed = time.time() - start_time
+    mean_size = sum(len(saved_input.data) for saved_input in fuzzer.saved_inputs) / len(fuzzer.saved_inputs)
+    return (count_covered(fuzzer.virgin_bits), num_execs / elapsed, fuzzer.generalization_time, mean_size,
+            fuzzer.trim_executions, fuzzer.trimmed_bytes)
+
+
+def main(args):
+    rows = []
+    for benchmark in args.benchmarks:
+        loaded = load_benchmark(benchmark)
+        if loaded is None:
+            continue
+        module_under_test, test_file_name, seeds = loaded
+        for trim in [False, True]:
+            random.seed(0)
+            rows.append((benchmark, "on" if trim else "off")
+                        + run(module_under_test, test_file_name, seeds[:args.num_seeds], trim, args.time))
+    print_table(["benchmark", "trim", "edges", "execs/s", "generalization s", "mean saved size", "trim execs",
+                 "trimmed bytes"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the impact of trimming the saved inputs.")
+    parser.add_argument("--time", type=float, default=30, help="seconds to fuzz each benchmark for")
+    parser.add_argument("--num_seeds", type=int, default=10, help="number of seeds of each benchmark to start from")
+    parser.add_argument("--benchmarks", nargs="+", default=[b for b in BENCHMARKS if b != "cgidecode"],
+                        help="benchmarks to run")
+    main(parser.parse_args())
@@ -0,0 +1,44 @@
+"""
+Measure how the throughput (executions per second) of the executor pool scales with the number of workers
+on the new_benchmarks targets.
+
+Run from the repository root with: `python3 -m perf.bench_workers --time 5 --workers 1 2 4 8`
+"""
+import argparse
+import os
+
+from executor.InProcessExecutor import InProcessExecutor
+from executor.PoolExecutor import PoolExecutor
+from perf.bench_executor import execs_per_sec
+from perf.perf_util import BENCHMARKS, load_benchmark, print_table
+from tracer.SettraceTracer import SettraceTracer
+
+
+def main(args):
+    rows = []
+    for benchmark in args.benchmarks:
+        loaded = load_benchmark(benchmark)
+        if loaded is None:
+            continue
+        module_under_test, test_file_name, seeds = loaded
+        # batches as large as the mutant batches of the fuzzers
+        batch = (seeds * (args.batch_size // len(seeds) + 1))[:args.batch_size]
+        in_process = InProcessExecutor(module_under_test, SettraceTracer(os.path.dirname(test_file_name)))
+        results = [execs_per_sec(in_process, batch, args.time)]
+        for num_workers in args.workers:
+            executor = PoolExecutor(module_under_test, SettraceTracer(os.path.dirname(test_file_name)), num_workers)
+            results.append(execs_per_sec(executor, batch, args.time))
+            executor.close()
+        rows.append((benchmark,) + tuple(results) + tuple(r / results[0] for r in results[1:]))
+    print_table(["benchmark", "in-process execs/s"] + [f"{n} workers execs/s" for n in args.workers]
+                + [f"{n} workers speedup" for n in args.workers], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the scaling of the executor pool.")
+    parser.add_argument("--time", type=float, default=5, help="seconds to spend on each benchmark and pool size")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()],
+                        help="pool sizes to measure")
+    parser.add_argument("--batch_size", type=int, default=256, help="number of inputs in each batch")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, help="benchmarks to run")
+    main(parser.parse_args())
@@ -0,0 +1,46 @@
+import importlib
+import inspect
+import os
+from typing import List, Tuple
+
+from util.util import log
+
+# Single-file benchmarks run by eval.sh, plus the multi-file apimd benchmark
+BENCHMARKS = ["calculator", "cgidecode", "mathexpr", "microjson", "sexpr", "urlparse", "apimd.apimd_parser"]
+BENCHMARKS_DIR = "new_benchmarks"
+SEEDS_DIR = os.path.join(BENCHMARKS_DIR, "unified_train_set")
+
+
+def load_benchmark(benchmark: str):
+    """
+    Import the module of `benchmark` and read its seed inputs.
+
+    Returns the module, the file in which it is defined, and its seeds sorted by length.
+    Returns None if the module cannot be imported (e.g. a dependency is not installed).
+    """
+    try:
+        module_under_test = importlib.import_module(f"{BENCHMARKS_DIR}.{benchmark}")
+    except ImportError as e:
+        log(f"Skipping {benchmark}: {e}")
+        return None
+    seeds_dir = os.path.join(SEEDS_DIR, benchmark.split(".")[-1])
+    seeds = []
+    if os.path.isdir(seeds_dir):
+        for filename in sorted(os.listdir(seeds_dir)):
+            full_name = os.path.join(seeds_dir, filename)
+            if os.path.isfile(full_name):
+                with open(full_name, "rb") as seed_file:
+                    seeds.append(seed_file.read())
+    if len(seeds) == 0:
+        seeds = [b"\x00" * 20]
+    return module_under_test, inspect.getfile(module_under_test), sorted(seeds, key=len)
+
+
+def print_table(header: List[str], rows: List[Tuple]):
+    """
+    Print `rows` as an aligned plain-text table.
+    """
+    table = [header] + [[f"{c:.1f}" if isinstance(c, float) else str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+    for row in table:
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,75 @@
+import unittest
+
+from models.Blank import Blank
+from models.BlankedInput import BlankedInput
+from models.GeneralizedInput import GeneralizedInput
+
+
+class BlankedInputTest(unittest.TestCase):
+    def test_BlankedInput_candidate(self):
+        blanked_input = BlankedInput(b"hello world")
+        self.assertEqual(b"hello world", blanked_input.get_bytes())
+        self.assertEqual(b"world", blanked_input.candidate(0, 6))
+        self.assertEqual(b"hello there", blanked_input.candidate(6, 11, b"there"))
+
+        blanked_input.add_blank(2, 4, Blank.get_blank())
+        self.assertEqual(b"heo world", blanked_input.get_bytes())
+        # positions stay offsets in the original bytes
+        self.assertEqual(b"heworld", blanked_input.candidate(4, 6))
+        self.assertEqual(b"world", blanked_input.candidate(0, 6))
+
+    def test_BlankedInput_add_blank_merges(self):
+        blanked_input = BlankedInput(b"hello world")
+        blanked_input.add_blank(0, 2, Blank.get_blank())
+        blanked_input.add_blank(2, 5, Blank.get_blank())
+        blanked_input.add_blank(5, 6, Blank.get_blank(blank_type=Blank.REPLACE))
+        expected = GeneralizedInput([Blank.get_blank(removed=b"hello"), Blank.get_blank(removed=b" ", blank_type=Blank.REPLACE),
+                                     b"world"])
+        self.assertEqual(expected, blanked_input.to_generalized_input())
+
+        # a blank replaces the blanks it contains
+        blanked_input.add_blank(0, 11, Blank.get_blank())
+        self.assertEqual(GeneralizedInput([Blank.get_blank(removed=b"hello world")]), blanked_input.to_generalized_input())
+        self.assertEqual(b"", blanked_input.get_bytes())
+
+    def test_BlankedInput_copy(self):
+        blanked_input = BlankedInput(b"hello world")
+        blanked_input.add_blank(0, 2, Blank.get_blank())
+        working_input = blanked_input.copy()
+        blanked_input.add_blank(2, 5, Blank.get_blank())
+        self.assertEqual(b"llo world", working_input.get_bytes())
+        self.assertEqual([Blank.get_blank(removed=b"he")] + list("llo world"), working_input.to_exploded_input())
+
+    def test_BlankedInput_boundary(self):
+        blanked_input = BlankedInput("hé!".encode("utf-8"))
+        # "é" is 2 bytes long
+        self.assertEqual(1, blanked_input.boundary(1))
+        self.assertEqual(3, blanked_input.boundary(2))
+        blanked_input.add_blank(1, 3, Blank.get_blank())
+        self.assertEqual(3, blanked_input.boundary(2))
+        self.assertEqual(4, blanked_input.boundary(5))
+
+    def test_BlankedInput_find(self):
+        blanked_input = BlankedInput(b"a,b,c")
+        blanked_input.add_blank(1, 2, Blank.get_blank())
+        self.assertEqual(3, blanked_input.find(b",", 0))
+        self.assertEqual(-1, blanked_input.find(b",", 4))
+
+    def test_BlankedInput_positions(self):
+        blanked_input = BlankedInput(b"(a(b)c)d)")
+        self.assertEqual([4, 6, 8], blanked_input.positions(b")"))
+        working_input = blanked_input.copy()
+        blanked_input.add_blank(3, 5, Blank.get_blank())
+        self.assertEqual([6, 8], blanked_input.positions(b")", 1))
+        self.assertEqual([6], blanked_input.positions(b")", 1, 8))
+        self.assertEqual([4, 6, 8], working_input.positions(b")"))
+        # overlapping occurrences are found, as with bytes.find
+        self.assertEqual([0, 1], BlankedInput(b"aaa").positions(b"aa"))
+
+    def test_BlankedInput_exploded_input_round_trip(self):
+        exploded_input = ["h", "e", Blank.get_blank(removed=b"ll"), "o", Blank.get_blank()]
+        self.assertEqual(exploded_input, BlankedInput.from_exploded_input(exploded_input).to_exploded_input())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
+import pickle
 import unittest
+from unittest import mock
 
 from models.Blank import Blank
 from models.GeneralizedInput import GeneralizedInput
@@ -64,6 +66,51 @@ class GeneralizedInputTest(unittest.TestCase):
         expected = [b"Hello", Blank.get_blank(), b"world"]
         self.assertEqual(expected, generalized_input.input)
 
+    def test_GeneralizedInput_blank_indices(self):
+        generalized_input = GeneralizedInput([Blank.get_blank(), b"hello", Blank.get_blank(), b"world"])
+        # the blanks, then the beginning and the end of the input
+        self.assertEqual([0, 2, -1, 4], generalized_input.blank_indices())
+        self.assertIs(generalized_input.blank_indices(), generalized_input.blank_indices())
+        self.assertEqual([-1, 1], GeneralizedInput([b"hello"]).blank_indices())
+        self.assertEqual([-1, 0], GeneralizedInput().blank_indices())
+
+        generalized_input = GeneralizedInput(["a", Blank.get_blank(), Blank.get_blank(), "b"], True)
+        self.assertEqual([1, -1, 3], generalized_input.blank_indices())
+
+    def test_GeneralizedInput_slice(self):
+        generalized_input = GeneralizedInput([b"hello", Blank.get_blank(), b"world", Blank.get_blank()])
+        self.assertEqual(GeneralizedInput([b"hello"]), generalized_input.slice(-1, 1))
+        self.assertEqual(GeneralizedInput([b"world"]), generalized_input.slice(1, 3))
+        self.assertEqual(GeneralizedInput(), generalized_input.slice(3, 4))
+        self.assertEqual(GeneralizedInput(generalized_input.input), generalized_input.slice(-1, 4))
+        self.assertEqual(b"helloworld", generalized_input.slice(-1, 4).get_bytes())
+        # cached slices are shared between calls
+        self.assertIs(generalized_input.slice(1, 3), generalized_input.slice(1, 3))
+        # the same indices of another input give its own slice
+        other_input = GeneralizedInput([b"bye", Blank.get_blank(), b"moon", Blank.get_blank()])
+        self.assertEqual(GeneralizedInput([b"moon"]), other_input.slice(1, 3))
+        # slices are not pickled with the input
+        self.assertEqual(len(pickle.dumps(GeneralizedInput(generalized_input.input))),
+                         len(pickle.dumps(generalized_input)))
+
+    def test_GeneralizedInput_slice_uncached(self):
+        generalized_input = GeneralizedInput([b"hello", Blank.get_blank(), b"world", Blank.get_blank()])
+        with mock.patch("models.GeneralizedInput.MAX_CACHED_SLICES", 1):
+            first_slice = generalized_input.slice(-1, 1)
+            self.assertIs(first_slice, generalized_input.slice(-1, 1))
+            # evicts the least recently used slice
+            self.assertEqual(GeneralizedInput([b"world"]), generalized_input.slice(1, 3))
+            uncached_slice = generalized_input.slice(-1, 1)
+            self.assertEqual(first_slice, uncached_slice)
+            self.assertIsNot(first_slice, uncached_slice)
+
+        # changing the input drops its cached slices
+        generalized_input = GeneralizedInput([b"a", Blank.get_blank(), b"b", b"c"])
+        self.assertEqual(GeneralizedInput([b"b", b"c"]), generalized_input.slice(1, 4))
+        generalized_input.merge_adjacent_gaps_and_bytes()
+        self.assertEqual(GeneralizedInput([b"bc"]), generalized_input.slice(1, 3))
+        self.assertEqual([1, -1, 3], generalized_input.blank_indices())
+
 
 if __name__ == '__main__':
     unittest.main()
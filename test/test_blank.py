@@ -29,6 +29,16 @@ class BlankTest(unittest.TestCase):
         test_blank_1.append(Blank.get_blank(removed=b"world"))
         self.assertEqual(test_blank_1, Blank.get_blank(removed=b"helloworld"))
 
+    def test_optimize_replacement(self):
+        blank = ReplaceBlank(b"a")
+        for replace_class in [ReplaceClass.LETTER, ReplaceClass.DIGIT, ReplaceClass.HEXDIGIT]:
+            blank.add_replacement(replace_class)
+        self.assertEqual({ReplaceClass.LETTER, ReplaceClass.HEXDIGIT}, blank.replacements)
+        # the subclasses of an added class, direct or not, are dropped
+        for replace_class in ReplaceClass.descendants(ReplaceClass.PRINTABLE):
+            blank.add_replacement(replace_class)
+        self.assertEqual({ReplaceClass.PRINTABLE}, blank.replacements)
+
 
 class ReplaceClassTest(unittest.TestCase):
     # manually check this
@@ -0,0 +1,37 @@
+import unittest
+
+from util.bloom_filter import BloomFilter
+
+
+class BloomFilterTest(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom_filter = BloomFilter(1 << 12, 0.01)
+        inputs = [str(i).encode() for i in range(1000)]
+        for input_data in inputs:
+            self.assertFalse(bloom_filter.check_and_add(input_data))
+        for input_data in inputs:
+            self.assertIn(input_data, bloom_filter)
+
+    def test_false_positive_rate(self):
+        bloom_filter = BloomFilter(1 << 12, 0.01)
+        for i in range(bloom_filter.capacity):
+            bloom_filter.add(b"in %d" % i)
+        false_positives = sum(b"out %d" % i in bloom_filter for i in range(10000))
+        self.assertLess(false_positives, 10000 * 0.02)
+
+    def test_cleared_when_full(self):
+        bloom_filter = BloomFilter(16, 0.1)
+        i = 0
+        # inputs reported as present (false positives) are not added
+        while bloom_filter.num_items < bloom_filter.capacity:
+            bloom_filter.add(b"%d" % i)
+            i += 1
+        new_input = next(b"new %d" % j for j in range(1000) if b"new %d" % j not in bloom_filter)
+        self.assertFalse(bloom_filter.check_and_add(new_input))
+        self.assertEqual(1, bloom_filter.num_clears)
+        self.assertEqual(1, bloom_filter.num_items)
+        self.assertIn(new_input, bloom_filter)
+
+
+if __name__ == '__main__':
+    unittest.main()
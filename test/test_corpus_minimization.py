@@ -0,0 +1,38 @@
+import os
+import types
+import unittest
+
+from executor.InProcessExecutor import InProcessExecutor
+from tracer.SettraceTracer import SettraceTracer
+from util.corpus_minimization import cover_edges, minimize_corpus
+
+
+def run_target(input_data: bytes):
+    if input_data.startswith(b"a"):
+        x = 1
+    if input_data.startswith(b"b"):
+        x = 2
+    if input_data.endswith(b"!"):
+        raise ValueError()
+
+
+class CorpusMinimizationTest(unittest.TestCase):
+    def test_cover_edges(self):
+        # edge 3 is only covered by the third bitmap, which also covers edges 0 and 1
+        self.assertEqual([1, 2], cover_edges([0b0011, 0b0101, 0b1011, 0b0001]))
+        self.assertEqual([], cover_edges([]))
+
+    def test_minimize_corpus(self):
+        target = types.ModuleType("target")
+        target.test_one_input = run_target
+        executor = InProcessExecutor(target, SettraceTracer(os.path.dirname(__file__)))
+        inputs = [b"aaa", b"a", b"aa", b"b", b"bb", b"b!", b"bb!", b"a!", b"c"]
+        kept_inputs, stats = minimize_corpus(inputs, executor, batch_size=4)
+        # the smallest inputs covering the edges of the passing inputs (those of b"c" are covered by b"a" and b"b"),
+        # and of the failing inputs
+        self.assertEqual({b"a", b"b", b"a!", b"b!"}, set(kept_inputs))
+        self.assertEqual({"inputs": 9, "failing_inputs": 3, "kept_inputs": 4}, stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from util.coverage_bitmap import VIRGIN_MAP, to_bitmap, to_edge_ids, count_edges, count_covered, has_new_bits
+
+
+class CoverageBitmapTest(unittest.TestCase):
+    def setUp(self):
+        self.edges = {0, 5, 17}
+
+    def test_to_bitmap(self):
+        bitmap = to_bitmap(self.edges)
+        self.assertEqual(0b100000000000100001, bitmap)
+        self.assertEqual(3, count_edges(bitmap))
+        self.assertEqual(bitmap, to_bitmap(list(self.edges) + list(self.edges)))
+        self.assertEqual(0, to_bitmap(set()))
+
+    def test_to_edge_ids(self):
+        self.assertEqual([0, 5, 17], to_edge_ids(to_bitmap(self.edges)))
+        self.assertEqual([], to_edge_ids(0))
+
+    def test_has_new_bits(self):
+        bitmap = to_bitmap(self.edges)
+        virgin_bits = VIRGIN_MAP
+        self.assertTrue(has_new_bits(bitmap, virgin_bits))
+        virgin_bits &= ~bitmap
+        self.assertEqual(3, count_covered(virgin_bits))
+        self.assertFalse(has_new_bits(bitmap, virgin_bits))
+        self.assertFalse(has_new_bits(to_bitmap({5}), virgin_bits))
+        self.assertTrue(has_new_bits(to_bitmap({5, 1000}), virgin_bits))
+        self.assertEqual(to_bitmap({1000}), to_bitmap({5, 1000}) & virgin_bits)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import random
+import unittest
+
+from util.dictionary_matcher import DictionaryMatcher, non_overlapping_ranges
+from util.util import find_all_overlapping_substr, find_all_nonoverlapping_substr
+
+
+class DictionaryMatcherTest(unittest.TestCase):
+    def test_find_all(self):
+        matcher = DictionaryMatcher([b"he", b"she", b"his", b"hers", b"he"])
+        self.assertEqual({b"she": [1], b"he": [2], b"hers": [2]}, matcher.find_all(b"ushers"))
+        self.assertEqual({}, matcher.find_all(b"xyz"))
+        self.assertEqual({b"": [0, 1, 2]}, DictionaryMatcher([b""]).find_all(b"ab"))
+
+    def test_find_all_matches_regex_search(self):
+        random.seed(4)
+        for _ in range(100):
+            strings = [bytes(random.choices(b"ab", k=random.randint(1, 4))) for _ in range(5)]
+            input_bytes = bytes(random.choices(b"abc", k=random.randint(0, 30)))
+            occurrences = DictionaryMatcher(strings).find_all(input_bytes)
+            for string in strings:
+                expected = find_all_overlapping_substr(input_bytes, string)
+                self.assertEqual(expected, [(start, start + len(string)) for start in occurrences.get(string, [])])
+                self.assertEqual(find_all_nonoverlapping_substr(input_bytes, string),
+                                 non_overlapping_ranges(occurrences.get(string, []), len(string)))
+
+
+if __name__ == '__main__':
+    unittest.main()
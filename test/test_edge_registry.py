@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+
+from models.EdgeRegistry import EdgeRegistry
+
+
+class EdgeRegistryTest(unittest.TestCase):
+    def test_intern(self):
+        registry = EdgeRegistry()
+        self.assertEqual(0, registry.intern(("a.py", -1, 2)))
+        self.assertEqual(1, registry.intern(("a.py", 2, 3)))
+        self.assertEqual(0, registry.intern(("a.py", -1, 2)))
+        self.assertEqual(2, registry.intern(("b.py", -1, 2)))
+        self.assertEqual(3, len(registry))
+
+    def test_save_load(self):
+        registry = EdgeRegistry([("a.py", -1, 2), ("b.py", 2, 3)])
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_name = os.path.join(output_dir, "edge_ids.json")
+            registry.save(file_name)
+            loaded = EdgeRegistry.load(file_name)
+        self.assertEqual(registry.edges, loaded.edges)
+        self.assertEqual(1, loaded.intern(("b.py", 2, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
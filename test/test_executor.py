@@ -0,0 +1,130 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+import coverage
+
+from executor.ForkServerExecutor import ForkServerExecutor
+from executor.InProcessExecutor import InProcessExecutor
+from executor.PoolExecutor import PoolExecutor
+from tracer.CoverageTracer import CoverageTracer
+from tracer.SettraceTracer import SettraceTracer
+from util.coverage_bitmap import count_edges
+
+calls = []
+
+
+def run_target(input_data: bytes):
+    calls.append(input_data)
+    if input_data == b"exit":
+        sys.exit(1)
+    if input_data == b"error":
+        raise ValueError()
+    return len(calls)
+
+
+def make_target():
+    target = types.ModuleType("target")
+    target.test_one_input = run_target
+    return target
+
+
+class InProcessExecutorTest(unittest.TestCase):
+    def test_run(self):
+        executor = InProcessExecutor(make_target(), SettraceTracer(os.path.dirname(__file__)))
+        has_error, edges, _ = executor.run(b"hello")
+        self.assertFalse(has_error)
+        self.assertTrue(count_edges(edges) > 0)
+        has_error, error_edges, _ = executor.run(b"error")
+        self.assertTrue(has_error)
+        self.assertNotEqual(edges, error_edges)
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+class ForkServerExecutorTest(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+        self.tracer = SettraceTracer(os.path.dirname(__file__))
+        self.in_process = InProcessExecutor(make_target(), SettraceTracer(os.path.dirname(__file__)))
+
+    def test_same_coverage_as_in_process(self):
+        executor = ForkServerExecutor(make_target(), self.tracer)
+        for input_data in [b"hello", b"error"]:
+            has_error, edges, _ = executor.run(input_data)
+            expected_error, expected_edges, _ = self.in_process.run(input_data)
+            self.assertEqual(expected_error, has_error)
+            self.assertEqual(
+                {self.in_process.edge_registry.edges[i] for i in range(len(self.in_process.edge_registry))
+                 if expected_edges >> i & 1},
+                {self.tracer.edge_registry.edges[i] for i in range(len(self.tracer.edge_registry)) if edges >> i & 1},
+            )
+
+    def test_survives_exit(self):
+        executor = ForkServerExecutor(make_target(), self.tracer, batch_size=4)
+        results = executor.run_batch([b"a", b"exit", b"b", b"c"])
+        self.assertEqual([False, True, False, False], [has_error for has_error, _, _ in results])
+
+    def test_isolates_global_state(self):
+        executor = ForkServerExecutor(make_target(), self.tracer)
+        executor.run_batch([b"a", b"b", b"c"])
+        self.assertEqual([], calls)
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+class PoolExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.tracer = SettraceTracer(os.path.dirname(__file__))
+        self.executor = PoolExecutor(make_target(), self.tracer, 3)
+        self.in_process = InProcessExecutor(make_target(), SettraceTracer(os.path.dirname(__file__)))
+
+    def tearDown(self):
+        self.executor.close()
+
+    def test_results_in_order(self):
+        inputs = [b"a", b"exit", b"error", b"b", b"c", b"error", b"d"]
+        results = self.executor.run_batch(inputs)
+        self.assertEqual([False, True, True, False, False, True, False], [has_error for has_error, _, _ in results])
+        # edge IDs assigned by the workers are translated to the same IDs
+        self.assertEqual(results[2][1], results[5][1])
+        self.assertEqual(results[0][1], results[6][1])
+        self.assertNotEqual(results[0][1], results[2][1])
+        self.assertEqual([], self.executor.run_batch([]))
+        # single inputs run in a worker too, with the same edge IDs
+        self.assertEqual(results[2][1], self.executor.run(b"error")[1])
+
+    def test_single_input_survives_exit(self):
+        calls.clear()
+        self.assertTrue(self.executor.run(b"exit")[0])
+        self.assertEqual([True], [has_error for has_error, _, _ in self.executor.run_batch([b"exit"])])
+        self.assertFalse(self.executor.run(b"a")[0])
+        self.assertEqual([], calls)
+
+    def test_dead_worker(self):
+        process, _, _ = self.executor.workers[0]
+        process.terminate()
+        process.join()
+        with self.assertRaises(RuntimeError):
+            self.executor.run_batch([b"a", b"b", b"c"])
+
+    def test_coverage_tracer(self):
+        # the workers must not share the data file of the fuzzer's coverage object
+        data_file = os.path.join(tempfile.mkdtemp(), ".coverage")
+        executor = PoolExecutor(make_target(), CoverageTracer(coverage.Coverage(branch=True, data_file=data_file)), 3)
+        try:
+            inputs = [b"a", b"error", b"b", b"c", b"error", b"d"] * 4
+            results = executor.run_batch(inputs)
+            self.assertEqual([input_data == b"error" for input_data in inputs],
+                             [has_error for has_error, _, _ in results])
+            self.assertEqual(results[1][1], results[4][1])
+            self.assertEqual(results[0][1], results[5][1])
+            self.assertNotEqual(results[0][1], results[1][1])
+            self.assertTrue(count_edges(results[0][1]) > 0)
+            self.assertEqual(results[1][1], executor.run(b"error")[1])
+        finally:
+            executor.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import argparse
+import os
+import random
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import coverage
+
+from executor.InProcessExecutor import InProcessExecutor
+from fuzzer.CoverageGuidedFuzzer import CoverageGuidedFuzzer
+from fuzzer.GrimoireFuzzer import GrimoireFuzzer, MUTANT_BATCH_PER_WORKER
+from main import _read_seeds
+from models.Blank import Blank
+from models.Fuzzer import CHECKPOINT_FILE
+from models.SplittingRule import SplittingRule
+from tracer.SettraceTracer import SettraceTracer
+
+
+def run_target(input_data: bytes):
+    if b"(" in input_data:
+        x = 1
+    if b")" in input_data:
+        x = 2
+    if b"!" in input_data:
+        raise ValueError()
+
+
+def make_target():
+    target = types.ModuleType("target")
+    target.test_one_input = run_target
+    return target
+
+
+def make_fuzzer(trim: bool = True, initial_inputs=None, output_dir: str = None) -> CoverageGuidedFuzzer:
+    return CoverageGuidedFuzzer(make_target(), __file__, coverage.Coverage(), output_dir or tempfile.mkdtemp(),
+                                {b""} if initial_inputs is None else initial_inputs,
+                                SettraceTracer(os.path.dirname(__file__)), trim=trim)
+
+
+class TrimTest(unittest.TestCase):
+    def test_trim_keeps_coverage(self):
+        fuzzer = make_fuzzer()
+        input_data = b"aaaa(bbbbbbbb)cccc" * 4
+        _, input_coverage, exec_time = fuzzer.exec_with_coverage(input_data)
+        trimmed, _ = fuzzer.trim_input(input_data, input_coverage, exec_time)
+        self.assertEqual(input_coverage, fuzzer.exec_with_coverage(trimmed)[1])
+        self.assertIn(b"(", trimmed)
+        self.assertIn(b")", trimmed)
+        self.assertLessEqual(len(trimmed), 8)
+        self.assertEqual(len(input_data) - len(trimmed), fuzzer.trimmed_bytes)
+        self.assertGreater(fuzzer.trim_executions, 0)
+
+    def test_trim_keeps_passing(self):
+        fuzzer = make_fuzzer()
+        # removing the "!" would cover the same edges up to the error, but the input would no longer fail
+        input_data = b"((((!(((("
+        trimmed, _ = fuzzer.trim_input(input_data, fuzzer.exec_with_coverage(input_data)[1], 0.0)
+        self.assertIn(b"!", trimmed)
+
+    def test_saved_inputs_are_trimmed(self):
+        fuzzer = make_fuzzer()
+        input_data = b"(" + b"a" * 100
+        fuzzer.save_if_has_new_coverage(input_data, *fuzzer.exec_with_coverage(input_data))
+        self.assertEqual(b"(", fuzzer.saved_inputs[-1].data[:1])
+        self.assertLess(len(fuzzer.saved_inputs[-1].data), 8)
+        untrimmed = make_fuzzer(trim=False)
+        untrimmed.save_if_has_new_coverage(input_data, *untrimmed.exec_with_coverage(input_data))
+        self.assertEqual(input_data, untrimmed.saved_inputs[-1].data)
+
+
+class RecordingGrimoireFuzzer(GrimoireFuzzer):
+    """
+    Grimoire fuzzer recording the seeds in the order they come out of the triage, and the inputs it generalizes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.events = []
+        super().__init__(*args, **kwargs)
+
+    def triage_seeds(self, initial_inputs):
+        seeds = super().triage_seeds(initial_inputs)
+        self.events.append(("triage", [seed[0] for seed in seeds]))
+        return seeds
+
+    def generalize(self, input_data, *args, **kwargs):
+        self.events.append(("generalize", input_data))
+        return super().generalize(input_data, *args, **kwargs)
+
+
+def make_recording_grimoire(initial_inputs) -> RecordingGrimoireFuzzer:
+    return RecordingGrimoireFuzzer(make_target(), __file__, coverage.Coverage(), tempfile.mkdtemp(), initial_inputs,
+                                   True, SettraceTracer(os.path.dirname(__file__)))
+
+
+class StartupTest(unittest.TestCase):
+    def test_startup_phases(self):
+        fuzzer = make_recording_grimoire({b"xxxx()", b"xx)", b"()", b"(", b"!!!!!"})
+        # all the seeds are executed and ordered shortest first, then only the ones with new coverage are
+        # generalized, in that order: b"xxxx()" covers the same edges as b"()"
+        self.assertEqual([("triage", [b"(", b"()", b"xx)", b"!!!!!", b"xxxx()"]),
+                          ("generalize", b"("), ("generalize", b"()"), ("generalize", b"xx)")], fuzzer.events)
+        self.assertEqual([b"(", b"()", b"xx)"], [saved_input.data for saved_input in fuzzer.saved_inputs])
+        self.assertEqual([b"!!!!!"], [failing_input.data for failing_input in fuzzer.failing_inputs])
+
+        self.assertEqual(["execution", "ordering", "filtering", "generalization"], list(fuzzer.startup_times))
+        self.assertTrue(all(seconds >= 0 for seconds in fuzzer.startup_times.values()))
+        stats = fuzzer.run_stats()
+        for phase, seconds in fuzzer.startup_times.items():
+            self.assertEqual(seconds, stats[f"startup_{phase}_time"])
+
+    def test_cmin_before_triage(self):
+        input_dir = tempfile.mkdtemp()
+        for i, input_data in enumerate([b"xxxx()", b"xx)", b"()", b"(", b"((", b"!!!!!"]):
+            with open(os.path.join(input_dir, f"input_{i}"), "wb") as input_file:
+                input_file.write(input_data)
+        executor = InProcessExecutor(make_target(), SettraceTracer(os.path.dirname(__file__)))
+        seeds = _read_seeds(argparse.Namespace(input_dir=input_dir, cmin=True), executor)
+        # b"(" and b"xx)" cover the edges of all the passing seeds, b"!!!!!" the ones of the failing seed
+        self.assertEqual({b"(", b"xx)", b"!!!!!"}, seeds)
+        fuzzer = make_recording_grimoire(seeds)
+        self.assertEqual([("triage", [b"(", b"xx)", b"!!!!!"]), ("generalize", b"("), ("generalize", b"xx)")],
+                         fuzzer.events)
+
+
+class GeneralizationMemoTest(unittest.TestCase):
+    def generalize_twice(self):
+        """
+        Generalize b"()" with the same rule twice: no blank can be found, so both passes check the same candidates.
+        """
+        fuzzer = GrimoireFuzzer(make_target(), __file__, coverage.Coverage(), tempfile.mkdtemp(), {b""}, True,
+                                SettraceTracer(os.path.dirname(__file__)))
+        fuzzer.splitting_rules = [SplittingRule(Blank.DELETE, SplittingRule.OFFSET, 1) for _ in range(2)]
+        _, input_coverage, _ = fuzzer.exec_with_coverage(b"()")
+        executions = fuzzer.generalization_executions
+        with self.assertLogs(level="INFO") as logs:
+            self.assertEqual(b"()", fuzzer.generalize(b"()", input_coverage & fuzzer.virgin_bits).get_bytes())
+        return fuzzer, fuzzer.generalization_executions - executions, logs.output
+
+    def test_memo_skips_repeated_candidates(self):
+        fuzzer, executions, logs = self.generalize_twice()
+        self.assertEqual(2, executions)
+        self.assertEqual([2, 0], [rule.executions for rule in fuzzer.splitting_rules])
+        self.assertIn("Generalization: 4 candidate checks, 2 executions (memo hit rate 50.0%)", "\n".join(logs))
+
+    def test_memo_size(self):
+        # the candidates are checked one at a time, and each one evicts the other from the memo
+        with mock.patch("fuzzer.GrimoireFuzzer.GENERALIZATION_MEMO_SIZE", 1):
+            fuzzer, executions, logs = self.generalize_twice()
+        self.assertEqual(4, executions)
+        self.assertEqual([2, 2], [rule.executions for rule in fuzzer.splitting_rules])
+        self.assertIn("Generalization: 4 candidate checks, 4 executions (memo hit rate 0.0%)", "\n".join(logs))
+
+
+class MutantBatchTest(unittest.TestCase):
+    def make_grimoire(self):
+        return GrimoireFuzzer(make_target(), __file__, coverage.Coverage(), tempfile.mkdtemp(), {b"a"}, True,
+                              SettraceTracer(os.path.dirname(__file__)))
+
+    def test_executes_immediately_without_workers(self):
+        fuzzer = self.make_grimoire()
+        fuzzer.send_to_fuzzer(b"(")
+        self.assertEqual([], fuzzer.mutant_batch)
+        # the new input is saved and generalized before the next mutation
+        self.assertEqual(b"(", fuzzer.saved_inputs[-1].data)
+        self.assertIn(b"(", fuzzer.generalized_map)
+
+    def test_bounded_batch_with_workers(self):
+        fuzzer = self.make_grimoire()
+        fuzzer.executor.num_workers = 2
+        batch_size = 2 * MUTANT_BATCH_PER_WORKER
+        for i in range(batch_size - 1):
+            fuzzer.send_to_fuzzer(b"b" * (i + 1))
+        self.assertEqual(batch_size - 1, len(fuzzer.mutant_batch))
+        fuzzer.send_to_fuzzer(b"(")
+        self.assertEqual([], fuzzer.mutant_batch)
+        self.assertIn(b"(", [saved_input.data for saved_input in fuzzer.saved_inputs])
+
+
+class CheckpointTest(unittest.TestCase):
+    def test_resume_restores_state_without_executions(self):
+        fuzzer = make_fuzzer(initial_inputs={b"", b"(", b"()", b"!"})
+        fuzzer.scheduler.mark_mutated(fuzzer.saved_inputs[0])
+        random.seed(1)
+        fuzzer.save_checkpoint()
+        expected_random = random.random()
+
+        resumed = make_fuzzer(initial_inputs=set(), output_dir=fuzzer.output_dir)
+        executions = 0
+        run = resumed.executor.run
+
+        def counting_run(input_data):
+            nonlocal executions
+            executions += 1
+            return run(input_data)
+
+        resumed.executor.run = counting_run
+        resumed.load_checkpoint(os.path.join(fuzzer.output_dir, CHECKPOINT_FILE))
+        self.assertEqual(0, executions)
+        self.assertEqual(expected_random, random.random())
+        self.assertEqual([i.data for i in fuzzer.saved_inputs], [i.data for i in resumed.saved_inputs])
+        self.assertEqual([i.data for i in fuzzer.failing_inputs], [i.data for i in resumed.failing_inputs])
+        self.assertEqual(fuzzer.virgin_bits, resumed.virgin_bits)
+        self.assertEqual(fuzzer.edge_registry.edges, resumed.edge_registry.edges)
+        self.assertEqual(fuzzer.scheduler.min_times_mutated, resumed.scheduler.min_times_mutated)
+        # the scheduler shares the restored saved inputs
+        self.assertIs(resumed.saved_inputs[0], resumed.scheduler.saved_inputs[0])
+        self.assertEqual(1, resumed.saved_inputs[0].times_mutated)
+        self.assertEqual(fuzzer.exec_with_coverage(b"()")[1], resumed.exec_with_coverage(b"()")[1])
+
+    def test_resume_grimoire(self):
+        output_dir = tempfile.mkdtemp()
+
+        def make_grimoire(initial_inputs):
+            return GrimoireFuzzer(make_target(), __file__, coverage.Coverage(), output_dir, initial_inputs, True,
+                                  SettraceTracer(os.path.dirname(__file__)))
+
+        fuzzer = make_grimoire({b"aa(aa)aa"})
+        fuzzer.save_checkpoint()
+        resumed = make_grimoire(set())
+        resumed.load_checkpoint(os.path.join(output_dir, CHECKPOINT_FILE))
+        self.assertEqual(fuzzer.generalized_map.keys(), resumed.generalized_map.keys())
+        self.assertIs(resumed.saved_inputs[0].generalized, resumed.generalized[0])
+        self.assertEqual(fuzzer.generalized[0].get_bytes(), resumed.generalized[0].get_bytes())
+        with self.assertRaises(ValueError):
+            make_fuzzer(initial_inputs=set()).load_checkpoint(os.path.join(output_dir, CHECKPOINT_FILE))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_resume_pending_generalizations(self):
+        output_dir = tempfile.mkdtemp()
+        fuzzer = GrimoireFuzzer(make_target(), __file__, coverage.Coverage(), output_dir, {b"aa(aa"}, True,
+                                SettraceTracer(os.path.dirname(__file__)), generalization_workers=1)
+        # saved while being generalized in the background
+        fuzzer.generalize_and_save_if_has_new_coverage(b"bb)bb", *fuzzer.exec_with_coverage(b"bb)bb"))
+        input_data = fuzzer.saved_inputs[-1].data
+        self.assertIn(input_data, fuzzer.pending_generalizations)
+        fuzzer.save_checkpoint()
+        fuzzer.generalization_queue.close()
+
+        resumed = GrimoireFuzzer(make_target(), __file__, coverage.Coverage(), output_dir, set(), True,
+                                 SettraceTracer(os.path.dirname(__file__)))
+        resumed.load_checkpoint(os.path.join(output_dir, CHECKPOINT_FILE))
+        self.assertEqual(0, len(resumed.pending_generalizations))
+        # generalized against the coverage it was submitted with, so only the ")" is kept
+        self.assertEqual(b")", resumed.generalized_map[input_data].get_bytes())
+        self.assertIs(resumed.saved_inputs[-1].generalized, resumed.generalized_map[input_data])
+        # the startup times are the ones of the original run, and the resume is reported separately
+        self.assertEqual(fuzzer.startup_times["generalization"], resumed.startup_times["generalization"])
+        self.assertIn("resume", resumed.startup_times)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+import types
+import unittest
+
+import coverage
+
+from fuzzer.GrimoireFuzzer import GrimoireFuzzer, GENERALIZATIONS_PER_WORKER
+from models.SavedInput import SavedInput
+from tracer.SettraceTracer import SettraceTracer
+
+
+def run_target(input_data: bytes):
+    if b"x" in input_data:
+        return 1
+    if b"y" in input_data:
+        return 2
+    if b"z" in input_data:
+        return 3
+    return 0
+
+
+def make_fuzzer(generalization_workers: int, settrace: bool = True, initial_inputs=None) -> GrimoireFuzzer:
+    target = types.ModuleType("target")
+    target.test_one_input = run_target
+    output_dir = tempfile.mkdtemp()
+    # without a tracer, the fuzzer traces with coverage.py, recording to a data file
+    cov = coverage.Coverage(branch=True, data_file=os.path.join(output_dir, ".coverage"))
+    return GrimoireFuzzer(target, __file__, cov, output_dir, initial_inputs or {b"aaxaa"}, True,
+                          SettraceTracer(os.path.dirname(__file__)) if settrace else None,
+                          generalization_workers=generalization_workers, trim=False)
+
+
+def wait_for_generalizations(fuzzer: GrimoireFuzzer):
+    deadline = time.time() + 30
+    while len(fuzzer.pending_generalizations) != 0 and time.time() < deadline:
+        fuzzer.collect_generalizations()
+        time.sleep(0.01)
+    fuzzer.generalization_queue.close()
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+class GeneralizationQueueTest(unittest.TestCase):
+    def test_generalizes_in_background(self):
+        fuzzer = make_fuzzer(1)
+        self.assertEqual(1, len(fuzzer.saved_inputs))
+        wait_for_generalizations(fuzzer)
+
+        self.assertEqual(0, len(fuzzer.pending_generalizations))
+        generalized_input = fuzzer.generalized_map[b"aaxaa"]
+        self.assertIs(generalized_input, fuzzer.saved_inputs[0].generalized)
+        self.assertEqual([generalized_input], fuzzer.generalized)
+        # the worker checks candidates against the coverage of the fuzzer, so only the "x" is kept
+        self.assertEqual(b"x", generalized_input.get_bytes())
+        self.assertEqual(make_fuzzer(0).generalized_map[b"aaxaa"].get_bytes(), generalized_input.get_bytes())
+        # the executions of the worker are counted by the fuzzer and its splitting rules
+        self.assertGreater(fuzzer.generalization_executions, 0)
+        self.assertEqual(fuzzer.generalization_executions, sum(rule.executions for rule in fuzzer.splitting_rules))
+
+    def test_bounded_queue(self):
+        fuzzer = make_fuzzer(1)
+        queue = fuzzer.generalization_queue
+        queued = []
+        submit = queue.submit
+
+        def counting_submit(*args):
+            submit(*args)
+            queued.append(len(queue))
+
+        queue.submit = counting_submit
+        inputs = [b"y", b"z", b"xy", b"yz", b"xz"]
+        for input_data in inputs:
+            _, input_coverage, exec_time = fuzzer.exec_with_coverage(input_data)
+            fuzzer.submit_generalization(SavedInput(input_data, input_coverage, exec_time), input_coverage,
+                                         fuzzer.virgin_bits)
+        wait_for_generalizations(fuzzer)
+        self.assertEqual(len(inputs), len(queued))
+        self.assertTrue(all(length <= GENERALIZATIONS_PER_WORKER for length in queued))
+        self.assertEqual({b"aaxaa"} | set(inputs), set(fuzzer.generalized_map))
+
+    def test_coverage_tracer(self):
+        # the workers must not share the data file of the fuzzer's coverage object
+        fuzzer = make_fuzzer(2, settrace=False, initial_inputs={b"aaxaa", b"bbybb", b"cczcc"})
+        wait_for_generalizations(fuzzer)
+        self.assertEqual(0, len(fuzzer.pending_generalizations))
+        self.assertEqual({b"aaxaa": b"x", b"bbybb": b"y", b"cczcc": b"z"},
+                         {input_data: generalized_input.get_bytes()
+                          for input_data, generalized_input in fuzzer.generalized_map.items()})
+
+
+if __name__ == '__main__':
+    unittest.main()
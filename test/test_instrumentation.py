@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from util.instrumentation import COVERAGE_MAP_NAME, instrument_source, load_instrumented, cache_file_name
+
+SOURCE = '''
+def classify(x, flag):
+    """docstring"""
+    if x > 0:
+        result = "positive"
+    elif x < 0:
+        result = "negative"
+    else:
+        result = "zero"
+    while x > 10:
+        x -= 10
+    try:
+        int(result)
+    except ValueError:
+        pass
+    return result if flag and x else None
+'''
+
+
+class InstrumentationTest(unittest.TestCase):
+    def run_classify(self, x, flag):
+        branch_lines, code = instrument_source(SOURCE, "classify.py")
+        hit_map = bytearray(len(branch_lines))
+        namespace = {COVERAGE_MAP_NAME: hit_map}
+        exec(code, namespace)
+        result = namespace["classify"](x, flag)
+        return result, {i for i, hit in enumerate(hit_map) if hit}, namespace
+
+    def test_semantics_preserved(self):
+        self.assertEqual("positive", self.run_classify(3, True)[0])
+        self.assertEqual(None, self.run_classify(-3, False)[0])
+        self.assertEqual(None, self.run_classify(0, True)[0])
+        self.assertEqual("positive", self.run_classify(13, True)[0])
+
+    def test_docstring_kept(self):
+        namespace = self.run_classify(1, True)[2]
+        self.assertEqual("docstring", namespace["classify"].__doc__)
+
+    def test_docstring_only_function(self):
+        branch_lines, code = instrument_source('def stub():\n    """only a docstring"""\n', "stub.py")
+        hit_map = bytearray(len(branch_lines))
+        namespace = {COVERAGE_MAP_NAME: hit_map}
+        exec(code, namespace)
+        self.assertEqual("only a docstring", namespace["stub"].__doc__)
+        self.assertIsNone(namespace["stub"]())
+        self.assertEqual(1, sum(hit_map))
+
+    def test_different_branches(self):
+        _, positive, _ = self.run_classify(3, True)
+        _, negative, _ = self.run_classify(-3, True)
+        _, zero, _ = self.run_classify(0, True)
+        self.assertNotEqual(positive, negative)
+        self.assertNotEqual(positive, zero)
+        self.assertNotEqual(negative, zero)
+        # the loop body only runs for large inputs
+        _, large, _ = self.run_classify(13, True)
+        self.assertTrue(len(large.difference(positive)) > 0)
+        # short-circuited operand
+        _, no_flag, _ = self.run_classify(3, False)
+        self.assertTrue(len(positive.difference(no_flag)) > 0)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as source_dir:
+            source_path = os.path.join(source_dir, "classify.py")
+            source = SOURCE.encode()
+            branch_lines, _ = load_instrumented(source_path, source)
+            self.assertTrue(os.path.isfile(cache_file_name(source_path, source)))
+            cached_branch_lines, code = load_instrumented(source_path, source)
+            self.assertEqual(branch_lines, cached_branch_lines)
+            self.assertNotEqual(cache_file_name(source_path, source), cache_file_name(source_path, source + b"\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
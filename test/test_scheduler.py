@@ -0,0 +1,129 @@
+import random
+import unittest
+
+from models.SavedInput import SavedInput
+from models.Scheduler import Scheduler, MAX_ENERGY, RARE_EDGE_ENERGY
+
+
+class SchedulerTest(unittest.TestCase):
+    def test_statistics_match_corpus(self):
+        random.seed(3)
+        scheduler = Scheduler()
+        saved_inputs = []
+        for _ in range(200):
+            if len(saved_inputs) == 0 or random.random() < 0.3:
+                saved_input = SavedInput(b"a" * random.randint(0, 50), 1, random.random())
+                saved_inputs.append(saved_input)
+                scheduler.add(saved_input)
+            else:
+                scheduler.mark_mutated(random.choice(saved_inputs))
+            self.assertEqual(min(i.times_mutated for i in saved_inputs), scheduler.min_times_mutated)
+            self.assertAlmostEqual(sum(len(i.data) for i in saved_inputs) / len(saved_inputs), scheduler.mean_size())
+            self.assertAlmostEqual(sum(i.runtime for i in saved_inputs) / len(saved_inputs), scheduler.mean_runtime())
+
+    def test_fuzz_prob_and_num_mutants(self):
+        scheduler = Scheduler()
+        small = SavedInput(b"a", 1, 0.1)
+        large = SavedInput(b"a" * 10, 1, 0.3)
+        scheduler.add(small)
+        scheduler.add(large)
+        scheduler.mark_mutated(large)
+        self.assertEqual(1, scheduler.fuzz_prob(small))
+        self.assertEqual(0.5, scheduler.fuzz_prob(large))
+        # smaller and faster than average, not mutated yet
+        self.assertEqual(50 * 2 * 4, scheduler.num_mutants(small))
+        self.assertEqual(40, scheduler.num_mutants(large))
+
+    def test_default_schedule_ignores_energy(self):
+        scheduler = Scheduler()
+        saved_input = SavedInput(b"a", 0b1, 0.1)
+        scheduler.add(saved_input)
+        scheduler.record(0b1, saved_input)
+        scheduler.update()
+        self.assertEqual(1, scheduler.energy(saved_input))
+        self.assertEqual(100, scheduler.scale(100, saved_input))
+
+    def test_explore_schedule_favors_rare_paths(self):
+        scheduler = Scheduler("EXPLORE")
+        frequent = SavedInput(b"a", 0b01, 0.1)
+        rare = SavedInput(b"b", 0b10, 0.1)
+        scheduler.add(frequent)
+        scheduler.add(rare)
+        for _ in range(30):
+            scheduler.record(0b01, frequent)
+        scheduler.record(0b10, frequent)
+        scheduler.update()
+        # mean path frequency is (30 + 1) / 2
+        self.assertAlmostEqual(15.5 / 30, scheduler.energy(frequent))
+        self.assertEqual(MAX_ENERGY, scheduler.energy(rare))
+        self.assertGreater(scheduler.scale(10, rare), scheduler.scale(10, frequent))
+
+    def test_rare_edge_schedule(self):
+        scheduler = Scheduler("RARE_EDGE")
+        common = SavedInput(b"a", 0b011, 0.1)
+        rare = SavedInput(b"b", 0b101, 0.1)
+        scheduler.add(common)
+        scheduler.add(rare)
+        for _ in range(10):
+            scheduler.record(0b011, common)
+        scheduler.record(0b101, rare)
+        scheduler.update()
+        self.assertEqual(RARE_EDGE_ENERGY, scheduler.energy(rare))
+        self.assertEqual(1, scheduler.energy(common))
+
+    def test_entropic_schedule(self):
+        scheduler = Scheduler("ENTROPIC")
+        diverse = SavedInput(b"a", 0b1, 0.1)
+        monotonous = SavedInput(b"b", 0b1, 0.1)
+        unexplored = SavedInput(b"c", 0b1, 0.1)
+        for saved_input in [diverse, monotonous, unexplored]:
+            scheduler.add(saved_input)
+        for path in [0b1, 0b10, 0b100, 0b1000]:
+            scheduler.record(path, diverse)
+        for _ in range(4):
+            scheduler.record(0b1, monotonous)
+        scheduler.update()
+        self.assertGreater(scheduler.energy(diverse), scheduler.energy(monotonous))
+        self.assertEqual(MAX_ENERGY, scheduler.energy(unexplored))
+
+    def test_favored_inputs_cover_all_edges(self):
+        scheduler = Scheduler()
+        large = SavedInput(b"a" * 10, 0b0111, 0.1)
+        small = SavedInput(b"b", 0b0011, 0.1)
+        slow = SavedInput(b"c", 0b0100, 10.0)
+        other = SavedInput(b"d", 0b1000, 0.1)
+        for saved_input in [large, small, slow, other]:
+            scheduler.add(saved_input)
+        self.assertIs(small, scheduler.top_rated[0])
+        self.assertIs(large, scheduler.top_rated[2])
+        scheduler.update()
+        self.assertEqual({small, large, other}, scheduler.favored)
+        self.assertEqual(3, scheduler.pending_favored)
+        scheduler.mark_mutated(small)
+        scheduler.mark_mutated(small)
+        self.assertEqual(2, scheduler.pending_favored)
+        # a faster input for edge 2 replaces the large one
+        fast = SavedInput(b"e", 0b0100, 0.01)
+        scheduler.add(fast)
+        scheduler.update()
+        self.assertEqual({small, fast, other}, scheduler.favored)
+        self.assertEqual(2, scheduler.pending_favored)
+
+    def test_should_fuzz_skips_non_favored_inputs(self):
+        random.seed(0)
+        scheduler = Scheduler()
+        favored = SavedInput(b"a", 0b11, 0.1)
+        redundant = SavedInput(b"bb", 0b01, 0.1)
+        scheduler.add(favored)
+        scheduler.add(redundant)
+        scheduler.update()
+        self.assertEqual({favored}, scheduler.favored)
+        self.assertTrue(all(scheduler.should_fuzz(favored) for _ in range(100)))
+        # skipped 99% of the time while the favored input was never mutated
+        self.assertLess(sum(scheduler.should_fuzz(redundant) for _ in range(1000)), 30)
+        scheduler.mark_mutated(favored)
+        self.assertGreater(sum(scheduler.should_fuzz(redundant) for _ in range(1000)), 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
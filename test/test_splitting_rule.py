@@ -0,0 +1,51 @@
+import unittest
+
+from models.Blank import Blank
+from models.BlankedInput import BlankedInput
+from models.SplittingRule import SplittingRule, default_splitting_rules, RULE_TRIAL_EXECUTIONS
+from util.splitting_rules import batch_oracle
+
+
+class SplittingRuleTest(unittest.TestCase):
+    def test_default_splitting_rules(self):
+        rules = default_splitting_rules()
+        self.assertEqual(36, len(rules))
+        self.assertEqual("DELETE OFFSET 256", rules[0].name)
+        self.assertEqual("REPLACE CLOSURE '\"' '\"'", rules[-1].name)
+
+    def test_matches(self):
+        input_data = BlankedInput.from_exploded_input(["h", "(", "e", Blank.get_blank(), ")", "l", "("])
+        self.assertTrue(SplittingRule(Blank.DELETE, SplittingRule.OFFSET, 1).matches(input_data))
+        self.assertFalse(SplittingRule(Blank.DELETE, SplittingRule.OFFSET, 1).matches(
+            BlankedInput.from_exploded_input([Blank.get_blank(removed=b"x")])))
+        self.assertTrue(SplittingRule(Blank.DELETE, SplittingRule.CHAR, "l").matches(input_data))
+        self.assertFalse(SplittingRule(Blank.DELETE, SplittingRule.CHAR, ",").matches(input_data))
+        self.assertTrue(SplittingRule(Blank.DELETE, SplittingRule.CLOSURE, "(", ")").matches(input_data))
+        # the closing character must come after the opening one
+        self.assertFalse(SplittingRule(Blank.DELETE, SplittingRule.CLOSURE, ")", "h").matches(input_data))
+
+    def test_apply(self):
+        def candidate_check(input_bytes: bytes) -> bool:
+            return input_bytes in [b"hello,my,", b"my,world"]
+
+        rule = SplittingRule(Blank.DELETE, SplittingRule.CHAR, ",")
+        result = rule.apply(BlankedInput(b"hello,my,world"), batch_oracle(candidate_check), True)
+        self.assertEqual([Blank.get_blank(removed=b"hello,"), "m", "y", ",", "w", "o", "r", "l", "d"],
+                         result.to_exploded_input())
+
+    def test_update(self):
+        rule = SplittingRule(Blank.REPLACE, SplittingRule.OFFSET, 1)
+        rule.add_counters((1, 0, RULE_TRIAL_EXECUTIONS - 1, 0))
+        self.assertFalse(rule.update())
+        rule.add_counters((1, 0, 1, 0))
+        self.assertTrue(rule.update())
+        self.assertTrue(rule.dropped)
+        self.assertFalse(rule.update())
+
+        rule = SplittingRule(Blank.DELETE, SplittingRule.OFFSET, 1)
+        rule.add_counters((1, 0, RULE_TRIAL_EXECUTIONS, RULE_TRIAL_EXECUTIONS))
+        self.assertFalse(rule.update())
+
+
+if __name__ == '__main__':
+    unittest.main()
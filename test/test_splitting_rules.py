@@ -1,8 +1,34 @@
+import os
+import random
+import tempfile
 import unittest
+from unittest import mock
 
+import coverage
+
+from fuzzer.GrimoireFuzzer import GrimoireFuzzer
+from models.GeneralizedInput import GeneralizedInput
+from perf.perf_util import load_benchmark
+from tracer.SettraceTracer import SettraceTracer
 from util.splitting_rules import *
 
 
+def exhaustive_check_blanks(blanked_input: BlankedInput, ranges, batch_check, samples):
+    """
+    Check every replace class of each range with its REPLACE_SAMPLES `samples`, as before the lattice walk.
+    """
+    result = []
+    for start, end in ranges:
+        valid_replace_classes = set()
+        for replace_class in ReplaceClass:
+            candidates = [blanked_input.candidate(start, end, str_to_bytes(replacement))
+                          for replacement in samples[replace_class]]
+            if all(batch_check(candidates)):
+                valid_replace_classes.add(replace_class)
+        result.append(valid_replace_classes)
+    return result
+
+
 class SplittingRulesTest(unittest.TestCase):
     def setUp(self):
         pass
@@ -10,18 +36,22 @@ class SplittingRulesTest(unittest.TestCase):
     def test_find_next_char(self):
         #             0    1    2    3                  4    5    6    7    8    9    10   11                   12              13   14   15   16
         input_data = ["h", "e", "l", Blank.get_blank(), "l", "o", "(", "w", "o", "r", ")", Blank.get_blank(), Blank.get_blank(), "l", "d", ")", "!"]
-        expected = 11
+        # positions are byte offsets: "hello(wor)ld)!"
+        input_data = BlankedInput.from_exploded_input(input_data)
+        expected = 10
         actual = find_next_char(input_data, 0, ")")
         self.assertEqual(expected, actual)
 
-        expected = 16
-        actual = find_next_char(input_data, 11, ")")
+        expected = 13
+        actual = find_next_char(input_data, 10, ")")
         self.assertEqual(expected, actual)
 
     def test_find_closures(self):
         #             0    1    2    3                  4    5    6    7    8    9    10   11                   12              13   14   15   16
         input_data = ["h", "e", "l", Blank.get_blank(), "l", "o", "(", "w", "o", "r", ")", Blank.get_blank(), Blank.get_blank(), "l", "d", ")", "!"]
-        expected = (6, [16, 11])  # ends are exclusive (one index after the closing char)
+        # positions are byte offsets: "hello(wor)ld)!"
+        input_data = BlankedInput.from_exploded_input(input_data)
+        expected = (5, [13, 10])  # ends are exclusive (one index after the closing char)
         actual = find_closures(input_data, 0, "(", ")")
         # find_gaps_in_closures(input_data, old_node, default_info, find_closures, "(", ")")
         self.assertEqual(expected, actual)
@@ -35,12 +65,12 @@ class SplittingRulesTest(unittest.TestCase):
         input_data = ["h", "e", "l", Blank.get_blank(), "l", "o", ",", "m", "y", ",", "w", "o", "r", Blank.get_blank(), Blank.get_blank(), "l", "d"]
         cumulative = True
         expected = [Blank.get_blank(removed=b"hello,"), "m", "y", ",", "w", "o", "r", Blank.get_blank(), "l", "d"]
-        result = find_gaps(input_data.copy(), Blank.DELETE, candidate_check, find_next_char, ",", cumulative)
+        result = find_gaps(BlankedInput.from_exploded_input(input_data), Blank.DELETE, batch_oracle(candidate_check), find_next_char, ",", cumulative).to_exploded_input()
         self.assertEqual(expected, result)
 
         cumulative = False
         expected = [Blank.get_blank(removed=b"hello,"), "m", "y", ",", Blank.get_blank(removed=b"world")]
-        result = find_gaps(input_data.copy(), Blank.DELETE, candidate_check, find_next_char, ",", cumulative)
+        result = find_gaps(BlankedInput.from_exploded_input(input_data), Blank.DELETE, batch_oracle(candidate_check), find_next_char, ",", cumulative).to_exploded_input()
         self.assertEqual(expected, result)
 
     def test_find_gaps_in_closures(self):
@@ -53,11 +83,11 @@ class SplittingRulesTest(unittest.TestCase):
 
         cumulative = True
         expected = ["h", "e", "l", Blank.get_blank(), "l", "o", Blank.get_blank(removed=b"(wor)ld)"), "!"]
-        result = find_gaps_in_closures(input_data.copy(), Blank.DELETE, candidate_check, find_closures, "(", ")", cumulative)
+        result = find_gaps_in_closures(BlankedInput.from_exploded_input(input_data), Blank.DELETE, batch_oracle(candidate_check), find_closures, "(", ")", cumulative).to_exploded_input()
         self.assertEqual(expected, result)
 
         cumulative = False
-        result = find_gaps_in_closures(input_data.copy(), Blank.DELETE, candidate_check, find_closures, "(", ")", cumulative)
+        result = find_gaps_in_closures(BlankedInput.from_exploded_input(input_data), Blank.DELETE, batch_oracle(candidate_check), find_closures, "(", ")", cumulative).to_exploded_input()
         self.assertEqual(expected, result)
 
 
@@ -70,14 +100,105 @@ class SplittingRulesTest(unittest.TestCase):
 
         cumulative = True
         expected = [Blank.get_blank(removed=b"(hello)"), "(", "w", "o", "r", ")", "l", "d", ")", "!"]
-        result = find_gaps_in_closures(input_data.copy(), Blank.DELETE, candidate_check, find_closures, "(", ")", cumulative)
+        result = find_gaps_in_closures(BlankedInput.from_exploded_input(input_data), Blank.DELETE, batch_oracle(candidate_check), find_closures, "(", ")", cumulative).to_exploded_input()
         print(f"{GeneralizedInput(expected).pretty_print()} {GeneralizedInput(result).pretty_print()}")
         self.assertEqual(expected, result)
 
         cumulative = False
         expected = [Blank.get_blank(removed=b"(hello)(wor)ld)"), "!"]
-        result = find_gaps_in_closures(input_data.copy(), Blank.DELETE, candidate_check, find_closures, "(", ")", cumulative)
+        result = find_gaps_in_closures(BlankedInput.from_exploded_input(input_data), Blank.DELETE, batch_oracle(candidate_check), find_closures, "(", ")", cumulative).to_exploded_input()
         self.assertEqual(expected, result)
 
+    def test_find_gaps_ddmin(self):
+        checked = []
+
+        def candidate_check(input_bytes: bytes) -> bool:
+            checked.append(input_bytes)
+            return b"c" in input_bytes and b"f" in input_bytes
+
+        input_data = ["a", "b", "c", "d", "e", "f", "g", "h"]
+        expected = [Blank.get_blank(removed=b"ab"), "c", Blank.get_blank(removed=b"de"), "f", Blank.get_blank(removed=b"gh")]
+        for cumulative in [True, False]:
+            checked.clear()
+            result = find_gaps_ddmin(BlankedInput.from_exploded_input(input_data), Blank.DELETE, batch_oracle(candidate_check), cumulative).to_exploded_input()
+            self.assertEqual(expected, result)
+            # whole input, 2 halves, 4 quarters, then only the single tokens of the 2 failing quarters
+            self.assertEqual(1 + 2 + 4 + 4, len(checked))
+
+    def test_check_blanks_delete(self):
+        blanked_input = BlankedInput(b"hello world")
+        result = check_blanks(blanked_input, [(0, 6), (6, 11)], Blank.DELETE, batch_oracle(lambda c: c == b"world"))
+        self.assertEqual([{None}, set()], result)
+
+    def test_check_blanks_replace(self):
+        random.seed(5)
+        blanked_input = BlankedInput(b"a\x001")
+        batches = []
+
+        def candidates_check(candidates):
+            batches.append(candidates)
+            return [candidate.split(b"\x00")[1].isalnum() for candidate in candidates]
+
+        result = check_blanks(blanked_input, [(0, 1), (2, 3)], Blank.REPLACE, candidates_check)
+        expected = {ReplaceClass.ALPHANUMERIC, ReplaceClass.HEXDIGIT, ReplaceClass.DIGIT, ReplaceClass.LETTER}
+        # the first range does not change the checked part of the input, so all the classes are valid
+        self.assertEqual([set(ReplaceClass), expected], result)
+        # the subclasses of a valid class are never checked
+        checked = {candidate for batch in batches for candidate in batch}
+        self.assertFalse(any(candidate.split(b"\x00")[1].isdigit() for candidate in checked if candidate.startswith(b"a\x00")))
+        self.assertTrue(len(checked) <= 5 * REPLACE_SAMPLES)
+
+    def test_check_blanks_replace_sampling(self):
+        random.seed(5)
+        blanked_input = BlankedInput(b"1")
+        checked = []
+        result = check_blanks(blanked_input, [(0, 1)], Blank.REPLACE,
+                              batch_oracle(lambda candidate: checked.append(candidate) or True))
+        self.assertEqual([set(ReplaceClass)], result)
+        # only PRINTABLE is sampled
+        self.assertEqual(REPLACE_SAMPLES, len(checked))
+        self.assertEqual(len(checked), len(set(checked)))
+
+    def test_check_blanks_replace_same_as_exhaustive(self):
+        # both checks use the same samples of each class, so that they only differ by the classes the lattice walk
+        # does not check
+        random.seed(0)
+        samples = {}
+        for replace_class in ReplaceClass:
+            seen_replacements = set()
+            samples[replace_class] = [sample_replacement(replace_class, seen_replacements)
+                                      for _ in range(REPLACE_SAMPLES)]
+        num_ranges = 0
+        mismatches = []
+
+        def fixed_sample(replace_class, seen_replacements):
+            replacement = samples[replace_class][len(seen_replacements)]
+            seen_replacements.add(replacement)
+            return replacement
+
+        def compare_check_blanks(blanked_input, ranges, blank_type, batch_check):
+            nonlocal num_ranges
+            result = check_blanks(blanked_input, ranges, blank_type, batch_check)
+            if blank_type == Blank.REPLACE:
+                expected = exhaustive_check_blanks(blanked_input, ranges, batch_check, samples)
+                num_ranges += len(ranges)
+                mismatches.extend((blanked_input.candidate(start, end), expected_classes, result_classes)
+                                  for (start, end), expected_classes, result_classes in zip(ranges, expected, result)
+                                  if expected_classes != result_classes)
+            return result
+
+        with mock.patch("util.splitting_rules.sample_replacement", side_effect=fixed_sample), \
+                mock.patch("util.splitting_rules.check_blanks", side_effect=compare_check_blanks):
+            for benchmark in ["calculator", "mathexpr", "urlparse", "microjson"]:
+                loaded = load_benchmark(benchmark)
+                if loaded is None:
+                    continue
+                module_under_test, test_file_name, seeds = loaded
+                GrimoireFuzzer(module_under_test, test_file_name, coverage.Coverage(), tempfile.mkdtemp(),
+                               set(seeds[:3]), True, SettraceTracer(os.path.dirname(test_file_name)), trim=False)
+        self.assertGreater(num_ranges, 0)
+        self.assertEqual([], mismatches)
+
+
 if __name__ == '__main__':
     unittest.main()
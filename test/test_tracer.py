@@ -0,0 +1,64 @@
+import json
+import os
+import unittest
+
+from tracer.SettraceTracer import SettraceTracer
+
+
+def branchy(x):
+    if x > 0:
+        y = 1
+    else:
+        y = 2
+    return json.dumps(y)
+
+
+class SettraceTracerTest(unittest.TestCase):
+    def setUp(self):
+        self.tracer = SettraceTracer(os.path.dirname(__file__))
+        self.first_line = branchy.__code__.co_firstlineno
+
+    def trace(self, x):
+        self.tracer.reset()
+        self.tracer.start()
+        branchy(x)
+        self.tracer.stop()
+        return {self.tracer.edge_registry.edges[edge_id] for edge_id in self.tracer.get_edges()}
+
+    def test_records_arcs(self):
+        line = self.first_line
+        file = os.path.abspath(__file__)
+        expected = {
+            (file, -line, line + 1),
+            (file, line + 1, line + 2),
+            (file, line + 2, line + 5),
+            (file, line + 5, -line),
+        }
+        self.assertEqual(expected, self.trace(1))
+
+    def test_stable_edge_ids(self):
+        self.trace(1)
+        self.tracer.reset()
+        self.tracer.start()
+        branchy(1)
+        self.tracer.stop()
+        self.assertEqual({0, 1, 2, 3}, self.tracer.get_edges())
+        self.trace(-1)
+        self.assertEqual(6, len(self.tracer.edge_registry))
+
+    def test_different_branches(self):
+        self.assertNotEqual(self.trace(1), self.trace(-1))
+
+    def test_reset(self):
+        self.trace(1)
+        edges = self.trace(1)
+        self.assertEqual(edges, self.trace(1))
+
+    def test_only_traces_source_dir(self):
+        # json.dumps is defined outside of the source dir, so only this file is traced
+        edges = self.trace(-1)
+        self.assertEqual({os.path.abspath(__file__)}, {file for file, _, _ in edges})
+
+
+if __name__ == '__main__':
+    unittest.main()
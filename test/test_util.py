@@ -4,7 +4,7 @@ from typing import List
 
 from models.Blank import Blank
 from models.GeneralizedInput import GeneralizedInput
-from util.grimoire_util import random_slice, random_generalized
+from util.grimoire_util import random_slice, random_generalized, replace_random_gaps
 from util.util import find_all_overlapping_substr, find_all_nonoverlapping_substr, replace_all_instances, \
     replace_random_instance, find_random_substring
 
@@ -109,6 +109,23 @@ class UtilTest(unittest.TestCase):
         actual = replace_all_instances(input_bytes, pattern, replace_bytes)
         self.assertEqual(expected, actual)
 
+    def test_replace_random_gaps(self):
+        random.seed(5)
+        part = GeneralizedInput([b"(", Blank.get_blank(), b")"])
+        # the input is padded with two gaps, and each replacement replaces a gap by two gaps
+        actual = replace_random_gaps(self.input2, 3, lambda: part)
+        self.assertEqual(3, actual.count(b"("))
+        self.assertEqual(3, actual.count(b")"))
+        self.assertEqual(b"helloworld", actual.replace(b"(", b"").replace(b")", b""))
+
+        # no gap left after the padding gaps are replaced by bytes
+        self.assertEqual(b"xhelloworldx", replace_random_gaps(self.input1, 10, lambda: b"x"))
+
+        # replacements stop once the input reaches the maximum size
+        actual = replace_random_gaps(self.input2, 100, lambda: part, max_size=20)
+        # "helloworld" and 5 times "()"
+        self.assertEqual(5, actual.count(b"("))
+
 
 if __name__ == '__main__':
     unittest.main()
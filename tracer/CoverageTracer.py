@@ -0,0 +1,38 @@
+from typing import Set
+
+import coverage
+
+from models.EdgeRegistry import EdgeRegistry
+from models.Tracer import Tracer
+
+
+class CoverageTracer(Tracer):
+    """
+    A tracer backed by coverage.py.
+    """
+
+    def __init__(self, cov: coverage.Coverage, edge_registry: EdgeRegistry = None):
+        super().__init__(edge_registry)
+        # coverage.Coverage object to keep track of coverage.
+        self.cov = cov
+
+    def reset(self):
+        self.cov.erase()
+
+    def start(self):
+        self.cov.start()
+
+    def stop(self):
+        self.cov.stop()
+
+    def after_fork(self):
+        # the data file of `self.cov` is shared with the fuzzer's process: record the coverage in memory instead
+        self.cov = coverage.Coverage(branch=self.cov.config.branch, data_file=None)
+
+    def get_edges(self) -> Set[int]:
+        coverage_data = self.cov.get_data()
+        intern = self.edge_registry.intern
+        edges_covered = set()
+        for file in coverage_data.measured_files():
+            edges_covered.update([intern((file,) + t) for t in coverage_data.arcs(file)])
+        return edges_covered
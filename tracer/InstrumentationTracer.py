@@ -0,0 +1,53 @@
+from typing import Dict, List, Set
+
+from models.EdgeRegistry import EdgeRegistry
+from models.Tracer import Tracer
+from util.instrumentation import InstrumentedModule, instrumented_modules
+
+
+class InstrumentationTracer(Tracer):
+    """
+    A tracer that reads the branch hit maps of modules instrumented at import time
+    (see `util.instrumentation.install_import_hook`), instead of tracing at runtime.
+
+    Each branch is registered as a (file name, branch line, branch index) edge.
+    """
+
+    def __init__(self, modules: List[InstrumentedModule] = None, edge_registry: EdgeRegistry = None):
+        super().__init__(edge_registry)
+        # Instrumented modules, shared with the import hook so that modules imported later are also read
+        self.modules = modules if modules is not None else instrumented_modules
+        # Edge ID of each branch of each module, registered when the module is first read
+        self.branch_edge_ids: Dict[str, List[int]] = {}
+
+    def reset(self):
+        for module in self.modules:
+            module.hit_map[:] = bytes(len(module.hit_map))
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _edge_ids(self, module: InstrumentedModule) -> List[int]:
+        edge_ids = self.branch_edge_ids.get(module.filename)
+        if edge_ids is None:
+            edge_ids = self.branch_edge_ids[module.filename] = [
+                self.edge_registry.intern((module.filename, line, branch))
+                for branch, line in enumerate(module.branch_lines)
+            ]
+        return edge_ids
+
+    def get_edges(self) -> Set[int]:
+        edges_covered = set()
+        for module in self.modules:
+            hit_map = module.hit_map
+            branch = hit_map.find(1)
+            if branch == -1:
+                continue
+            edge_ids = self._edge_ids(module)
+            while branch != -1:
+                edges_covered.add(edge_ids[branch])
+                branch = hit_map.find(1, branch + 1)
+        return edges_covered
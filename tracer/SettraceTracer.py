@@ -0,0 +1,72 @@
+import os
+import sys
+from types import CodeType
+from typing import Dict, Set, Tuple, Union
+
+from models.EdgeRegistry import EdgeRegistry
+from models.Tracer import Tracer
+
+
+class SettraceTracer(Tracer):
+    """
+    A lightweight tracer built on `sys.settrace`. Only code objects defined in files
+    under `source_dir` get a line tracer; every other frame runs untraced.
+
+    Arcs are recorded the same way coverage.py records them: entering a code object is an arc
+    from -(first line), and returning from it is an arc to -(first line).
+    """
+
+    def __init__(self, source_dir: str, edge_registry: EdgeRegistry = None):
+        super().__init__(edge_registry)
+        # Directory containing the files of the module under test
+        self.source_dir = os.path.join(os.path.abspath(source_dir), "")
+        # File name of each code object seen so far, or None if the code object is not traced
+        self.code_files: Dict[CodeType, Union[str, None]] = {}
+        # Arcs recorded since the last reset
+        self.arcs: Set[Tuple[str, int, int]] = set()
+        # Trace function that was installed before `start`
+        self.previous_trace = None
+
+    def reset(self):
+        self.arcs = set()
+
+    def start(self):
+        self.previous_trace = sys.gettrace()
+        sys.settrace(self._trace_call)
+
+    def stop(self):
+        sys.settrace(self.previous_trace)
+        self.previous_trace = None
+
+    def get_edges(self) -> Set[int]:
+        intern = self.edge_registry.intern
+        return {intern(arc) for arc in self.arcs}
+
+    def _traced_file(self, code: CodeType) -> Union[str, None]:
+        filename = os.path.abspath(code.co_filename)
+        return filename if filename.startswith(self.source_dir) else None
+
+    def _trace_call(self, frame, event, arg):
+        code = frame.f_code
+        try:
+            filename = self.code_files[code]
+        except KeyError:
+            filename = self.code_files[code] = self._traced_file(code)
+        if filename is None:
+            return None
+
+        add_arc = self.arcs.add
+        entry = -code.co_firstlineno
+        prev_line = entry
+
+        def trace_line(frame, event, arg):
+            nonlocal prev_line
+            if event == "line":
+                line = frame.f_lineno
+                add_arc((filename, prev_line, line))
+                prev_line = line
+            elif event == "return":
+                add_arc((filename, prev_line, entry))
+            return trace_line
+
+        return trace_line
@@ -0,0 +1,55 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Probabilistic set of byte strings, used to remember the inputs already executed.
+
+    The filter takes `memory_bytes` bytes of bits, and holds as many strings as it can with a false positive
+    rate of at most `false_positive_rate`; once it holds that many, it is cleared, so that it keeps to both its
+    memory budget and its false positive rate over a long campaign. A string that was added is reported as
+    present until the filter is cleared, and a string that was not added is reported as present with a
+    probability of at most `false_positive_rate`.
+    """
+
+    def __init__(self, memory_bytes: int, false_positive_rate: float):
+        if memory_bytes <= 0 or not 0 < false_positive_rate < 1:
+            raise ValueError("A Bloom filter needs a positive memory budget and a false positive rate in (0, 1)")
+        self.num_bits = memory_bytes * 8
+        self.bits = bytearray(memory_bytes)
+        # Optimal number of hash functions and capacity for this number of bits and false positive rate
+        self.num_hashes = max(round(-math.log2(false_positive_rate)), 1)
+        self.capacity = max(int(self.num_bits * math.log(2) ** 2 / -math.log(false_positive_rate)), 1)
+        self.num_items = 0
+        # Number of times the filter was full and cleared
+        self.num_clears = 0
+
+    def _positions(self, data: bytes):
+        # double hashing: the positions of the k hash functions are h1 + i * h2
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, data: bytes) -> bool:
+        return all(self.bits[position >> 3] >> (position & 7) & 1 for position in self._positions(data))
+
+    def add(self, data: bytes):
+        self.check_and_add(data)
+
+    def check_and_add(self, data: bytes) -> bool:
+        """
+        Add `data` to the filter, and return whether it was (probably) in the filter already.
+        """
+        positions = self._positions(data)
+        if all(self.bits[position >> 3] >> (position & 7) & 1 for position in positions):
+            return True
+        if self.num_items >= self.capacity:
+            self.bits = bytearray(len(self.bits))
+            self.num_items = 0
+            self.num_clears += 1
+        for position in positions:
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.num_items += 1
+        return False
@@ -0,0 +1,53 @@
+from typing import Dict, Iterable, List, Tuple
+
+from models.Executor import Executor
+from util.coverage_bitmap import to_edge_ids
+
+# Number of inputs sent to the executor at once, so that a worker crashing loses the results of few inputs
+CMIN_BATCH_SIZE = 64
+
+
+def cover_edges(coverages: List[int]) -> List[int]:
+    """
+    Return the indices of a small subset of `coverages` covering all the edges they cover: going from the
+    rarest edge to the most common one, take the first bitmap covering each edge not covered yet, as afl-cmin.
+    `coverages` should be sorted with the preferred (eg. smallest) inputs first.
+    """
+    candidates: Dict[int, List[int]] = {}
+    for index, input_coverage in enumerate(coverages):
+        for edge_id in to_edge_ids(input_coverage):
+            candidates.setdefault(edge_id, []).append(index)
+    chosen = []
+    covered = 0
+    for edge_id in sorted(candidates, key=lambda edge_id: (len(candidates[edge_id]), edge_id)):
+        if covered >> edge_id & 1 == 0:
+            index = candidates[edge_id][0]
+            chosen.append(index)
+            covered |= coverages[index]
+    return sorted(chosen)
+
+
+def minimize_corpus(inputs: Iterable[bytes], executor: Executor,
+                    batch_size: int = CMIN_BATCH_SIZE) -> Tuple[List[bytes], Dict[str, int]]:
+    """
+    Run `inputs` through `executor`, and return a small subset of them covering the same edges, along with
+    statistics of the minimization. The edges of the failing inputs are covered separately, by failing inputs,
+    so that the minimized corpus keeps the crashes the fuzzer would save from the whole one. Inputs covering
+    no edges are dropped.
+    """
+    # smallest inputs first, so that the smallest input covering each edge is kept
+    inputs = sorted(set(inputs), key=lambda input_data: (len(input_data), input_data))
+    results = []
+    for i in range(0, len(inputs), batch_size):
+        results.extend(executor.run_batch(inputs[i:i + batch_size]))
+    kept = []
+    for has_error in [False, True]:
+        indices = [i for i, result in enumerate(results) if result[0] == has_error]
+        chosen = cover_edges([results[i][1] for i in indices])
+        kept.extend(inputs[indices[i]] for i in chosen)
+    stats = {
+        "inputs": len(inputs),
+        "failing_inputs": len([result for result in results if result[0]]),
+        "kept_inputs": len(kept),
+    }
+    return kept, stats
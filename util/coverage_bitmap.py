@@ -0,0 +1,40 @@
+from typing import Iterable, List
+
+# Bitmap with every bit set, ie. no edge covered yet
+VIRGIN_MAP = -1
+
+'''
+Coverage bitmaps are python ints used as bit arrays: bit i is set if the edge with ID i (see models.EdgeRegistry)
+was covered. Bitwise operations on ints run over the whole map at once, so novelty checks against a
+virgin map (the set of edges not covered yet) are a single AND, and bitmaps are far smaller than sets of edges.
+
+Since edge IDs are dense, a bitmap takes one bit per edge known to the registry. Virgin maps are negative ints,
+ie. the complement of the (finite) bitmap of the edges covered so far.
+'''
+
+
+def to_bitmap(edge_ids: Iterable[int]) -> int:
+    edge_ids = list(edge_ids)
+    if len(edge_ids) == 0:
+        return 0
+    bitmap = bytearray((max(edge_ids) >> 3) + 1)
+    for edge_id in edge_ids:
+        bitmap[edge_id >> 3] |= 1 << (edge_id & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+def to_edge_ids(bitmap: int) -> List[int]:
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, "little")
+    return [(i << 3) + bit for i, byte in enumerate(data) if byte for bit in range(8) if byte >> bit & 1]
+
+
+def count_edges(bitmap: int) -> int:
+    return bitmap.bit_count()
+
+
+def count_covered(virgin_bitmap: int) -> int:
+    return (~virgin_bitmap).bit_count()
+
+
+def has_new_bits(bitmap: int, virgin_bitmap: int) -> bool:
+    return bitmap & virgin_bitmap != 0
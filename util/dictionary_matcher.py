@@ -0,0 +1,74 @@
+from collections import deque
+from typing import Dict, List, Tuple
+
+
+class DictionaryMatcher:
+    """
+    Aho-Corasick automaton over the strings of a dictionary, which finds all the (possibly overlapping) occurrences
+    of all the strings in an input in a single pass over it, instead of one search per string.
+
+    The automaton is built once per dictionary. Its transitions are completed with the failure links when it is
+    built, so that matching takes one lookup per byte of the input.
+    """
+
+    def __init__(self, strings: List[bytes]):
+        # distinct strings of the dictionary, in the order they first appear in it
+        self.strings: List[bytes] = list(dict.fromkeys(strings))
+        # transitions of each state, by byte, and indices of the strings that end in each state
+        self.transitions: List[Dict[int, int]] = [{}]
+        self.outputs: List[List[int]] = [[]]
+        for string_index, string in enumerate(self.strings):
+            if len(string) == 0:
+                continue
+            state = 0
+            for byte in string:
+                if byte not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.outputs.append([])
+                    self.transitions[state][byte] = len(self.transitions) - 1
+                state = self.transitions[state][byte]
+            self.outputs[state].append(string_index)
+
+        # breadth-first, so that the failure state of each state is completed before the state itself;
+        # the failure state of the states at depth 1 is the root
+        failures = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            # the strings ending in the failure state (the longest proper suffix in the automaton) also end here
+            self.outputs[state] = self.outputs[state] + self.outputs[failures[state]]
+            for byte, next_state in self.transitions[state].items():
+                failures[next_state] = self.transitions[failures[state]].get(byte, 0)
+                queue.append(next_state)
+            for byte, next_state in self.transitions[failures[state]].items():
+                self.transitions[state].setdefault(byte, next_state)
+
+    def find_all(self, input_bytes: bytes) -> Dict[bytes, List[int]]:
+        """
+        Return the start positions of all the occurrences of each string of the dictionary that occurs in
+        `input_bytes`. The empty string occurs at every position.
+        """
+        starts: Dict[int, List[int]] = {}
+        transitions = self.transitions
+        outputs = self.outputs
+        state = 0
+        for end, byte in enumerate(input_bytes, 1):
+            state = transitions[state].get(byte, 0)
+            for string_index in outputs[state]:
+                starts.setdefault(string_index, []).append(end - len(self.strings[string_index]))
+        occurrences = {self.strings[string_index]: positions for string_index, positions in starts.items()}
+        if b"" in self.strings:
+            occurrences[b""] = list(range(len(input_bytes) + 1))
+        return occurrences
+
+
+def non_overlapping_ranges(starts: List[int], length: int) -> List[Tuple[int, int]]:
+    """
+    Return the (start, end) ranges of the leftmost non-overlapping occurrences of a string of `length` bytes,
+    given the sorted start positions of all its occurrences.
+    """
+    ranges = []
+    for start in starts:
+        if len(ranges) == 0 or start >= ranges[-1][1]:
+            ranges.append((start, start + length))
+    return ranges
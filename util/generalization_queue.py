@@ -0,0 +1,113 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+from typing import List, Tuple, Union
+
+from executor.InProcessExecutor import InProcessExecutor
+from models.GeneralizedInput import GeneralizedInput
+from util.coverage_bitmap import to_bitmap, to_edge_ids
+
+
+class GeneralizationQueue:
+    """
+    Generalizes inputs on `num_workers` worker processes forked from the fuzzer, so that the fuzz loop keeps
+    mutating while an input is generalized.
+
+    A worker generalizes with its own copy of the fuzzer, which executes the candidates in the worker's process.
+    Since the workers register edges independently of the fuzzer, the coverage of a job is sent as edges
+    (file name, from line, to line) rather than edge IDs. The fuzzer's splitting rules are synchronized
+    with each job: a job skips the rules the fuzzer dropped, and returns the statistics it added to each rule.
+    """
+
+    def __init__(self, fuzzer, num_workers: int):
+        if not hasattr(os, "fork"):
+            raise ValueError("Generalization workers require os.fork, which is not available on this platform")
+        self.fuzzer = fuzzer
+        self.context = multiprocessing.get_context("fork")
+        # Process, connection and inputs being generalized by each worker
+        self.workers: List[Tuple[multiprocessing.Process, multiprocessing.connection.Connection, List[bytes]]] = [
+            self._start_worker() for _ in range(num_workers)
+        ]
+
+    def __len__(self):
+        return sum(len(jobs) for _, _, jobs in self.workers)
+
+    def submit(self, input_data: bytes, new_edges: int, virgin_bits: int):
+        """
+        Queue `input_data` for generalization against a snapshot of the fuzzer's coverage: `new_edges` are the
+        edges the input covers for the first time, and `virgin_bits` is the virgin map before it was saved.
+        """
+        _, connection, jobs = min(self.workers, key=lambda worker: len(worker[2]))
+        edges = self.fuzzer.edge_registry.edges
+        connection.send((input_data,
+                         [edges[edge_id] for edge_id in to_edge_ids(new_edges)],
+                         [edges[edge_id] for edge_id in to_edge_ids(~virgin_bits)],
+                         [rule.dropped for rule in self.fuzzer.splitting_rules]))
+        jobs.append(input_data)
+
+    def poll(self) -> List[Tuple[bytes, Union[GeneralizedInput, None], Union[List[Tuple[int, ...]], None],
+                                 Union[int, None]]]:
+        """
+        Return the generalizations finished since the last call, without waiting, with the counters they added to
+        each splitting rule and the number of executions they took. An input whose worker died while generalizing
+        it is returned with None.
+        """
+        results = []
+        for i, (process, connection, jobs) in enumerate(self.workers):
+            try:
+                while len(jobs) != 0 and connection.poll():
+                    input_data, generalized_input, rule_counters, executions = connection.recv()
+                    jobs.remove(input_data)
+                    results.append((input_data, generalized_input, rule_counters, executions))
+            except (EOFError, OSError):
+                # the worker died (eg. the target exited): replace it and give up on its jobs
+                process.join()
+                connection.close()
+                self.workers[i] = self._start_worker()
+                results.extend([(input_data, None, None, None) for input_data in jobs])
+        return results
+
+    def wait(self):
+        """
+        Block until a worker with jobs has a finished generalization, or died.
+        """
+        busy = [connection for _, connection, jobs in self.workers if len(jobs) != 0]
+        if len(busy) != 0:
+            multiprocessing.connection.wait(busy)
+
+    def close(self):
+        # generalizations still in progress are abandoned
+        for process, connection, _ in self.workers:
+            process.terminate()
+            process.join()
+            connection.close()
+        self.workers = []
+
+    def _start_worker(self):
+        # do not let the worker inherit (and print again) our buffered output
+        sys.stdout.flush()
+        sys.stderr.flush()
+        connection, worker_connection = self.context.Pipe()
+        process = self.context.Process(target=self._worker, args=(worker_connection,), daemon=True)
+        process.start()
+        worker_connection.close()
+        return process, connection, []
+
+    def _worker(self, connection):
+        fuzzer = self.fuzzer
+        fuzzer.tracer.after_fork()
+        fuzzer.executor = InProcessExecutor(fuzzer.module_under_test, fuzzer.tracer)
+        intern = fuzzer.edge_registry.intern
+        while True:
+            input_data, new_edges, covered_edges, dropped_rules = connection.recv()
+            fuzzer.virgin_bits = ~to_bitmap([intern(tuple(edge)) for edge in covered_edges])
+            for rule, dropped in zip(fuzzer.splitting_rules, dropped_rules):
+                rule.dropped = dropped
+            counters = [rule.counters() for rule in fuzzer.splitting_rules]
+            executions = fuzzer.generalization_executions
+            generalized_input = fuzzer.generalize(input_data, to_bitmap([intern(tuple(edge)) for edge in new_edges]))
+            rule_counters = [tuple(after - before for after, before in zip(rule.counters(), rule_before))
+                             for rule, rule_before in zip(fuzzer.splitting_rules, counters)]
+            connection.send((input_data, generalized_input, rule_counters,
+                             fuzzer.generalization_executions - executions))
@@ -1,23 +1,25 @@
 import random
 from typing import List, Union, Set, Callable, Tuple
 
-from models.Blank import Blank
 from models.GeneralizedInput import GeneralizedInput
 from util import splitting_rules
 import logging
 
+# Maximum size in bytes of an input built by `replace_random_gaps`: replacements stop once it is reached
+MAX_REPLACEMENT_SIZE = 1 << 20
+
+
 def random_slice(generalized: List[GeneralizedInput]) -> GeneralizedInput:
     """
     select a substring between two arbitrary blanks in a generalized input
     """
-    chosen = random.choice(generalized).input
-    blank_indices = [i for i in range(len(chosen)) if isinstance(chosen[i], Blank)]
-    blank_indices.extend([-1, len(chosen)])  # consider the beginning and end of the string a blank
+    chosen = random.choice(generalized)
+    # the blank indices, which consider the beginning and end of the string a blank, are computed once per input
     # TODO: will all generalized inputs be saved with start/end blanks? do we need this step?
-    boundaries = random.sample(blank_indices, 2)
+    boundaries = random.sample(chosen.blank_indices(), 2)
     start = min(boundaries)
     end = max(boundaries)
-    return GeneralizedInput(chosen[start + 1:end])  # does not include start and end blanks
+    return chosen.slice(start, end)  # does not include start and end blanks
 
 
 def random_generalized(generalized: List[GeneralizedInput], strings: List[bytes]) -> Union[GeneralizedInput, bytes]:
@@ -48,3 +50,56 @@ def random_generalized(generalized: List[GeneralizedInput], strings: List[bytes]
     else:
         rand = random_generalized_input(generalized)
     return rand
+
+
+def replace_random_gaps(generalized_input: GeneralizedInput, num_replacements: int,
+                        random_part: Callable[[], Union[GeneralizedInput, bytes]],
+                        max_size: int = MAX_REPLACEMENT_SIZE) -> bytes:
+    """
+    Pad `generalized_input` with a gap at the beginning and the end, replace a randomly chosen gap by a part
+    returned by `random_part` `num_replacements` times, and return the bytes of the result (with the remaining
+    gaps replaced by an empty string).
+
+    The input is kept as a tree instead of being rebuilt at each replacement: each gap is a list, which stays
+    empty while the gap is live, and which is filled with the tokens of the part replacing it (bytes, and new
+    gaps for the blanks of the part). The live gaps are kept in a list from which a gap is picked and removed
+    in constant time, and the bytes are joined once at the end. Replacements stop early if no gap is left, or
+    once the input is `max_size` bytes long.
+    """
+    root = [[]] + [token if isinstance(token, bytes) else [] for token in generalized_input.input] + [[]]
+    live_gaps = [token for token in root if isinstance(token, list)]
+    size = len(generalized_input.get_bytes())
+    for _ in range(num_replacements):
+        if len(live_gaps) == 0 or size >= max_size:
+            break
+        part = random_part()
+        i = random.randrange(len(live_gaps))
+        gap = live_gaps[i]
+        live_gaps[i] = live_gaps[-1]
+        live_gaps.pop()
+        if isinstance(part, GeneralizedInput):
+            for token in part.input:
+                if isinstance(token, bytes):
+                    gap.append(token)
+                else:
+                    new_gap = []
+                    gap.append(new_gap)
+                    live_gaps.append(new_gap)
+            size += len(part.get_bytes())
+        else:
+            gap.append(part)
+            size += len(part)
+
+    # join the bytes in order, with an explicit stack since gaps can be nested up to `num_replacements` deep
+    parts = []
+    stack = [iter(root)]
+    while len(stack) != 0:
+        for token in stack[-1]:
+            if isinstance(token, bytes):
+                parts.append(token)
+            else:
+                stack.append(iter(token))
+                break
+        else:
+            stack.pop()
+    return b"".join(parts)
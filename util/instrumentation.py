@@ -0,0 +1,226 @@
+import ast
+import hashlib
+import importlib.abc
+import importlib.machinery
+import marshal
+import os
+import sys
+from typing import List, Tuple, Union
+
+# Name of the module global holding the branch hit map of an instrumented module
+COVERAGE_MAP_NAME = "__grimoire_cov__"
+# Bump when the instrumentation changes, so that stale cache entries are not reused
+INSTRUMENTATION_VERSION = 2
+
+
+class InstrumentedModule:
+    """
+    Branch hit map of an instrumented module, and the source line of each branch.
+    """
+
+    def __init__(self, filename: str, branch_lines: List[int]):
+        self.filename = filename
+        self.branch_lines = branch_lines
+        # hit_map[i] is set to 1 when branch i is taken
+        self.hit_map = bytearray(len(branch_lines))
+
+
+# All modules instrumented so far, in import order
+instrumented_modules: List[InstrumentedModule] = []
+
+
+class BranchInstrumenter(ast.NodeTransformer):
+    """
+    Inserts a `__grimoire_cov__[i] = 1` hit update at the start of every function and of every arm of
+    `if`/`while`/`for`/`try`/`match` statements and conditional expressions, and before every
+    short-circuited operand of a boolean operation.
+    """
+
+    def __init__(self):
+        # Source line of each branch, indexed by branch ID
+        self.branch_lines: List[int] = []
+
+    def new_branch(self, node: ast.AST) -> int:
+        self.branch_lines.append(node.lineno)
+        return len(self.branch_lines) - 1
+
+    def hit_stmt(self, node: ast.AST) -> ast.stmt:
+        hit = ast.Assign(
+            targets=[ast.Subscript(
+                value=ast.Name(id=COVERAGE_MAP_NAME, ctx=ast.Load()),
+                slice=ast.Constant(value=self.new_branch(node)),
+                ctx=ast.Store(),
+            )],
+            value=ast.Constant(value=1),
+        )
+        return ast.copy_location(hit, node)
+
+    def hit_expr(self, node: ast.expr) -> ast.expr:
+        # (__grimoire_cov__.__setitem__(i, 1) or node) evaluates to node
+        hit = ast.BoolOp(op=ast.Or(), values=[
+            ast.Call(
+                func=ast.Attribute(
+                    value=ast.Name(id=COVERAGE_MAP_NAME, ctx=ast.Load()),
+                    attr="__setitem__",
+                    ctx=ast.Load(),
+                ),
+                args=[ast.Constant(value=self.new_branch(node)), ast.Constant(value=1)],
+                keywords=[],
+            ),
+            node,
+        ])
+        return ast.copy_location(hit, node)
+
+    def instrument_body(self, node: ast.AST, body: List[ast.stmt]) -> List[ast.stmt]:
+        if len(body) == 0:
+            return [self.hit_stmt(node)]
+        return [self.hit_stmt(body[0])] + body
+
+    def visit_FunctionDef(self, node):
+        self.generic_visit(node)
+        # keep the docstring as the first statement
+        if isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant) \
+                and isinstance(node.body[0].value.value, str):
+            node.body = [node.body[0]] + self.instrument_body(node, node.body[1:])
+        else:
+            node.body = self.instrument_body(node, node.body)
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_If(self, node):
+        self.generic_visit(node)
+        node.body = self.instrument_body(node, node.body)
+        node.orelse = self.instrument_body(node, node.orelse)
+        return node
+
+    def visit_For(self, node):
+        self.generic_visit(node)
+        node.body = self.instrument_body(node, node.body)
+        # the else arm runs when the loop was not exited through a break
+        node.orelse = self.instrument_body(node, node.orelse)
+        return node
+
+    visit_AsyncFor = visit_For
+    visit_While = visit_For
+
+    def visit_Try(self, node):
+        self.generic_visit(node)
+        node.body = self.instrument_body(node, node.body)
+        for handler in node.handlers:
+            handler.body = self.instrument_body(handler, handler.body)
+        if len(node.handlers) != 0:
+            node.orelse = self.instrument_body(node, node.orelse)
+        return node
+
+    if sys.version_info >= (3, 11):
+        visit_TryStar = visit_Try
+
+    def visit_Match(self, node):
+        self.generic_visit(node)
+        for case in node.cases:
+            case.body = self.instrument_body(case.pattern, case.body)
+        return node
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        node.body = self.hit_expr(node.body)
+        node.orelse = self.hit_expr(node.orelse)
+        return node
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        node.values = [node.values[0]] + [self.hit_expr(value) for value in node.values[1:]]
+        return node
+
+
+def instrument_source(source: Union[str, bytes], filename: str) -> Tuple[List[int], object]:
+    """
+    Parse and instrument `source`, returning the source line of each branch and the compiled code object.
+    """
+    tree = ast.parse(source, filename)
+    instrumenter = BranchInstrumenter()
+    tree = ast.fix_missing_locations(instrumenter.visit(tree))
+    return instrumenter.branch_lines, compile(tree, filename, "exec", dont_inherit=True)
+
+
+def cache_file_name(source_path: str, source: bytes) -> str:
+    """
+    Path of the instrumented bytecode cache entry for `source`, keyed by the hash of the source.
+    """
+    key = hashlib.sha256(source)
+    key.update(f"{INSTRUMENTATION_VERSION}{sys.version}".encode())
+    cache_dir = os.path.join(os.path.dirname(source_path), "__pycache__")
+    module_name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, f"{module_name}.grimoire-{key.hexdigest()[:16]}.instr")
+
+
+def load_instrumented(source_path: str, source: bytes) -> Tuple[List[int], object]:
+    """
+    Return the branch lines and instrumented code of `source`, from the on-disk cache if possible.
+    """
+    cache_file = cache_file_name(source_path, source)
+    try:
+        with open(cache_file, "rb") as cached:
+            return marshal.load(cached)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    branch_lines, code = instrument_source(source, source_path)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, "wb") as cached:
+            marshal.dump((branch_lines, code), cached)
+    except OSError:
+        pass  # caching is best-effort
+    return branch_lines, code
+
+
+class InstrumentingLoader(importlib.machinery.SourceFileLoader):
+    """
+    Loads a module from source with branch hit updates inserted.
+    """
+
+    def get_code(self, fullname):
+        source_path = self.get_filename(fullname)
+        branch_lines, code = load_instrumented(source_path, self.get_data(source_path))
+        self.instrumented_module = InstrumentedModule(source_path, branch_lines)
+        return code
+
+    def exec_module(self, module):
+        code = self.get_code(module.__name__)
+        setattr(module, COVERAGE_MAP_NAME, self.instrumented_module.hit_map)
+        instrumented_modules.append(self.instrumented_module)
+        exec(code, module.__dict__)
+
+
+class InstrumentingFinder(importlib.abc.MetaPathFinder):
+    """
+    Import hook that instruments the modules in `module_names` and the modules under the packages in `packages`.
+    """
+
+    def __init__(self, module_names: List[str], packages: List[str] = None):
+        self.module_names = set(module_names)
+        self.packages = packages if packages is not None else []
+
+    def should_instrument(self, fullname: str) -> bool:
+        return fullname in self.module_names or any(
+            fullname == package or fullname.startswith(package + ".") for package in self.packages
+        )
+
+    def find_spec(self, fullname, path, target=None):
+        if not self.should_instrument(fullname):
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is None or not isinstance(spec.loader, importlib.machinery.SourceFileLoader):
+            return None
+        spec.loader = InstrumentingLoader(fullname, spec.origin)
+        return spec
+
+
+def install_import_hook(module_names: List[str], packages: List[str] = None) -> InstrumentingFinder:
+    """
+    Instrument the given modules and packages when they are imported. Must be called before they are imported.
+    """
+    finder = InstrumentingFinder(module_names, packages)
+    sys.meta_path.insert(0, finder)
+    return finder
@@ -1,191 +1,219 @@
-from typing import List, Union, Callable, Tuple
+from typing import List, Union, Callable, Tuple, Dict, Set
 
 from models.Blank import Blank
-from models.GeneralizedInput import GeneralizedInput
+from models.BlankedInput import BlankedInput
 from models.ReplaceClass import ReplaceClass
+from util.util import str_to_bytes
 
+# Maximum number of independent blanks whose candidates are checked together
+BATCH_BLANKS = 32
+# Number of replacement samples that must pass for a replace class to be valid
+REPLACE_SAMPLES = 10
+# Replace classes that are not a subclass of another one
+REPLACE_CLASS_ROOTS = [ReplaceClass.PRINTABLE]
 
-def increment_by_offset(_, index, offset):
-    return index + offset
 
+def increment_by_offset(blanked_input: BlankedInput, index: int, offset: int) -> int:
+    return blanked_input.boundary(index + offset)
 
-def find_next_char(exploded_input: List[Union[str, Blank]], index: int, char: str):
-    while index < len(exploded_input):
-        if exploded_input[index] == char:
-            return index + 1
-        index += 1
-    return index
 
+def find_next_char(blanked_input: BlankedInput, index: int, char: str) -> int:
+    position = blanked_input.find(str_to_bytes(char), index)
+    return len(blanked_input) if position == -1 else position + 1
 
-def find_closures(l, index, opening_char, closing_char):
-    endings = []
 
-    while index < len(l):
-        if l[index] == opening_char:
-            break
-        index += 1
-
-    start_index = index
-    index_ending = len(l) - 1
-
-    while index_ending > start_index:
-        if l[index_ending] == closing_char:
-            endings.append(index_ending + 1)
-        index_ending -= 1
+def find_closures(blanked_input: BlankedInput, index: int, opening_char: str, closing_char: str) -> Tuple[int, List[int]]:
+    """
+    Return the position of the first opening character at or after `index` (or the length of the input),
+    and the (exclusive) ends of the closing characters after it, from the last to the first.
+    """
+    start_index = blanked_input.find(str_to_bytes(opening_char), index)
+    if start_index == -1:
+        return len(blanked_input), []
+    endings = [position + 1 for position in blanked_input.positions(str_to_bytes(closing_char), start_index + 1)]
+    endings.reverse()
     return start_index, endings
 
 
-'''
-Adds gap in exploded input while retaining information of the removed text.
-For example, for:
-    exploded_input=['h','e','l','l','o']
-    start_index=0
-    end_index=3 (non-inclusive)
-the exploded_input will be modified to:
-    [Blank('hel'), Blank(), Blank(), 'l', 'o']
-'''
-
-
-def add_gap_in_exploded_input(exploded_input, start_index, end_index, removed_blank: Blank):
-    # fill the removed range with Blank objects, with the first Blank containing
-    # the removed text (blanks will be merged later)
-    exploded_input[start_index:end_index] = [removed_blank] + ([Blank.get_blank()] * (end_index - start_index - 1))
-
-
-def create_delete_candidates(exploded_input: List[Union[str, Blank]], blank_start, blank_end) -> Tuple[List[Tuple[bytes, str, Union[ReplaceClass, None]]], List[Union[str, Blank]]]:
-    candidate_exploded_input = exploded_input[0:blank_start] + exploded_input[blank_end:]
-    candidate = GeneralizedInput(candidate_exploded_input, True).get_bytes()
-    return [(candidate, "", None)], exploded_input[blank_start:blank_end]
-
-
-def create_replace_candidates(exploded_input, blank_start, blank_end) -> List[Tuple[bytes, str, ReplaceClass]]:
-    res = []
-    for replace_class in ReplaceClass:
-        seen_candidates = set()
-        for i in range(10):
-            replacement = ReplaceClass.generate(replace_class)
-            while replacement in seen_candidates:
-                replacement = ReplaceClass.generate(replace_class)
-            seen_candidates.add(replacement)
-
-            candidate_exploded_input = exploded_input[0:blank_start] + [replacement] + exploded_input[blank_end:]
-            candidate = GeneralizedInput(candidate_exploded_input, True).get_bytes()
-            res.append((candidate, replacement, replace_class))
-    return res, exploded_input[blank_start:blank_end]
-
-
-def find_gaps(exploded_input: List[Union[str, Blank]],
+def new_blank(blank_type, replace_classes: Set[Union[ReplaceClass, None]]) -> Blank:
+    blank = Blank.get_blank(blank_type=blank_type)
+    if blank_type == Blank.REPLACE:
+        blank.replacements = replace_classes
+    return blank
+
+
+def batch_oracle(candidate_check: Callable[[bytes], bool]) -> Callable[[List[bytes]], List[bool]]:
+    """
+    Turn a check of a single candidate into a batch oracle, which checks a list of candidates.
+    """
+    return lambda candidates: [candidate_check(candidate) for candidate in candidates]
+
+
+def sample_replacement(replace_class: ReplaceClass, seen_replacements: Set[str]) -> str:
+    replacement = ReplaceClass.generate(replace_class)
+    while replacement in seen_replacements:
+        replacement = ReplaceClass.generate(replace_class)
+    seen_replacements.add(replacement)
+    return replacement
+
+
+def check_blanks(blanked_input: BlankedInput,
+                 ranges: List[Tuple[int, int]],
+                 blank_type,
+                 batch_check: Callable[[List[bytes]], List[bool]]) -> List[Set[Union[ReplaceClass, None]]]:
+    """
+    Check whether each (start, end) range of `blanked_input` can be a blank of the given type, and return
+    the set of valid replace classes of each range ({None} for a valid delete blank).
+
+    A replace class is valid if its REPLACE_SAMPLES replacement samples all pass. The classes are walked top-down
+    through their lattice (see `ReplaceClass.subclasses`): a class that passes makes all its subclasses valid
+    without checking them, and the subclasses of a class are only checked once it failed. A class is rejected
+    at its first failing sample.
+
+    Samples are checked in rounds, each round checking the next sample of every pending class of every range,
+    so that a round can be sent to the batch oracle at once.
+    """
+    if blank_type == Blank.DELETE:
+        results = batch_check([blanked_input.candidate(start, end) for start, end in ranges])
+        return [{None} if passed else set() for passed in results]
+
+    valid_replace_classes = [set() for _ in ranges]
+    # (range index, replace class) -> replacements sampled so far
+    pending: Dict[Tuple[int, ReplaceClass], Set[str]] = {
+        (i, replace_class): set() for i in range(len(ranges)) for replace_class in REPLACE_CLASS_ROOTS
+    }
+    while len(pending) != 0:
+        keys = list(pending.keys())
+        replacements = [sample_replacement(replace_class, pending[(i, replace_class)]) for i, replace_class in keys]
+        results = batch_check([blanked_input.candidate(*ranges[i], str_to_bytes(replacement))
+                               for (i, _), replacement in zip(keys, replacements)])
+        for (i, replace_class), passed in zip(keys, results):
+            if not passed:
+                del pending[(i, replace_class)]
+                for subclass in ReplaceClass.subclasses(replace_class):
+                    pending[(i, subclass)] = set()
+            elif len(pending[(i, replace_class)]) == REPLACE_SAMPLES:
+                del pending[(i, replace_class)]
+                valid_replace_classes[i] |= ReplaceClass.descendants(replace_class)
+    return valid_replace_classes
+
+
+def find_gaps(blanked_input: BlankedInput,
               blank_type,
-              candidate_check: Callable[[bytes], bool],
-              find_next_index: Callable[[List[Union[str, Blank]], int, Union[int, str]], int],
-              split_char: str,
-              cumulative: bool):
+              batch_check: Callable[[List[bytes]], List[bool]],
+              find_next_index: Callable[[BlankedInput, int, Union[int, str]], int],
+              split_char: Union[int, str],
+              cumulative: bool) -> BlankedInput:
     if blank_type == Blank.REPLACE:
         cumulative = False
-    # if non-cumulative, working_exploded_input will not be modified
-    working_exploded_input = exploded_input if cumulative else exploded_input.copy()
+    # if non-cumulative, working_input will not be modified
+    working_input = blanked_input if cumulative else blanked_input.copy()
     index = 0
 
     # index = start of blank that we're trying
-    while index < len(working_exploded_input):
+    while index < len(working_input):
         '''
         # start
-        exploded_input = "helloworld"
+        blanked_input = "helloworld"
         working = "helloworld"
         
         # after 1st iteration
-        exploded_input = "__lloworld"
-        working = "__lloworld" # cumulative case, working == exploded_input
+        blanked_input = "[he]lloworld"
+        working = "[he]lloworld" # cumulative case, working == blanked_input
         working = "helloworld" # non-cumulative case
         '''
 
-        # resume_index = end of blank that we're trying
-        resume_index = find_next_index(working_exploded_input, index, split_char)
+        # if non-cumulative, the blanks do not depend on each other, so the candidates of
+        # several blanks are checked together
+        blanks = []  # [(blank start, blank end), ...]
+        while index < len(working_input) and (len(blanks) == 0 or not cumulative and len(blanks) < BATCH_BLANKS):
+            # resume_index = end of blank that we're trying
+            resume_index = find_next_index(working_input, index, split_char)
+            # deleting a range that is already blank would not change the input
+            if blank_type == Blank.REPLACE or working_input.kept_offset(index) != working_input.kept_offset(resume_index):
+                blanks.append((index, resume_index))
+            index = resume_index
 
-        create_candidates = create_delete_candidates if blank_type == Blank.DELETE else create_replace_candidates
+        # replace classes = set of valid replace classes for each blank
+        blanks_replace_classes = check_blanks(working_input, blanks, blank_type, batch_check)
 
-        valid_replace_classes = set()  # set of replace classes with passing candidates
-        invalid_replace_classes = set()  # set of replace classes with failing candidates
+        for (blank_start, blank_end), replace_classes in zip(blanks, blanks_replace_classes):
+            # if there is anything in replace_classes, it means the blank is valid
+            # -> add the blank in the input
+            if len(replace_classes) != 0:
+                blanked_input.add_blank(blank_start, blank_end, new_blank(blank_type, replace_classes))
 
-        # candidate_info = [(candidate, replacement, replace class), ...]
-        candidate_info, removed = create_candidates(working_exploded_input, index, resume_index)
+    return blanked_input
 
-        # create the blank object to store the information for the current blank we're trying
-        removed_blank = Blank.get_blank(blank_type=blank_type)  # blank containing info about the removed chunk
-        for token in removed:
-            removed_blank.append(token)
 
-        # run each candidate through the fuzzer
-        for (candidate, replacement, replace_class) in candidate_info:
-            if replace_class in invalid_replace_classes:
-                continue
-            if candidate_check(candidate):
-                valid_replace_classes.add(replace_class)
-            else:
-                invalid_replace_classes.add(replace_class)
-
-        # replace classes = set of valid replace classes for this blank
-        replace_classes = valid_replace_classes.difference(invalid_replace_classes)
-        # if there is anything in replace_classes, it means the blank is valid
-        # -> add the blank in the exploded input
-        if len(replace_classes) != 0:
-            if blank_type == Blank.REPLACE:
-                removed_blank.replacements = replace_classes
-            add_gap_in_exploded_input(exploded_input, index, resume_index, removed_blank)
-
-        index = resume_index
-
-    ret = GeneralizedInput(exploded_input, True)
-    ret.merge_adjacent_gaps_and_bytes()
-    return ret.to_exploded_input()
-
-
-def find_gaps_in_closures(exploded_input: List[Union[str, None]],
+def find_gaps_in_closures(blanked_input: BlankedInput,
                           blank_type,
-                          candidate_check: Callable[[bytes], bool],
-                          find_closures: Callable[[List[Union[str, None]], int, str, str], Tuple[int, List[int]]],
+                          batch_check: Callable[[List[bytes]], List[bool]],
+                          find_closures: Callable[[BlankedInput, int, str, str], Tuple[int, List[int]]],
                           opening_char: str,
                           closing_char: str,
-                          cumulative: bool):
+                          cumulative: bool) -> BlankedInput:
     if blank_type == Blank.REPLACE:
         cumulative = False
-    # if non-cumulative, working_exploded_input will not be modified
-    working_exploded_input = exploded_input if cumulative else exploded_input.copy()
+    # if non-cumulative, working_input will not be modified
+    working_input = blanked_input if cumulative else blanked_input.copy()
     index = 0
-    create_candidates = create_delete_candidates if blank_type == Blank.DELETE else create_replace_candidates
-    while index < len(working_exploded_input):
-        index, endings = find_closures(working_exploded_input, index, opening_char, closing_char)
+    while index < len(working_input):
+        index, endings = find_closures(working_input, index, opening_char, closing_char)
 
         if len(endings) == 0:
             break
 
-        ending = len(working_exploded_input)
-        while endings:
-            ending = endings.pop(0)
-
-            valid_replace_classes = set()
-            invalid_replace_classes = set()
-            candidate_info, removed = create_candidates(working_exploded_input, index, ending)
-            removed_blank = Blank.get_blank(blank_type=blank_type)  # blank containing info about the removed chunk
-            for token in removed:
-                removed_blank.append(token)
-            for (candidate, replacement, replace_class) in candidate_info:
-                if replace_class in invalid_replace_classes:
-                    continue
-                if candidate_check(candidate):
-                    valid_replace_classes.add(replace_class)
-                else:
-                    invalid_replace_classes.add(replace_class)
-
-            valid_replace_classes = valid_replace_classes.difference(invalid_replace_classes)
+        ending = len(working_input)
+        for ending in endings:
+            valid_replace_classes = check_blanks(working_input, [(index, ending)], blank_type, batch_check)[0]
             if len(valid_replace_classes) != 0:
-                if blank_type == Blank.REPLACE:
-                    removed_blank.replacements = valid_replace_classes
-                add_gap_in_exploded_input(exploded_input, index, ending, removed_blank)
+                blanked_input.add_blank(index, ending, new_blank(blank_type, valid_replace_classes))
                 break
 
         index = ending
 
-    ret = GeneralizedInput(exploded_input, True)
-    ret.merge_adjacent_gaps_and_bytes()
-    return ret.to_exploded_input()
+    return blanked_input
+
+
+def find_gaps_ddmin(blanked_input: BlankedInput,
+                    blank_type,
+                    batch_check: Callable[[List[bytes]], List[bool]],
+                    cumulative: bool) -> BlankedInput:
+    """
+    Find gaps by hierarchical delta debugging instead of walking the input at a fixed offset.
+
+    The whole input is tried as a single blank first. Chunks that fail the check are bisected and their halves are
+    tried at the next level, until the chunks are single characters; chunks that pass are never refined. Chunks
+    that only contain blanks already are skipped.
+    """
+    if blank_type == Blank.REPLACE:
+        cumulative = False
+    # if non-cumulative, working_input will not be modified
+    working_input = blanked_input if cumulative else blanked_input.copy()
+
+    # chunks of the current level, as (start, end) ranges of working_input
+    chunks = [(0, len(working_input))]
+    while len(chunks) != 0:
+        chunks = [(start, end) for (start, end) in chunks
+                  if working_input.kept_offset(start) != working_input.kept_offset(end)]
+        next_chunks = []
+        # if cumulative, each chunk is checked against the input with the previous blanks applied
+        batch_size = 1 if cumulative else BATCH_BLANKS
+        for batch_start in range(0, len(chunks), batch_size):
+            batch = chunks[batch_start:batch_start + batch_size]
+            blanks_replace_classes = check_blanks(working_input, batch, blank_type, batch_check)
+            for (start, end), replace_classes in zip(batch, blanks_replace_classes):
+                if len(replace_classes) != 0:
+                    blanked_input.add_blank(start, end, new_blank(blank_type, replace_classes))
+                    continue
+                # split at a character boundary that is not inside a blank
+                middle = working_input.boundary((start + end) // 2)
+                if middle >= end:
+                    blank = working_input.blank_at((start + end) // 2)
+                    middle = blank[0] if blank is not None else end
+                if start < middle < end:
+                    next_chunks.extend([(start, middle), (middle, end)])
+        chunks = next_chunks
+
+    return blanked_input
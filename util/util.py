@@ -1,7 +1,7 @@
 import time
 import re
 import random
-from typing import List, Tuple, Union
+from typing import Dict, List, Tuple, Union
 
 
 def log(*args, **kwargs):
@@ -35,23 +35,31 @@ def find_all_nonoverlapping_substr(input_bytes: bytes, pattern: bytes) -> List[T
     return match_ranges
 
 
-def find_random_substring(input_bytes: bytes, strings: List[bytes]) -> Union[bytes, None]:
+def find_random_substring(input_bytes: bytes, strings: List[bytes],
+                          occurrences: Dict[bytes, List[int]] = None) -> Union[bytes, None]:
     # locates all substrings in the input that match strings from
     # the obtained dictionary and chooses one randomly
+    # `occurrences` (see util.dictionary_matcher) saves searching the input for each string
     matched = []
     for pattern in strings:
-        if len(find_all_nonoverlapping_substr(input_bytes, pattern)) != 0:
+        if occurrences is not None:
+            if pattern in occurrences:
+                matched.append(pattern)
+        elif len(find_all_nonoverlapping_substr(input_bytes, pattern)) != 0:
             matched.append(pattern)
     return random.choice(matched) if len(matched) != 0 else None
 
-def replace_random_instance(input_bytes: bytes, sub: bytes, rand: bytes):
-    match_ranges = find_all_nonoverlapping_substr(input_bytes, sub)
+def replace_random_instance(input_bytes: bytes, sub: bytes, rand: bytes, match_ranges: List[Tuple[int, int]] = None):
+    if match_ranges is None:
+        match_ranges = find_all_nonoverlapping_substr(input_bytes, sub)
     (start, end) = random.choice(match_ranges) # end is not inclusive
     return input_bytes[0:start] + rand + input_bytes[end:]
 
 
-def replace_all_instances(input_bytes: bytes, sub: bytes, rand: bytes) -> bytes:
-    match_ranges = find_all_nonoverlapping_substr(input_bytes, sub)
+def replace_all_instances(input_bytes: bytes, sub: bytes, rand: bytes,
+                          match_ranges: List[Tuple[int, int]] = None) -> bytes:
+    if match_ranges is None:
+        match_ranges = find_all_nonoverlapping_substr(input_bytes, sub)
     if len(match_ranges) != 0:
         tokens = []
         start = 0